@@ -1,12 +1,15 @@
 import streamlit as st
 from pathlib import Path
 from auth_db import authenticate, create_user, init_db
+from core.ml import start_model_watcher
 from core.ui_shell import apply_global_styles, top_navbar
 
 st.set_page_config(page_title="URL Attack Detection System", layout="wide", initial_sidebar_state="collapsed")
 
 # Init auth/db
 init_db()
+# Hot-reload newly published model versions without restarting the server
+start_model_watcher()
 st.session_state.setdefault("auth", {"logged_in": False, "user": None})
 st.session_state.setdefault("auth_ok", False)
 st.session_state.setdefault("user", None)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the detection hot paths. Run from the repository root, e.g.
+``python -m benchmarks.hashed_features``.
+"""
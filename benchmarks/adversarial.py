@@ -0,0 +1,80 @@
+"""
+Crafted URLs against the rule regexes: the hard-coded signatures as they were
+before rule packs (one re.search each) versus detect_attack and
+apply_rules_url on the active pack, whose patterns are vetted or rewritten by
+core.redos and whose regex scanning per URL is capped by the set's budget.
+Reports the worst time per URL and how many URLs ran out of budget.
+"""
+from __future__ import annotations
+
+import re
+import time
+from typing import Callable, Dict, List
+
+from core.rulepack import RULE_TIMEOUT, get_rule_pack
+from core.rules import apply_rules_url
+from detector import detect_attack
+
+# detector.PATTERNS as they were hard-coded before rule packs
+LEGACY_SIGNATURES = {
+    "SQL Injection": re.compile(r"(union|select|sleep|drop|--|'\s*or)", re.I),
+    "XSS": re.compile(r"(<script|javascript:|onerror=|onload=)", re.I),
+    "Directory Traversal": re.compile(r"(\.\./|%2e%2e%2f)", re.I),
+    "Command Injection": re.compile(r"(;|&&|\|).*(ls|cat|pwd|whoami)", re.I),
+    "SSRF": re.compile(r"(169\.254\.169\.254|metadata)", re.I),
+}
+
+LENGTHS = [1_000, 4_000, 16_000]
+
+
+def _payloads(n: int) -> Dict[str, str]:
+    return {
+        "semicolons": "/?q=" + ";" * n,
+        "pipes": "/?q=" + "|" * n + "x",
+        "ampersands": "/?q=" + "&&" * (n // 2),
+        "quote+spaces": "/?q='" + " " * n,
+        "union+spaces": "/?q=union" + " " * n,
+        "encoded quotes": "/?q=" + "%27" * (n // 3),
+        "letters": "/" + "a" * n,
+    }
+
+
+def _legacy_detect(url: str) -> List[str]:
+    return [name for name, pattern in LEGACY_SIGNATURES.items() if pattern.search(url)]
+
+
+def _worst_ms(fn: Callable[[str], object], urls: List[str]) -> float:
+    worst = 0.0
+    for url in urls:
+        start = time.perf_counter()
+        fn(url)
+        worst = max(worst, time.perf_counter() - start)
+    return worst * 1000
+
+
+def main() -> None:
+    pack = get_rule_pack()
+    budgets = {name: rule_set.budget_chars for name, rule_set in pack.sets.items()}
+    print(f"[info] rule pack {pack.name} v{pack.version}, regex budget per URL (chars): {budgets}")
+
+    header = f"{'Payload':<16} {'Length':>7} {'legacy ms':>10} {'detect_attack ms':>17} {'apply_rules_url ms':>19}"
+    print(header)
+    print("-" * len(header))
+    for n in LENGTHS:
+        for name, url in _payloads(n).items():
+            legacy = _worst_ms(_legacy_detect, [url])
+            detect = _worst_ms(detect_attack, [url])
+            rules = _worst_ms(apply_rules_url, [url])
+            print(f"{name:<16} {n:>7,} {legacy:>10.2f} {detect:>17.2f} {rules:>19.2f}")
+
+    pack.reset_counters()
+    urls = [url for n in LENGTHS for url in _payloads(n).values()]
+    for url in urls:
+        detect_attack(url)
+        apply_rules_url(url)
+    timeouts = {row["set"]: row["hits"] for row in pack.stats() if row["rule"] == RULE_TIMEOUT.id}
+    print(f"[info] {RULE_TIMEOUT.id} hits per rule set over {len(urls)} payloads: {timeouts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Two-stage cascade (numeric model first, full TF-IDF model only inside the
+uncertainty band) versus always scoring with the full model: share of URLs
+settled by the numeric stage, accuracy delta on held-out URLs, and end-to-end
+predict_urls throughput from raw URLs.
+"""
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+import core.ml as ml
+from benchmarks.corpus import noisy_labelled_urls
+from core.cache import VerdictCache
+from core.numeric_features import combine_feature_blocks, extract_numeric_matrix
+from train_models import evaluate_cascade, train_logistic, train_numeric
+
+N_TRAIN = 20_000
+N_SCORE = 20_000
+LABEL_NOISE = 0.05
+BANDS = [(0.45, 0.55), (0.2, 0.8), (0.1, 0.9), (0.02, 0.98)]
+
+
+def _rows_per_sec(urls, **kwargs) -> float:
+    start = time.perf_counter()
+    ml.predict_urls(urls, use_cache=False, **kwargs)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    vectorizer = joblib.load("models/vectorizer.pkl")
+    urls, labels = noisy_labelled_urls(N_TRAIN + N_SCORE, LABEL_NOISE)
+    X = combine_feature_blocks(extract_numeric_matrix(urls), vectorizer.transform(urls))
+    X_train, X_test = X[:N_TRAIN], X[N_TRAIN:]
+    y_train, y_test = labels[:N_TRAIN], labels[N_TRAIN:]
+    score_urls = urls[N_TRAIN:]
+
+    print(f"[info] Training full + numeric models on {N_TRAIN:,} noisy URLs ...")
+    full = train_logistic(X_train, y_train)
+    numeric = train_numeric(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"tfidf": Path(tmp) / "full.pkl", ml.NUMERIC_MODE: Path(tmp) / "numeric.pkl"}
+        joblib.dump(full, paths["tfidf"])
+        joblib.dump(numeric, paths[ml.NUMERIC_MODE])
+        ml.MODEL_PATHS = {
+            "tfidf": (paths["tfidf"], ml.VECTORIZER_PATH),
+            ml.NUMERIC_MODE: (paths[ml.NUMERIC_MODE], None),
+        }
+        ml.registry.REGISTRY_DIR = Path(tmp) / "registry"  # score the files above, not a local registry
+        ml.VERDICT_CACHE = VerdictCache(0)
+
+        base = _rows_per_sec(score_urls)
+        full_accuracy = evaluate_cascade(numeric, full, X_test, y_test)["full_accuracy"]
+        print(f"[info] Full model only: {base:,.0f} URLs/s, accuracy {full_accuracy:.4f}")
+
+        header = f"{'Band':>12} {'Numeric only':>13} {'Full':>7} {'Acc delta':>10} {'URLs/s':>9} {'Speedup':>8}"
+        print(header)
+        print("-" * len(header))
+        for band in BANDS:
+            report = evaluate_cascade(numeric, full, X_test, y_test, band)
+            ml.CASCADE_STATS.reset()
+            rate = _rows_per_sec(score_urls, cascade=True, band=band)
+            served = ml.CASCADE_STATS.stats()
+            assert np.isclose(served["numeric_fraction"], report["numeric_fraction"], atol=1e-3)
+            print(
+                f"{str(band):>12} {served['numeric_fraction']:>12.1%} {served['full_fraction']:>7.1%} "
+                f"{report['accuracy_delta']:>+10.4f} {rate:>9,.0f} {rate / base:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
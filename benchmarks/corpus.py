@@ -0,0 +1,43 @@
+"""
+Synthetic URL corpora shared by the benchmarks.
+"""
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+import pandas as pd
+
+SEED_FILE = "data/combined_dataset.csv"
+# Named corpus sizes used by the benchmark suite
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+_WORDS = ["id", "page", "q", "user", "token", "ref", "cat", "item", "lang", "sort"]
+
+
+def synthetic_urls(n: int, seed: int = 7) -> List[str]:
+    """Mutate dataset URLs with random paths/params so the corpus is not just repeats."""
+    rng = random.Random(seed)
+    base = pd.read_csv(SEED_FILE)["url"].dropna().astype(str).tolist()
+    urls = []
+    for _ in range(n):
+        url = rng.choice(base).rstrip("/")
+        path = "/".join(rng.choice(_WORDS) + str(rng.randint(0, 999)) for _ in range(rng.randint(0, 3)))
+        query = "&".join(f"{rng.choice(_WORDS)}={rng.randint(0, 10**6)}" for _ in range(rng.randint(0, 4)))
+        urls.append(f"{url}/{path}" + (f"?{query}" if query else ""))
+    return urls
+
+
+def noisy_labelled_urls(n: int, noise: float = 0.15, seed: int = 3) -> Tuple[List[str], List[str]]:
+    """
+    Synthetic URLs labelled by the rule layer with a fraction of labels flipped.
+    The noise makes fully grown trees deep, like a forest trained on real traffic.
+    """
+    from core.rules import apply_rules_url
+
+    urls = synthetic_urls(n)
+    rng = random.Random(seed)
+    labels = []
+    for url in urls:
+        hit = bool(apply_rules_url(url)["rules_triggered"])
+        labels.append("malicious" if hit != (rng.random() < noise) else "benign")
+    return urls, labels
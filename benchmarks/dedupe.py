@@ -0,0 +1,81 @@
+"""
+Deduplicate-then-fan-out on a Zipf-distributed access log: analyze_urls as
+it is (each distinct URL analyzed once, results fanned out) versus the same
+code with deduplication disabled (every log line analyzed on its own, as
+before). Reports distinct-URL share, per-URL stage calls (rules, risk,
+explain), wall time and lines/s, and checks both give the same results.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+import core.ml as ml
+import core.pipeline as pipeline
+from benchmarks.corpus import synthetic_urls
+from core.cache import VerdictCache
+from core.timing import PIPELINE_TIMER
+
+
+def zipf_log(n_lines: int, n_urls: int, s: float, seed: int = 1) -> List[str]:
+    """n_lines log URLs where the k-th most popular of n_urls URLs has weight 1/k**s."""
+    urls = list(dict.fromkeys(synthetic_urls(n_urls * 2, seed=seed)))[:n_urls]
+    weights = 1.0 / np.arange(1, len(urls) + 1) ** s
+    picks = np.random.default_rng(seed).choice(len(urls), size=n_lines, p=weights / weights.sum())
+    return [urls[i] for i in picks.tolist()]
+
+
+def _no_dedupe(urls):
+    cleaned = [pipeline._safe_url(u) for u in urls]
+    return cleaned, list(range(len(cleaned))), [1] * len(cleaned)
+
+
+def _run(lines: List[str]):
+    ml.VERDICT_CACHE.clear()
+    PIPELINE_TIMER.reset()
+    start = time.perf_counter()
+    results = pipeline.analyze_urls(lines)
+    seconds = time.perf_counter() - start
+    calls = {row["stage"]: row["calls"] for row in PIPELINE_TIMER.snapshot()}
+    return results, seconds, calls.get("explain", 0)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--urls", type=int, default=20_000)
+    parser.add_argument("--s", type=float, nargs="+", default=[0.8, 1.1, 1.4])
+    args = parser.parse_args(argv)
+
+    ml.VERDICT_CACHE = VerdictCache(args.urls * 2)
+    PIPELINE_TIMER.enable()
+    pipeline.analyze_urls(synthetic_urls(200))  # warm-up: model and rule pack load
+
+    header = f"{'Zipf s':>6} {'distinct':>9} {'mode':<11} {'explain calls':>14} {'seconds':>8} {'lines/s':>9}"
+    print(f"[info] {args.lines:,} log lines drawn from {args.urls:,} URLs")
+    print(header)
+    print("-" * len(header))
+    dedupe = pipeline.dedupe_urls
+    for s in args.s:
+        lines = zipf_log(args.lines, args.urls, s)
+        distinct = len(set(lines)) / len(lines)
+        pipeline.dedupe_urls = _no_dedupe
+        try:
+            before, before_s, before_calls = _run(lines)
+        finally:
+            pipeline.dedupe_urls = dedupe
+        after, after_s, after_calls = _run(lines)
+        for row in before:
+            row.pop("occurrences")
+        if before != [{k: v for k, v in row.items() if k != "occurrences"} for row in after]:
+            raise SystemExit("deduplicated results differ from per-line results")
+        for mode, calls, seconds in (("per line", before_calls, before_s), ("deduped", after_calls, after_s)):
+            print(f"{s:>6.1f} {distinct:>9.1%} {mode:<11} {calls:>14,} {seconds:>8.2f} {len(lines) / seconds:>9,.0f}")
+    PIPELINE_TIMER.disable()
+
+
+if __name__ == "__main__":
+    main()
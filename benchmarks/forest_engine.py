@@ -0,0 +1,69 @@
+"""
+Throughput of RandomForest scoring by batch size: sklearn predict_proba
+(per-tree Python dispatch) versus the flat traversal in core.forest, which
+walks (row, tree) pairs below PER_TREE_MIN_ROWS rows and one tree at a time
+from there on. Serving only uses the flat engine; exits non-zero if it falls
+below MIN_RATIO of sklearn's throughput at any batch size.
+"""
+from __future__ import annotations
+
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.corpus import noisy_labelled_urls
+from core.forest import PER_TREE_MIN_ROWS, FlatForest
+from core.numeric_features import combine_feature_blocks, extract_numeric_matrix
+
+N_TRAIN = 5_000
+N_TREES = 200
+BATCH_SIZES = [1, 10, 100, 500, 1_000, 2_000, 4_000, 10_000]
+MIN_RATIO = 0.5
+MIN_SECONDS = 1.0
+
+
+def _rows_per_sec(score, X, batch: int) -> float:
+    rows = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        for offset in range(0, X.shape[0] - batch + 1, batch):
+            score(X[offset : offset + batch])
+            rows += batch
+            if time.perf_counter() - start >= MIN_SECONDS:
+                break
+    return rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    from sklearn.ensemble import RandomForestClassifier
+
+    vectorizer = joblib.load("models/vectorizer.pkl")
+    urls, labels = noisy_labelled_urls(N_TRAIN + max(BATCH_SIZES))
+    X = combine_feature_blocks(extract_numeric_matrix(urls), vectorizer.transform(urls))
+    X_train, X_score = X[:N_TRAIN], X[N_TRAIN:]
+
+    print(f"[info] Training RandomForest ({N_TREES} trees, {N_TRAIN:,} noisy URLs) ...")
+    forest = RandomForestClassifier(n_estimators=N_TREES, n_jobs=-1, random_state=42).fit(X_train, labels[:N_TRAIN])
+    flat = FlatForest.from_model(forest)
+    max_diff = np.abs(flat.predict_proba(X_score) - forest.predict_proba(X_score)).max()
+    print(f"[info] {flat.n_trees} trees, {len(flat.threshold):,} nodes; max |proba diff| vs sklearn = {max_diff:.2e}")
+
+    header = f"{'Batch':>7} {'sklearn rows/s':>15} {'flat rows/s':>12} {'Speedup':>8} {'Walk':>9}"
+    print(f"[info] Flat traversal walks one tree at a time from {PER_TREE_MIN_ROWS:,} rows")
+    print(header)
+    print("-" * len(header))
+    slow = []
+    for batch in BATCH_SIZES:
+        sk = _rows_per_sec(forest.predict_proba, X_score, batch)
+        fl = _rows_per_sec(flat.predict_proba, X_score, batch)
+        walk = "per-tree" if batch >= PER_TREE_MIN_ROWS else "pairs"
+        print(f"{batch:>7,} {sk:>15,.0f} {fl:>12,.0f} {fl / sk:>7.1f}x {walk:>9}")
+        if fl < MIN_RATIO * sk:
+            slow.append(batch)
+    if slow:
+        raise SystemExit(f"Flat traversal is below {MIN_RATIO:.0%} of sklearn at batch sizes {slow}")
+
+
+if __name__ == "__main__":
+    main()
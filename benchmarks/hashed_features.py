@@ -0,0 +1,71 @@
+"""
+Compare the fitted TF-IDF vocabulary with the stateless hashed n-gram mode:
+transform throughput, pickled size (what gets copied into worker processes),
+the hashed idf table saved beside it (mapped, not copied) and LogisticRegression
+F1 on the processed splits.
+"""
+from __future__ import annotations
+
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.corpus import synthetic_urls
+from feature_extractor import FEATURE_MODES, build_feature_matrix
+from train_models import evaluate, train_logistic
+
+N_URLS = 20_000
+REPEATS = 3
+
+
+def main() -> None:
+    urls = pd.Series(synthetic_urls(N_URLS))
+    print(f"[info] Synthetic corpus: {len(urls):,} URLs, {REPEATS} timed repeats per mode")
+
+    rows = []
+    for mode in FEATURE_MODES:
+        X_train, X_val, X_test, y_train, y_val, y_test, vectorizer = build_feature_matrix(feature_mode=mode)
+        model = train_logistic(X_train, y_train)
+        val_f1 = evaluate(model, X_val, y_val)["f1"]
+        test_f1 = evaluate(model, X_test, y_test)["f1"]
+
+        vectorizer.transform(urls[:100])  # warm-up
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            vectorizer.transform(urls)
+            best = min(best, time.perf_counter() - start)
+
+        idf_kb = 0.0
+        with tempfile.TemporaryDirectory() as tmp:
+            if hasattr(vectorizer, "save_idf") and vectorizer.idf_ is not None:
+                idf_kb = vectorizer.save_idf(Path(tmp) / "idf.npy").stat().st_size / 1024
+            pickled_kb = len(pickle.dumps(vectorizer)) / 1024
+
+        rows.append(
+            {
+                "mode": mode,
+                "urls_per_sec": len(urls) / best,
+                "pickled_kb": pickled_kb,
+                "idf_kb": idf_kb,
+                "columns": X_train.shape[1],
+                "val_f1": val_f1,
+                "test_f1": test_f1,
+            }
+        )
+
+    header = f"{'Mode':<8} {'URLs/sec':>10} {'Pickle KB':>10} {'idf KB':>8} {'Columns':>9} {'Val F1':>7} {'Test F1':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['mode']:<8} {row['urls_per_sec']:>10,.0f} {row['pickled_kb']:>10.1f} {row['idf_kb']:>8.1f} "
+            f"{row['columns']:>9,} {row['val_f1']:>7.3f} {row['test_f1']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Load test for core.server: CONCURRENCY keep-alive clients each POST one URL
+at a time for DURATION seconds. Reports p50/p99 latency and requests/s.
+
+By default it starts the server itself, once with micro-batching disabled
+(max_batch=1) and once with the defaults. Use --host/--port to test an
+already running server instead.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from benchmarks.corpus import synthetic_urls
+from core.server import DEFAULT_PORT, MAX_BATCH
+
+CONCURRENCY = 64
+DURATION = 10.0
+
+
+async def _request(reader, writer, host: str, path: str, payload: Optional[dict]) -> dict:
+    body = json.dumps(payload).encode() if payload is not None else b""
+    method = "POST" if payload is not None else "GET"
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = (await reader.readline()).split(b" ", 2)[1]
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    data = json.loads(await reader.readexactly(length))
+    if status != b"200":
+        raise RuntimeError(f"HTTP {status.decode()}: {data}")
+    return data
+
+
+async def _client(host: str, port: int, urls: List[str], stop_at: float, latencies: List[float]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        await _request(reader, writer, host, "/score", {"url": urls[i % len(urls)]})
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    writer.close()
+
+
+async def _wait_healthy(host: str, port: int, timeout: float = 60.0) -> dict:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            health = await _request(reader, writer, host, "/healthz", None)
+            writer.close()
+            return health
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def _run(host: str, port: int, concurrency: int, duration: float) -> dict:
+    await _wait_healthy(host, port)
+    per_client = synthetic_urls(concurrency * 200)
+    latencies: List[float] = []
+    start = time.perf_counter()
+    stop_at = start + duration
+    await asyncio.gather(
+        *(_client(host, port, per_client[i::concurrency], stop_at, latencies) for i in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+    health = await _wait_healthy(host, port)
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "mean_batch": health["batching"]["mean_batch"],
+    }
+
+
+def _spawned(port: int, max_batch: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "core.server", "--port", str(port), "--max-batch", str(max_batch)],
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Test a running server instead of spawning one")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    args = parser.parse_args()
+
+    if args.port:
+        configs = [("running server", None)]
+    else:
+        configs = [("max_batch=1", 1), (f"max_batch={MAX_BATCH}", MAX_BATCH)]
+
+    rows = []
+    for name, max_batch in configs:
+        port = args.port or DEFAULT_PORT
+        proc = _spawned(port, max_batch) if max_batch is not None else None
+        try:
+            print(f"[info] {name}: {args.concurrency} clients for {args.duration:.0f}s ...")
+            rows.append((name, asyncio.run(_run(args.host, port, args.concurrency, args.duration))))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+    header = f"{'Server':<16} {'Requests':>9} {'Req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'Mean batch':>11}"
+    print(header)
+    print("-" * len(header))
+    for name, r in rows:
+        print(
+            f"{name:<16} {r['requests']:>9,} {r['rps']:>8,.0f} {r['p50_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['mean_batch']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Resident memory per process for a RandomForest loaded the old way (joblib
+pickle, private copy per process) versus the flat mmapped layout from
+core.forest (shared page-cache pages).
+
+Starts WORKERS fresh processes per layout. Each one loads the model, scores a
+batch so the pages are touched, and waits at a barrier. Memory is read from
+/proc/self/smaps_rollup while all of them are alive. PSS splits shared pages
+between the processes that map them, so it is the per-process cost on the host.
+Linux only.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import joblib
+import numpy as np
+
+from benchmarks.corpus import noisy_labelled_urls
+from core.forest import FlatForest, export_forest
+from core.numeric_features import combine_feature_blocks, extract_numeric_matrix
+
+WORKERS = 4
+N_TRAIN = 10_000
+N_TREES = 200
+LABEL_NOISE = 0.15
+
+
+def _memory_kb() -> Dict[str, int]:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _worker(layout: str, model_path: str, X, barrier, queue) -> None:
+    import sklearn.ensemble  # noqa: F401 - import cost is not model memory, keep it out of the delta
+
+    before = _memory_kb()
+    if layout == "pickle":
+        model = joblib.load(model_path)
+    else:
+        model = FlatForest.load(Path(model_path))
+    model.predict_proba(X)
+    barrier.wait()  # everyone has the model mapped before anyone measures
+    after = _memory_kb()
+    queue.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def _measure(layout: str, model_path: str, X) -> Dict[str, float]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(WORKERS)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(layout, model_path, X, barrier, queue)) for _ in range(WORKERS)]
+    for proc in procs:
+        proc.start()
+    samples = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {key: float(np.mean([s[key] for s in samples])) for key in samples[0]}
+
+
+def main() -> None:
+    from sklearn.ensemble import RandomForestClassifier
+
+    vectorizer = joblib.load("models/vectorizer.pkl")
+    urls, labels = noisy_labelled_urls(N_TRAIN, LABEL_NOISE)
+    X = combine_feature_blocks(extract_numeric_matrix(urls), vectorizer.transform(urls))
+
+    print(f"[info] Training RandomForest ({N_TREES} trees, {N_TRAIN:,} noisy URLs) ...")
+    start = time.perf_counter()
+    forest = RandomForestClassifier(n_estimators=N_TREES, n_jobs=-1, random_state=42).fit(X, labels)
+    print(f"[info] Trained in {time.perf_counter() - start:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = Path(tmp) / "url_model.pkl"
+        joblib.dump(forest, pickle_path)
+        flat_path = export_forest(forest, Path(tmp) / "forest")
+        flat_mb = sum(p.stat().st_size for p in flat_path.iterdir()) / 2**20
+        print(f"[info] Pickle {pickle_path.stat().st_size / 2**20:.1f} MB, flat arrays {flat_mb:.1f} MB")
+
+        X_score = X[:2000]
+        results = {
+            "pickle": _measure("pickle", str(pickle_path), X_score),
+            "mmap": _measure("mmap", str(flat_path), X_score),
+        }
+
+    print(f"\n=== Memory added per process by loading + scoring ({WORKERS} processes) ===")
+    header = f"{'Layout':<8} {'RSS MB':>8} {'PSS MB':>8} {'Private MB':>11}"
+    print(header)
+    print("-" * len(header))
+    for layout, mem in results.items():
+        print(f"{layout:<8} {mem['rss'] / 1024:>8.1f} {mem['pss'] / 1024:>8.1f} {mem['private'] / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Parse once versus parse per stage: the numeric ML features and the URL rules
+run over the same batch, either on plain strings (each stage splits and
+lowercases every URL itself, as before ParsedURL) or on parse_urls() output
+(one ParsedURL per distinct URL, shared by both stages). Reports urlparse
+calls per URL, throughput and tracemalloc peak per URL, on a corpus where
+URLs repeat and on one where they do not.
+"""
+from __future__ import annotations
+
+import random
+import time
+import tracemalloc
+from typing import Callable, List
+
+import core.url as url_module
+from benchmarks.corpus import synthetic_urls
+from core.rules import apply_rules_url
+from core.url import parse_urls
+from core.numeric_features import extract_numeric_matrix
+
+N_URLS = 20_000
+N_DISTINCT = 4_000
+REPEATS = 3
+
+
+def _per_stage(urls: List[str]) -> None:
+    extract_numeric_matrix(urls)
+    for url in urls:
+        apply_rules_url(url)
+
+
+def _parse_once(urls: List[str]) -> None:
+    parsed = parse_urls(urls)
+    extract_numeric_matrix(parsed)
+    for url in parsed:
+        apply_rules_url(url)
+
+
+def _count_parses(run: Callable[[List[str]], None], urls: List[str]) -> int:
+    calls = 0
+    original = url_module.urlparse
+
+    def counting(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return original(*args, **kwargs)
+
+    url_module.urlparse = counting
+    try:
+        run(urls)
+    finally:
+        url_module.urlparse = original
+    return calls
+
+
+def _best_seconds(run: Callable[[List[str]], None], urls: List[str]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        run(urls)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_kb(run: Callable[[List[str]], None], urls: List[str]) -> float:
+    tracemalloc.start()
+    try:
+        run(urls)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> None:
+    distinct = synthetic_urls(N_DISTINCT)
+    rng = random.Random(5)
+    corpora = {
+        f"{N_URLS:,} URLs, {N_DISTINCT:,} distinct": rng.choices(distinct, k=N_URLS),
+        f"{N_URLS:,} URLs, all distinct": synthetic_urls(N_URLS, seed=9),
+    }
+    _per_stage(distinct[:200])  # warm-up: rule pack load, regex caches
+
+    header = f"{'Mode':<15} {'urlparse/URL':>13} {'URLs/s':>9} {'peak B/URL':>11}"
+    for name, urls in corpora.items():
+        print(f"[info] {name}")
+        print(header)
+        print("-" * len(header))
+        for mode, run in (("per stage", _per_stage), ("parse once", _parse_once)):
+            parses = _count_parses(run, urls) / len(urls)
+            rate = len(urls) / _best_seconds(run, urls)
+            peak = _peak_kb(run, urls) * 1024 / len(urls)
+            print(f"{mode:<15} {parses:>13.2f} {rate:>9,.0f} {peak:>11,.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Memory of analyze_urls results held as a list of dicts versus one
+analyze_urls_frame DataFrame, and the dashboard's per-rerun preparation
+(DataFrame(rows) + rename + sort before, a sort of the frame now).
+
+Analyzing a million URLs takes minutes, so a sample of real results is
+analyzed once and replicated to --rows rows with fresh URL and summary
+strings per row, as analyze_urls would produce them. The frame has no
+why_summary column (the dashboard builds summaries for the rows it shows),
+so the dicts carry text the frame does not. The dict-list size is the
+tracemalloc growth while building it; the frame size is
+memory_usage(deep=True).
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.corpus import synthetic_urls
+from core.frames import results_frame
+from core.pipeline import _COLUMN_KEYS, RESULT_KEYS, analyze_urls
+
+DASHBOARD_RENAME = {
+    "url": "URL",
+    "ml_label": "ML Label",
+    "ml_probability": "ML Probability",
+    "rules_triggered": "Rules Triggered",
+    "risk_score": "Risk Score",
+    "risk_level": "Risk Level",
+    "why_summary": "Why Summary",
+    "model_version": "Model Version",
+}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    sample = analyze_urls(synthetic_urls(args.sample))
+    n = len(sample)
+
+    def column(key, i):
+        value = sample[i % n][key]
+        if key in ("url", "why_summary"):
+            return f"{value}#{i}" if key == "url" else value + " "  # a new string per row
+        if key == "rules_triggered":
+            return list(value)
+        return value
+
+    tracemalloc.start()
+    rows = [{key: column(key, i) for key in RESULT_KEYS} for i in range(args.rows)]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    columns = {key: [row[key] for row in rows] for key in _COLUMN_KEYS}
+    start = time.perf_counter()
+    frame = results_frame(columns)
+    build_s = time.perf_counter() - start
+    del columns
+    frame_bytes = int(frame.memory_usage(deep=True).sum())
+
+    start = time.perf_counter()
+    display_df = pd.DataFrame(rows).rename(columns=DASHBOARD_RENAME).sort_values("Risk Score", ascending=False)
+    dicts_prep_s = time.perf_counter() - start
+    del display_df
+    start = time.perf_counter()
+    frame.sort_values("risk_score", ascending=False, kind="stable")
+    frame_prep_s = time.perf_counter() - start
+
+    print(f"[info] {args.rows:,} results ({args.sample:,} analyzed URLs replicated)")
+    header = f"{'Representation':<16} {'MB':>9} {'B/row':>7} {'dashboard prep s':>17}"
+    print(header)
+    print("-" * len(header))
+    print(f"{'list of dicts':<16} {dict_bytes / 2**20:>9,.1f} {dict_bytes / args.rows:>7,.0f} {dicts_prep_s:>17.2f}")
+    print(f"{'frame':<16} {frame_bytes / 2**20:>9,.1f} {frame_bytes / args.rows:>7,.0f} {frame_prep_s:>17.2f}")
+    print(f"[info] Frame build from columns: {build_s:.2f}s; per-column bytes/row:")
+    for name, nbytes in frame.memory_usage(deep=True, index=False).items():
+        print(f"    {name:<15} {nbytes / args.rows:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Rule evaluation: one search per rule (how core.rules worked before) versus
+the single-pass MultiPatternMatcher, on the real rule set and on synthetic
+rule sets of growing size (half literal sets, half regexes); then
+apply_rules_url per URL versus apply_rules_batch at several batch sizes.
+"""
+from __future__ import annotations
+
+import random
+import re
+import string
+import time
+from typing import Callable, List
+from urllib.parse import urlparse
+
+from benchmarks.corpus import synthetic_urls
+from core import rules
+from core.matcher import MultiPatternMatcher, Rule
+
+# The rule set as it was hard-coded before rule packs; the reference must not follow the pack
+SQL_PATTERN = re.compile(r"('|\%27)\s*or\s*1=1|--|union\s+select|\%3d|\%27", re.IGNORECASE)
+XSS_PATTERN = re.compile(r"<script|javascript:|onerror=|onload=|\%3cscript\%3e", re.IGNORECASE)
+SUSPICIOUS_KEYWORDS = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
+ABUSED_TLDS = {"tk", "ml", "ga", "cf", "ru", "cn", "xyz"}
+
+N_URLS = 20_000
+RULE_COUNTS = [3, 10, 50, 200, 500]
+BATCH_SIZES = [64, 256, 1_024, 4_096, 20_000]
+
+
+def _multipass_apply_rules(url: str) -> List[str]:
+    target = url or ""
+    host = urlparse(target if "://" in target else f"http://example.local{target}").netloc
+    lower_url = target.lower()
+    hits = []
+    if SQL_PATTERN.search(lower_url):
+        hits.append("SQL_INJECTION_PATTERN")
+    if XSS_PATTERN.search(lower_url):
+        hits.append("XSS_PATTERN")
+    if any(kw in lower_url for kw in SUSPICIOUS_KEYWORDS):
+        hits.append("SUSPICIOUS_KEYWORD")
+    if rules._is_ipv4(host):
+        hits.append("IP_BASED_URL")
+    tld = rules._tld(host)
+    if tld in ABUSED_TLDS:
+        hits.append("ABUSED_TLD")
+    return hits
+
+
+def _synthetic_rules(n: int, seed: int = 11) -> List[Rule]:
+    rng = random.Random(seed)
+
+    def word() -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 7)))
+
+    out = [
+        Rule("SQL_INJECTION_PATTERN", "", regex=SQL_PATTERN.pattern),
+        Rule("XSS_PATTERN", "", regex=XSS_PATTERN.pattern),
+        Rule("SUSPICIOUS_KEYWORD", "", literals=tuple(SUSPICIOUS_KEYWORDS)),
+    ]
+    while len(out) < n:
+        if len(out) % 2:
+            out.append(Rule(f"LIT_{len(out)}", "", literals=tuple(word() for _ in range(5))))
+        else:
+            out.append(Rule(f"RE_{len(out)}", "", regex=rf"{word()}\d{{2,}}=|/{word()}/\w+\.php"))
+    return out[:n]
+
+
+def _urls_per_sec(fn: Callable[[str], object], urls: List[str]) -> float:
+    start = time.perf_counter()
+    for url in urls:
+        fn(url)
+    return len(urls) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    urls = synthetic_urls(N_URLS)
+
+    old = _urls_per_sec(_multipass_apply_rules, urls)
+    new = _urls_per_sec(rules.apply_rules_url, urls)
+    print(
+        f"[info] apply_rules_url on {N_URLS:,} URLs: multi-pass {old:,.0f}/s, "
+        f"single-pass {new:,.0f}/s ({new / old:.2f}x)"
+    )
+
+    header = f"{'Rules':>6} {'per-rule URLs/s':>16} {'single-pass URLs/s':>19} {'Speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for n in RULE_COUNTS:
+        rule_set = _synthetic_rules(n)
+        compiled = [re.compile(r.regex or "|".join(map(re.escape, r.literals)), re.IGNORECASE) for r in rule_set]
+        matcher = MultiPatternMatcher(rule_set)
+
+        def per_rule(text: str) -> List[int]:
+            lowered = text.lower()
+            return [i for i, p in enumerate(compiled) if p.search(lowered)]
+
+        assert all(per_rule(u) == matcher.scan(u) for u in urls[:2000])
+        naive = _urls_per_sec(per_rule, urls)
+        single = _urls_per_sec(matcher.scan, urls)
+        print(f"{n:>6} {naive:>16,.0f} {single:>19,.0f} {single / naive:>7.1f}x")
+
+    print()
+    header = f"{'Batch':>7} {'per-URL URLs/s':>15} {'batch URLs/s':>13} {'Speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    for size in BATCH_SIZES:
+        batches = [urls[i : i + size] for i in range(0, len(urls), size)]
+        start = time.perf_counter()
+        for batch in batches:
+            rules.apply_rules_batch(batch)
+        batched = len(urls) / (time.perf_counter() - start)
+        print(f"{size:>7,} {new:>15,.0f} {batched:>13,.0f} {batched / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
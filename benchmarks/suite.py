@@ -0,0 +1,236 @@
+"""
+Benchmark suite for the detection hot paths.
+
+    python -m benchmarks.suite --scale 1k                    # run, write JSON, compare to baseline
+    python -m benchmarks.suite --scale 100k --threshold 0.1  # stricter regression check
+    python -m benchmarks.suite --scale 1k --save-baseline    # refresh benchmarks/baseline.json
+
+Every stage runs over the same deterministic synthetic corpus (see
+benchmarks.corpus.SCALES). Per-URL stages are timed per call; batch stages
+are timed per BATCH_SIZE-URL call, after one untimed warm-up call on other
+URLs so one-time loads are not counted. Peak memory is measured in a second,
+tracemalloc-instrumented pass so it does not distort the timings.
+
+Each run is written to benchmarks/results/<scale>-<timestamp>.json. With a
+baseline for the same scale, a stage regresses when URLs/s drops, or p99
+latency or peak memory grows, by more than --threshold (a fraction); the
+exit status is then 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import core.ml as ml
+from benchmarks.corpus import SCALES, synthetic_urls
+from core.pipeline import analyze_urls
+from core.rules import apply_rules_batch, apply_rules_url
+from detector import detect_attack
+from feature_extractor import extract_features
+
+BATCH_SIZE = 100
+# Warm-up URLs come from another seed so the timed corpus still starts cold in caches
+WARMUP_SEED = 1009
+DEFAULT_THRESHOLD = 0.25
+# Memory growth below this many MB is never reported (allocator noise on small corpora)
+MEMORY_FLOOR_MB = 1.0
+BASELINE_PATH = Path("benchmarks/baseline.json")
+RESULTS_DIR = Path("benchmarks/results")
+
+
+class Stage(NamedTuple):
+    batched: bool
+    prepare: Callable[[List[str]], Any]  # builds the call argument, not timed
+    run: Callable[[Any], Any]
+
+
+def _labelled_frame(urls: List[str]) -> pd.DataFrame:
+    return pd.DataFrame({"url": urls, "label": "benign"})
+
+
+STAGES: Dict[str, Stage] = {
+    "pipeline.analyze_urls": Stage(True, list, analyze_urls),
+    "ml.predict_urls": Stage(True, list, lambda urls: ml.predict_urls(urls, use_cache=False)),
+    "rules.apply_rules_url": Stage(False, str, apply_rules_url),
+    "rules.apply_rules_batch": Stage(True, list, apply_rules_batch),
+    "detector.detect_attack": Stage(False, str, detect_attack),
+    "feature_extractor.extract_features": Stage(True, _labelled_frame, extract_features),
+}
+
+
+def _calls(stage: Stage, urls: List[str]) -> List[Any]:
+    if stage.batched:
+        return [stage.prepare(urls[i : i + BATCH_SIZE]) for i in range(0, len(urls), BATCH_SIZE)]
+    return [stage.prepare(url) for url in urls]
+
+
+def _warm_up(stage: Stage) -> None:
+    """One untimed call, so lazy one-time loads (rule pack, domain index, known-URL lists) are not in p99."""
+    warmup_urls = synthetic_urls(BATCH_SIZE, seed=WARMUP_SEED)
+    stage.run(_calls(stage, warmup_urls)[0])
+
+
+def _time_stage(stage: Stage, urls: List[str]) -> Dict[str, float]:
+    calls = _calls(stage, urls)
+    latencies = np.empty(len(calls), dtype=np.float64)
+    clock = time.perf_counter
+    start = clock()
+    for i, arg in enumerate(calls):
+        t0 = clock()
+        stage.run(arg)
+        latencies[i] = clock() - t0
+    elapsed = clock() - start
+    lat_ms = latencies * 1000
+    return {
+        "calls": len(calls),
+        "urls_per_call": BATCH_SIZE if stage.batched else 1,
+        "seconds": round(elapsed, 4),
+        "urls_per_sec": round(len(urls) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(lat_ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 4),
+    }
+
+
+def _peak_mb(stage: Stage, urls: List[str]) -> float:
+    # Arguments are built before tracing starts, like in the timed pass
+    calls = _calls(stage, urls)
+    tracemalloc.start()
+    try:
+        for arg in calls:
+            stage.run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 2)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment() -> Dict[str, Any]:
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": _git_commit(),
+    }
+
+
+def run_suite(scale: str, stages: List[str], memory: bool = True) -> Dict[str, Any]:
+    urls = synthetic_urls(SCALES[scale])
+    ml.predict_urls(urls[:10], use_cache=False)  # load the model outside the measurements
+
+    results: Dict[str, Any] = {}
+    for name in stages:
+        _warm_up(STAGES[name])
+        ml.VERDICT_CACHE.clear()  # analyze_urls goes through the cache; start every stage cold
+        print(f"[info] {name} over {len(urls):,} URLs ...")
+        results[name] = _time_stage(STAGES[name], urls)
+        if memory:
+            ml.VERDICT_CACHE.clear()
+            results[name]["peak_mb"] = _peak_mb(STAGES[name], urls)
+    return {
+        "scale": scale,
+        "n_urls": len(urls),
+        "batch_size": BATCH_SIZE,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "stages": results,
+    }
+
+
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Human-readable regressions of run against a baseline of the same scale."""
+    regressions = []
+    for name, cur in run["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        if cur["urls_per_sec"] < base["urls_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: {cur['urls_per_sec']:,.0f} URLs/s vs baseline {base['urls_per_sec']:,.0f}")
+        if cur["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {cur['p99_ms']:.3f} ms vs baseline {base['p99_ms']:.3f} ms")
+        if "peak_mb" in cur and "peak_mb" in base:
+            limit = max(base["peak_mb"] * (1 + threshold), base["peak_mb"] + MEMORY_FLOOR_MB)
+            if cur["peak_mb"] > limit:
+                regressions.append(f"{name}: peak {cur['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+    return regressions
+
+
+def _print_table(run: Dict[str, Any], baseline: Dict[str, Any] | None) -> None:
+    header = f"{'Stage':<36} {'URLs/s':>10} {'vs base':>8} {'p50 ms':>9} {'p99 ms':>9} {'Peak MB':>8}"
+    print(f"\n=== {run['scale']} ({run['n_urls']:,} URLs, batch stages per {run['batch_size']:,} URLs) ===")
+    print(header)
+    print("-" * len(header))
+    for name, r in run["stages"].items():
+        base = (baseline or {}).get("stages", {}).get(name)
+        delta = f"{r['urls_per_sec'] / base['urls_per_sec'] - 1:+.0%}" if base else "-"
+        peak = f"{r['peak_mb']:.1f}" if "peak_mb" in r else "-"
+        print(f"{name:<36} {r['urls_per_sec']:>10,.0f} {delta:>8} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {peak:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the detection hot paths.")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed regression fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its scale")
+    parser.add_argument("--output", type=Path, help="Result JSON path (default benchmarks/results/...)")
+    args = parser.parse_args()
+
+    run = run_suite(args.scale, args.stages, memory=not args.no_memory)
+
+    output = args.output or RESULTS_DIR / f"{args.scale}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2))
+    print(f"[info] Wrote {output}")
+
+    baselines: Dict[str, Any] = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = baselines.get(args.scale)
+    _print_table(run, baseline)
+
+    if args.save_baseline:
+        baselines[args.scale] = run
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"[info] Saved {args.scale} baseline to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"[info] No {args.scale} baseline in {args.baseline}; nothing to compare")
+        return 0
+    regressions = compare(run, baseline, args.threshold)
+    if regressions:
+        print(f"\n[warn] {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"\n[info] No regressions beyond {args.threshold:.0%} against the {args.scale} baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class VerdictCache:
+    """
+    Size-bounded LRU of ML malicious probabilities.
+
+    Entries are keyed by (model identity, URL) so that loading a different model
+    never serves verdicts computed by the previous one. Safe to share between
+    Streamlit session threads.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Tuple[Hashable, Any], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, model_id: Hashable, urls: Iterable[Any]) -> Tuple[Dict[Any, float], List[Any]]:
+        """
+        Look up the distinct URLs of a batch.
+        Returns (cached probabilities by URL, URLs that still need scoring).
+        Counters are per position: repeats of a URL within the batch count as hits,
+        only the first occurrence of an uncached URL counts as a miss.
+        """
+        found: Dict[Any, float] = {}
+        missing: List[Any] = []
+        seen = set()
+        with self._lock:
+            for url in urls:
+                if url in seen:
+                    self.hits += 1
+                    continue
+                seen.add(url)
+                key = (model_id, url)
+                prob = self._entries.get(key)
+                if prob is None:
+                    self.misses += 1
+                    missing.append(url)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    found[url] = prob
+        return found, missing
+
+    def store(self, model_id: Hashable, urls: Iterable[Any], probs: Iterable[float]) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            for url, prob in zip(urls, probs):
+                key = (model_id, url)
+                self._entries[key] = float(prob)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, model_id: Hashable, url: Any) -> Optional[float]:
+        found, _ = self.lookup(model_id, [url])
+        return found.get(url)
+
+    def resize(self, maxsize: int) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, reset_stats: bool = False) -> None:
+        with self._lock:
+            self._entries.clear()
+            if reset_stats:
+                self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,300 @@
+"""
+Domain reputation index.
+
+Blocklists of domains (and TLDs) are compiled into one binary file that is
+memory-mapped at load, so millions of entries cost no parse time and are
+shared between processes through the page cache. An entry covers itself and
+every subdomain: "evil.com" matches evil.com and a.b.evil.com, "tk" matches
+every .tk host. When entries overlap, the longest one wins.
+
+Every key (listed domain or public suffix) is stored as a 64-bit hash in one
+sorted array, with a flags byte (risk level, public-suffix bit) and the key
+bytes for exact confirmation. A lookup hashes each suffix of the host at a
+label boundary and binary-searches for it: one probe per label.
+
+Public suffixes (co.uk, github.io, ...; every single label counts as one)
+give registrable-domain (eTLD+1) semantics: registrable_domain() returns the
+part of a host its owner registered. The builder can reduce listed hosts to
+it (--registrable), so www.evil.co.uk blocks evil.co.uk and its subdomains,
+while a listed page host on a shared suffix (evil.github.io) never blocks
+the whole suffix.
+
+    python -m core.domains -o models/domain_index.bin \\
+        --list high=rules/domains/high.txt --list medium=rules/domains/medium.txt
+
+Lists are plain text: one domain per line, "#" comments; hosts-file lines
+("0.0.0.0 evil.com") use their last field. Without a built index file,
+get_domain_index() compiles DOMAIN_LISTS in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import os
+import threading
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DOMAIN_INDEX_PATH = Path(os.environ.get("DOMAIN_INDEX", "models/domain_index.bin"))
+DOMAIN_LISTS: Dict[str, List[Path]] = {
+    "high": [Path("rules/domains/high.txt")],
+    "medium": [Path("rules/domains/medium.txt")],
+}
+PUBLIC_SUFFIXES_PATH = Path("rules/domains/public_suffixes.txt")
+# Risk levels, lowest first; stored as 1..3 (0: not listed)
+LEVELS = ("low", "medium", "high")
+
+_INDEX_MAGIC = b"URLDOM01"
+_INDEX_ALIGN = 64
+_LEVEL_MASK = 0x03
+_PUBLIC_SUFFIX = 0x80
+_LOOKUP_CACHE_SIZE = 65_536
+
+
+class DomainMatch(NamedTuple):
+    entry: str  # the listed domain or TLD that matched
+    level: str
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogatepass")
+
+
+def normalize_domain(text: str) -> str:
+    """Lowercase, without wildcard/leading and trailing dots."""
+    text = text.strip().lower()
+    if text.startswith("*."):
+        text = text[2:]
+    return text.strip(".")
+
+
+def read_domain_list(path: Path) -> List[str]:
+    domains = []
+    with Path(path).open("r", encoding="utf-8") as fh:
+        for line in fh:
+            fields = line.split("#", 1)[0].split()
+            if fields:
+                domain = normalize_domain(fields[-1])
+                if domain:
+                    domains.append(domain)
+    return domains
+
+
+def _registrable(labels: Sequence[str], is_public_suffix) -> Optional[str]:
+    """eTLD+1 of a host split into labels, or None when the host is itself a public suffix."""
+    longest = 1  # every single label is a public suffix
+    for k in range(2, len(labels) + 1):
+        if is_public_suffix(".".join(labels[-k:])):
+            longest = k
+    if len(labels) <= longest:
+        return None
+    return ".".join(labels[-longest - 1 :])
+
+
+class DomainIndex:
+    """Read-only view of an index file (or of in-memory arrays, see from_lists)."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, object], path: Optional[Path] = None) -> None:
+        self.path = path
+        self.meta = meta
+        self.size = len(arrays["hashes"])
+        self._arrays = arrays  # keeps the mmap alive
+        self._hashes = memoryview(np.ascontiguousarray(arrays["hashes"]))
+        # memoryviews: per-probe indexing without numpy scalar overhead
+        self._flags = memoryview(np.ascontiguousarray(arrays["flags"]))
+        self._offsets = memoryview(np.ascontiguousarray(arrays["key_offsets"]))
+        self._blob = memoryview(np.ascontiguousarray(arrays["key_blob"]))
+        self.lookup = lru_cache(maxsize=_LOOKUP_CACHE_SIZE)(self._lookup)
+
+    @classmethod
+    def load(cls, path: Path = DOMAIN_INDEX_PATH, mmap: bool = True) -> "DomainIndex":
+        path = Path(path)
+        buf = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+        if bytes(buf[: len(_INDEX_MAGIC)]) != _INDEX_MAGIC:
+            raise ValueError(f"{path} is not a domain index")
+        header_len = int.from_bytes(bytes(buf[len(_INDEX_MAGIC) : len(_INDEX_MAGIC) + 4]), "little")
+        header_end = len(_INDEX_MAGIC) + 4 + header_len
+        header = json.loads(bytes(buf[len(_INDEX_MAGIC) + 4 : header_end]).decode("utf-8"))
+        data_start = -(-header_end // _INDEX_ALIGN) * _INDEX_ALIGN
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            arrays[name] = buf[start : start + spec["length"] * dtype.itemsize].view(dtype)
+        return cls(arrays, header["meta"], path)
+
+    @classmethod
+    def from_lists(
+        cls,
+        lists: Dict[str, Iterable[str]],
+        public_suffixes: Iterable[str] = (),
+        registrable: bool = False,
+    ) -> "DomainIndex":
+        return cls(*_compile(lists, public_suffixes, registrable))
+
+    def _flags_of(self, key: str) -> int:
+        raw = _encode(key)
+        h = _key_hash(raw)
+        hashes = self._hashes
+        i = bisect.bisect_left(hashes, h)
+        while i < self.size and hashes[i] == h:
+            if self._blob[self._offsets[i] : self._offsets[i + 1]] == raw:
+                return self._flags[i]
+            i += 1
+        return 0
+
+    def _lookup(self, host: str) -> Optional[DomainMatch]:
+        labels = host.lower().split(".")
+        best: Optional[DomainMatch] = None
+        for k in range(1, len(labels) + 1):
+            key = ".".join(labels[-k:])
+            level = self._flags_of(key) & _LEVEL_MASK
+            if level:
+                best = DomainMatch(key, LEVELS[level - 1])
+        return best
+
+    def level(self, host: str) -> int:
+        """Risk level of host as 0 (not listed) to len(LEVELS)."""
+        match = self.lookup(host)
+        return LEVELS.index(match.level) + 1 if match else 0
+
+    def is_public_suffix(self, domain: str) -> bool:
+        return "." not in domain or bool(self._flags_of(domain.lower()) & _PUBLIC_SUFFIX)
+
+    def registrable_domain(self, host: str) -> Optional[str]:
+        return _registrable(host.lower().split("."), self.is_public_suffix)
+
+
+def _compile(
+    lists: Dict[str, Iterable[str]], public_suffixes: Iterable[str], registrable: bool
+) -> Tuple[Dict[str, np.ndarray], Dict[str, object]]:
+    suffixes = {normalize_domain(s) for s in public_suffixes} - {""}
+    flags: Dict[str, int] = {suffix: _PUBLIC_SUFFIX for suffix in suffixes}
+    counts = {}
+    for level, domains in lists.items():
+        if level not in LEVELS:
+            raise ValueError(f"Unknown level {level!r}; expected one of {LEVELS}")
+        code = LEVELS.index(level) + 1
+        n = 0
+        for domain in domains:
+            domain = normalize_domain(domain)
+            if registrable and domain:
+                domain = _registrable(domain.split("."), lambda d: "." not in d or d in suffixes) or domain
+            if not domain:
+                continue
+            # The same domain on several lists keeps its highest level
+            flags[domain] = (flags.get(domain, 0) & ~_LEVEL_MASK) | max(code, flags.get(domain, 0) & _LEVEL_MASK)
+            n += 1
+        counts[level] = n
+
+    keys = [_encode(key) for key in flags]
+    hashes = np.fromiter((_key_hash(key) for key in keys), dtype=np.uint64, count=len(keys))
+    order = np.argsort(hashes, kind="stable")
+    keys = [keys[i] for i in order.tolist()]
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(key) for key in keys], out=offsets[1:])
+    arrays = {
+        "hashes": hashes[order],
+        "flags": np.fromiter(flags.values(), dtype=np.uint8, count=len(flags))[order],
+        "key_offsets": offsets,
+        "key_blob": np.frombuffer(b"".join(keys), dtype=np.uint8),
+    }
+    meta = {"entries": counts, "public_suffixes": len(suffixes), "registrable": registrable}
+    return arrays, meta
+
+
+def build_domain_index(
+    lists: Dict[str, Sequence[Path]],
+    out: Path = DOMAIN_INDEX_PATH,
+    public_suffixes: Optional[Path] = PUBLIC_SUFFIXES_PATH,
+    registrable: bool = False,
+) -> Path:
+    """Compile plain-text lists ({level: [paths]}) into an index file at out."""
+    domains = {level: [d for path in paths for d in read_domain_list(path)] for level, paths in lists.items()}
+    suffixes = read_domain_list(public_suffixes) if public_suffixes else []
+    arrays, meta = _compile(domains, suffixes, registrable)
+
+    header: Dict[str, object] = {"meta": meta, "arrays": {}}
+    offset = 0
+    for name, arr in arrays.items():
+        header["arrays"][name] = {"dtype": arr.dtype.str, "length": len(arr), "offset": offset}
+        offset += -(-arr.nbytes // _INDEX_ALIGN) * _INDEX_ALIGN
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = len(_INDEX_MAGIC) + 4 + len(header_bytes)
+    data_start = -(-prefix // _INDEX_ALIGN) * _INDEX_ALIGN
+
+    # New file renamed into place: running processes keep their mmap of the old one
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    with tmp.open("wb") as fh:
+        fh.write(_INDEX_MAGIC)
+        fh.write(len(header_bytes).to_bytes(4, "little"))
+        fh.write(header_bytes)
+        fh.write(b"\0" * (data_start - prefix))
+        for name, arr in arrays.items():
+            fh.seek(data_start + header["arrays"][name]["offset"])
+            fh.write(arr.tobytes())
+    os.replace(tmp, out)
+    return out
+
+
+_INDEX: Optional[DomainIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def _default_index() -> DomainIndex:
+    if DOMAIN_INDEX_PATH.exists():
+        return DomainIndex.load(DOMAIN_INDEX_PATH)
+    lists = {level: [d for path in paths for d in read_domain_list(path)] for level, paths in DOMAIN_LISTS.items()}
+    suffixes = read_domain_list(PUBLIC_SUFFIXES_PATH) if PUBLIC_SUFFIXES_PATH.exists() else []
+    return DomainIndex.from_lists(lists, suffixes)
+
+
+def get_domain_index() -> DomainIndex:
+    """The active index: DOMAIN_INDEX_PATH if it exists, else DOMAIN_LISTS compiled in memory."""
+    index = _INDEX
+    if index is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                set_domain_index(_default_index())
+            index = _INDEX
+    return index  # type: ignore[return-value]
+
+
+def set_domain_index(index: DomainIndex) -> None:
+    global _INDEX
+    _INDEX = index
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile domain lists into a domain reputation index.")
+    parser.add_argument("--list", action="append", required=True, metavar="LEVEL=PATH", help=f"LEVEL in {LEVELS}")
+    parser.add_argument("--public-suffixes", type=Path, default=PUBLIC_SUFFIXES_PATH)
+    parser.add_argument("--registrable", action="store_true", help="reduce listed hosts to their registrable domain")
+    parser.add_argument("-o", "--out", type=Path, default=DOMAIN_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    lists: Dict[str, List[Path]] = {}
+    for spec in args.list:
+        level, sep, path = spec.partition("=")
+        if not sep or level not in LEVELS:
+            parser.error(f"--list expects LEVEL=PATH with LEVEL in {LEVELS}, got {spec!r}")
+        lists.setdefault(level, []).append(Path(path))
+    out = build_domain_index(lists, args.out, args.public_suffixes, args.registrable)
+    index = DomainIndex.load(out)
+    print(f"[info] Wrote {out} ({index.size:,} keys, {out.stat().st_size / 2**20:.1f} MB): {index.meta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from .schema import Finding
+from .url import ParsedURL
 
 
 def summarize(findings: List[Finding], correlations: Dict[str, Any]) -> Dict[str, str]:
@@ -67,26 +69,56 @@ _RULE_MAP = {
     "SUSPICIOUS_KEYWORD": "suspicious keywords",
     "IP_BASED_URL": "direct IP-based access",
     "ABUSED_TLD": "use of a high-risk top-level domain",
+    "RULE_TIMEOUT": "input crafted to slow down rule matching",
 }
 
+_KNOWN_LIST_TEXT = {
+    "allow": "This URL is on the known-good list, so the ML model was not run.",
+    "deny": "This URL is on the known-bad list from past incidents, so the ML model was not run.",
+}
+
+
+# Distinct (label, confidence %, first rules, score, level, list) combinations are few;
+# each summary text is built once
+_WHY_CACHE_SIZE = 8_192
+
 
 def generate_why_summary(
-    url: str,
+    url: Union[str, ParsedURL],
     ml_label: str,
     ml_probability: float,
     rules_triggered: List[str],
     risk_score: int,
     risk_level: str,
+    known_list: Optional[str] = None,
 ) -> str:
     """
     Produce a concise, human-readable explanation for why a URL was flagged.
+    known_list is "allow" or "deny" when a core.known_urls list settled the URL instead of the model.
+    The text does not depend on url; it is built once per distinct combination of the other inputs.
     """
-    ml_conf_pct = int(round(ml_probability * 100))
+    return _why_summary(
+        ml_label, int(round(ml_probability * 100)), tuple(rules_triggered[:3]), int(risk_score), risk_level, known_list
+    )
+
+
+@lru_cache(maxsize=_WHY_CACHE_SIZE)
+def _why_summary(
+    ml_label: str,
+    ml_conf_pct: int,
+    top_rules: Tuple[str, ...],
+    risk_score: int,
+    risk_level: str,
+    known_list: Optional[str],
+) -> str:
     sentences = []
-    sentences.append(f"The ML model predicts this URL as {ml_label} with {ml_conf_pct}% confidence.")
+    if known_list in _KNOWN_LIST_TEXT:
+        sentences.append(_KNOWN_LIST_TEXT[known_list])
+    else:
+        sentences.append(f"The ML model predicts this URL as {ml_label} with {ml_conf_pct}% confidence.")
 
-    if rules_triggered:
-        readable = [_RULE_MAP.get(r, r.replace('_', ' ').title()) for r in rules_triggered[:3]]
+    if top_rules:
+        readable = [_RULE_MAP.get(r, r.replace('_', ' ').title()) for r in top_rules]
         if len(readable) > 1:
             sentences.append(f"It also matches known {', '.join(readable[:-1])} and {readable[-1]}.")
         else:
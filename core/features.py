@@ -1,18 +1,17 @@
 from __future__ import annotations
 
 from typing import Any, Dict, List
-from urllib.parse import urlparse
 
-from .types import Event
+from .schema import Event
+from .url import parse_urls
 
 
 def extract_features(events: List[Event]) -> List[Dict[str, Any]]:
     feature_rows: List[Dict[str, Any]] = []
-    for event in events:
-        parsed = urlparse(event.url or "")
-        path = parsed.path or ""
-        query = parsed.query or ""
-        url_lower = (event.url or "").lower()
+    for event, parsed in zip(events, parse_urls([event.url or "" for event in events])):
+        path = parsed.path
+        query = parsed.query
+        url_lower = parsed.lower
 
         feature_rows.append(
             {
@@ -0,0 +1,277 @@
+"""
+Flat, memory-mappable layout for tree-ensemble classifiers.
+
+sklearn copies every tree's nodes into private memory when a forest is
+unpickled, so each Streamlit/worker process pays for its own copy. Here the
+nodes of all trees are concatenated into a handful of .npy files that are
+opened with np.load(mmap_mode="r"); every process on the host then maps the
+same page-cache pages.
+
+Directory layout:
+    meta.json           classes, tree count, feature count
+    used_features.npy   int64   sorted input columns referenced by any split
+    feature.npy         int32   split column per node, as an index into used_features (-2 for leaves)
+    threshold.npy       float64 split threshold per node (go left if x <= threshold)
+    left.npy            int32   global index of the left child (-1 for leaves)
+    right.npy           int32   global index of the right child (-1 for leaves)
+    value.npy           float64 (n_nodes, n_classes) class fractions per node
+    roots.npy           int64   global index of each tree's root node
+
+Registry versions keep this directory next to their pickle. The fixed
+models/*.pkl files get a sidecar directory (flat_forest_dir) written by
+train_models; without it a forest pickle is flattened in private memory.
+Serving never scores with the sklearn pickle itself, so with an export the
+forest is not unpickled at all.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+FOREST_FORMAT = "flat-forest-v1"
+# Rows scored per traversal pass; bounds the dense (rows x used columns) input block
+SCORE_BLOCK_ROWS = 8192
+# Blocks of at least this many rows are walked one tree at a time; smaller ones
+# walk all (tree, row) pairs together (python -m benchmarks.forest_engine)
+PER_TREE_MIN_ROWS = 4096
+# Tree levels stepped between compactions of the still-active pairs (leaves
+# point at themselves, so extra steps are harmless)
+_LEVELS_PER_COMPACTION = 4
+# A tree walked on its own hands its rows to the shared pass once fewer than
+# 1/_STRAGGLER_DIVISOR of them are still active
+_STRAGGLER_DIVISOR = 8
+_ARRAYS = ("used_features", "feature", "threshold", "left", "right", "value", "roots")
+
+
+def is_forest(model: Any) -> bool:
+    estimators = getattr(model, "estimators_", None)
+    return bool(estimators) and all(hasattr(est, "tree_") for est in estimators)
+
+
+def flatten_forest(model: Any) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Flatten a fitted single-output forest classifier into (arrays, meta) as laid out above."""
+    if not is_forest(model):
+        raise ValueError(f"Expected a fitted tree ensemble, got {type(model).__name__}")
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported")
+
+    features: List[np.ndarray] = []
+    thresholds: List[np.ndarray] = []
+    lefts: List[np.ndarray] = []
+    rights: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    roots: List[int] = []
+    offset = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        is_leaf = tree.children_left < 0
+        roots.append(offset)
+        features.append(np.where(is_leaf, -2, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, -1, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, tree.children_right + offset).astype(np.int32))
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        values.append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+        offset += tree.node_count
+    if offset >= np.iinfo(np.int32).max:
+        raise ValueError("Forest too large for int32 node indices")
+
+    # Only columns that some split uses are ever read; store splits against that
+    # compact column set so scoring never densifies the full TF-IDF width.
+    feature = np.concatenate(features)
+    used_features = np.unique(feature[feature >= 0]).astype(np.int64)
+    compact = np.where(feature >= 0, np.searchsorted(used_features, feature), -2).astype(np.int32)
+
+    arrays = {
+        "used_features": used_features,
+        "feature": compact,
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int64),
+    }
+    meta = {
+        "format": FOREST_FORMAT,
+        "model_type": type(model).__name__,
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "n_trees": len(roots),
+        "n_features": int(model.n_features_in_),
+        "n_nodes": int(offset),
+    }
+    return arrays, meta
+
+
+def export_forest(model: Any, path: Path) -> Path:
+    """Write flatten_forest(model) to a directory that FlatForest can mmap."""
+    arrays, meta = flatten_forest(model)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(path / f"{name}.npy", np.ascontiguousarray(arr))
+    (path / "meta.json").write_text(json.dumps(meta, indent=2))
+    return path
+
+
+def flat_forest_dir(model_path: Path) -> Path:
+    """Sidecar flat-array directory of a pickled model file, e.g. models/url_model.forest."""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".forest")
+
+
+def replace_forest_export(model: Any, path: Path) -> Path:
+    """
+    export_forest into a temp directory and swap it in for path. Processes
+    that mapped the old files keep reading them until they reload.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + f".tmp-{os.getpid()}")
+    old = path.with_name(path.name + f".old-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    export_forest(model, tmp)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def is_fresh_export(path: Path, model_path: Path) -> bool:
+    """True when path holds an export written after model_path was last replaced."""
+    meta = Path(path) / "meta.json"
+    return meta.exists() and meta.stat().st_mtime_ns >= Path(model_path).stat().st_mtime_ns
+
+
+class FlatForest:
+    """
+    Forest classifier backed by the flat node arrays (mmapped when loaded from disk).
+    Exposes classes_ and predict_proba so core.ml can score it like the sklearn model.
+
+    Small batches walk every (tree, row) pair down its tree at once, so the
+    number of NumPy calls depends on tree depth, not on the number of trees.
+    Large batches walk one tree at a time over all rows, so the working arrays
+    grow with the rows rather than rows x trees. Either way split values are
+    gathered from a column-major copy of the used columns.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], path: Path | None = None) -> None:
+        if meta.get("format") != FOREST_FORMAT:
+            raise ValueError(f"Not a {FOREST_FORMAT} forest")
+        self.path = path
+        self.model_type: str = meta["model_type"]
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_: int = meta["n_features"]
+        self.used_features = arrays["used_features"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self._traversal: Tuple[np.ndarray, ...] | None = None
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "FlatForest":
+        path = Path(path)
+        meta: Dict[str, Any] = json.loads((path / "meta.json").read_text())
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in _ARRAYS}
+        return cls(arrays, meta, path)
+
+    @classmethod
+    def from_model(cls, model: Any) -> "FlatForest":
+        """In-memory flat copy of a fitted sklearn forest (no files involved)."""
+        arrays, meta = flatten_forest(model)
+        return cls(arrays, meta)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _dense_inputs(self, X) -> np.ndarray:
+        """Dense column-major float32 copy of the used columns (sklearn also evaluates splits on float32)."""
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, forest expects {self.n_features_in_}")
+        if hasattr(X, "tocsc"):
+            return X.tocsc()[:, self.used_features].toarray(order="F").astype(np.float32, order="F")
+        return np.asarray(X)[:, self.used_features].astype(np.float32, order="F")
+
+    def _traversal_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        (children, feature, threshold, is_leaf) in the form apply() walks: children[2*i] and
+        children[2*i + 1] are node i's left/right child, and leaves point at
+        themselves with feature 0 so a step never needs a branch. Built once per
+        process; a few bytes per node.
+        """
+        if self._traversal is None:
+            is_leaf = np.asarray(self.left) < 0
+            own = np.arange(len(is_leaf), dtype=np.intp)
+            children = np.empty(2 * len(is_leaf), dtype=np.intp)
+            children[0::2] = np.where(is_leaf, own, self.left)
+            children[1::2] = np.where(is_leaf, own, self.right)
+            feature = np.where(is_leaf, 0, self.feature).astype(np.intp)
+            self._traversal = (children, feature, np.asarray(self.threshold), is_leaf)
+        return self._traversal
+
+    def apply(self, X) -> np.ndarray:
+        """Global leaf index reached by every row in every tree, shape (n_rows, n_trees)."""
+        return self._leaves(self._dense_inputs(X)).T
+
+    def _leaves(self, Xu: np.ndarray) -> np.ndarray:
+        """Leaf index per (tree, row), shape (n_trees, n_rows)."""
+        children, feature, threshold, is_leaf = self._traversal_arrays()
+        n_rows, n_trees = Xu.shape[0], self.n_trees
+        # Column-major, so x for (row, column) sits at column * n_rows + row
+        flat_x = Xu.ravel(order="F")
+        column_offset = feature * n_rows
+        all_rows = np.arange(n_rows, dtype=np.intp)
+        leaves = np.empty(n_trees * n_rows, dtype=np.intp)
+
+        def walk(node, rows, slot, min_active=0):
+            # np.take skips the generic fancy-indexing path, which dominates this loop
+            while rows.size > min_active:
+                for _ in range(_LEVELS_PER_COMPACTION):
+                    x = np.take(flat_x, np.take(column_offset, node) + rows)
+                    node = np.take(children, 2 * node + (x > np.take(threshold, node)))
+                done = np.take(is_leaf, node)
+                leaves[slot[done]] = node[done]
+                keep = ~done
+                node, rows, slot = node[keep], rows[keep], slot[keep]
+            return node, rows, slot
+
+        if n_rows < PER_TREE_MIN_ROWS:
+            roots = np.asarray(self.roots, dtype=np.intp)
+            walk(np.repeat(roots, n_rows), np.tile(all_rows, n_trees), np.arange(n_trees * n_rows, dtype=np.intp))
+        else:
+            # Each tree walks the whole block until only its deep stragglers are
+            # left; those are then finished for all trees in one shared pass
+            min_active = n_rows // _STRAGGLER_DIVISOR
+            stragglers = [
+                walk(np.full(n_rows, root, dtype=np.intp), all_rows, all_rows + tree * n_rows, min_active)
+                for tree, root in enumerate(self.roots)
+            ]
+            walk(*(np.concatenate(parts) for parts in zip(*stragglers)))
+        return leaves.reshape(n_trees, n_rows)
+
+    def predict_proba(self, X) -> np.ndarray:
+        n_rows, n_classes = X.shape[0], len(self.classes_)
+        values = np.asarray(self.value).reshape(-1)
+        proba = np.empty((n_rows, n_classes), dtype=np.float64)
+        for start in range(0, n_rows, SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, n_rows)
+            leaves = self._leaves(self._dense_inputs(X[start:stop])) * n_classes
+            for c in range(n_classes):
+                # Summed over axis 0, tree by tree: the order sklearn adds them in
+                proba[start:stop, c] = np.take(values, leaves + c).sum(axis=0) / self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
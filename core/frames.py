@@ -0,0 +1,186 @@
+"""
+Columnar analyze_urls results.
+
+analyze_urls_frame returns one pandas DataFrame per batch instead of one
+dict per URL: repeated strings (labels, levels, model versions) become
+categoricals, numbers use the narrowest dtype that holds them, and the
+rules each URL triggered are one bit-mask integer instead of a list of
+strings. Bit i of "rules_mask" stands for frame.attrs["rule_names"][i];
+rules_triggered() turns masks back into name lists.
+
+There is no why_summary column: the summary is a function of the other
+columns, so why_summaries() builds it for the rows actually shown or
+exported (memoised per distinct input combination in core.explain).
+
+Column              dtype
+url                 str
+ml_label            category (benign, malicious)
+ml_probability      float32
+rules_mask          uint8/16/32/64, narrowest for the rule names
+risk_score          int8 (0..100)
+risk_level          ordered category (Low < Medium < High)
+model_version       category
+known_list          category (allow, deny; NA when not listed)
+occurrences         int32, positions of the URL in the analyzed batch
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+import core.explain as explain
+from core.rulepack import RULE_TIMEOUT, get_rule_pack
+from core.rules import URL_RULE_SET
+from core.score import RISK_LEVELS
+
+RESULT_COLUMNS = (
+    "url",
+    "ml_label",
+    "ml_probability",
+    "rules_mask",
+    "risk_score",
+    "risk_level",
+    "model_version",
+    "known_list",
+    "occurrences",
+)
+ML_LABELS = ("benign", "malicious")
+KNOWN_LISTS = ("allow", "deny")
+_MASK_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+
+def url_rule_names() -> List[str]:
+    """Names apply_rules_url can report with the active rule pack, in pack order."""
+    rules = get_rule_pack().sets[URL_RULE_SET].rules
+    return list(dict.fromkeys([rule.name for rule in rules] + [RULE_TIMEOUT.name]))
+
+
+def _mask_dtype(n_rules: int) -> np.dtype:
+    for dtype in _MASK_DTYPES:
+        if n_rules <= np.dtype(dtype).itemsize * 8:
+            return np.dtype(dtype)
+    raise ValueError(f"{n_rules} rule names do not fit a 64-bit rules_mask")
+
+
+def encode_rules(rules_triggered: Sequence[Sequence[str]], rule_names: List[str]) -> np.ndarray:
+    """Bit masks of rule name lists; names missing from rule_names are appended to it."""
+    bits = {name: i for i, name in enumerate(rule_names)}
+    masks = [0] * len(rules_triggered)
+    for row, names in enumerate(rules_triggered):
+        mask = 0
+        for name in names:
+            bit = bits.get(name)
+            if bit is None:
+                bit = bits[name] = len(rule_names)
+                rule_names.append(name)
+            mask |= 1 << bit
+        masks[row] = mask
+    return np.array(masks, dtype=_mask_dtype(len(rule_names)))
+
+
+def results_frame(columns: Dict[str, Sequence[Any]]) -> pd.DataFrame:
+    """
+    Frame of RESULT_COLUMNS from per-column result values, "rules_triggered"
+    (lists of rule names) in place of "rules_mask".
+    """
+    rule_names = url_rule_names()
+    frame = pd.DataFrame(
+        {
+            "url": pd.array(columns["url"], dtype="str"),
+            "ml_label": pd.Categorical(columns["ml_label"], categories=ML_LABELS),
+            "ml_probability": np.asarray(columns["ml_probability"], dtype=np.float32),
+            "rules_mask": encode_rules(columns["rules_triggered"], rule_names),
+            "risk_score": np.asarray(columns["risk_score"], dtype=np.int8),
+            "risk_level": pd.Categorical(columns["risk_level"], categories=RISK_LEVELS, ordered=True),
+            "model_version": pd.Categorical(columns["model_version"]),
+            "known_list": pd.Categorical(columns["known_list"], categories=KNOWN_LISTS),
+            "occurrences": np.asarray(columns["occurrences"], dtype=np.int32),
+        }
+    )
+    frame.attrs["rule_names"] = tuple(rule_names)
+    return frame
+
+
+def rules_triggered(frame: pd.DataFrame) -> List[List[str]]:
+    """The rules_mask column decoded back to rule name lists, in bit order."""
+    names = frame.attrs.get("rule_names", ())
+    masks = frame["rules_mask"].to_numpy()
+    decoded: Dict[int, List[str]] = {}
+    out = []
+    for mask in masks.tolist():
+        names_of = decoded.get(mask)
+        if names_of is None:
+            names_of = decoded[mask] = [name for i, name in enumerate(names) if mask >> i & 1]
+        out.append(list(names_of))
+    return out
+
+
+def _remap_masks(frame: pd.DataFrame, rule_names: List[str]) -> pd.DataFrame:
+    """frame with rules_mask re-encoded against rule_names (a superset of its own names)."""
+    masks = frame["rules_mask"].to_numpy().astype(np.uint64)
+    remapped = np.zeros(len(frame), dtype=np.uint64)
+    for old_bit, name in enumerate(frame.attrs.get("rule_names", ())):
+        new_bit = np.uint64(rule_names.index(name))
+        remapped |= ((masks >> np.uint64(old_bit)) & np.uint64(1)) << new_bit
+    frame = frame.copy()
+    frame["rules_mask"] = remapped.astype(_mask_dtype(len(rule_names)))
+    return frame
+
+
+def concat_frames(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate result frames (e.g. the chunks of one upload), keeping the
+    column dtypes; frames built under different rule packs are re-encoded
+    against the union of their rule names.
+    """
+    if not frames:
+        return results_frame({name: [] for name in RESULT_COLUMNS + ("rules_triggered",)})
+    rule_names: List[str] = []
+    for frame in frames:
+        rule_names.extend(name for name in frame.attrs.get("rule_names", ()) if name not in rule_names)
+    same = all(tuple(frame.attrs.get("rule_names", ())) == tuple(rule_names) for frame in frames)
+    parts = list(frames) if same else [_remap_masks(frame, rule_names) for frame in frames]
+    combined = pd.concat(parts, ignore_index=True)
+    # Categories that differ between chunks make concat fall back to object: re-categorize
+    versions = list(dict.fromkeys(v for part in parts for v in part["model_version"].cat.categories))
+    combined["model_version"] = pd.Categorical(combined["model_version"].astype(object), categories=versions)
+    if combined["rules_mask"].dtype != _mask_dtype(len(rule_names)):
+        combined["rules_mask"] = combined["rules_mask"].astype(_mask_dtype(len(rule_names)))
+    combined.attrs["rule_names"] = tuple(rule_names)
+    return combined
+
+
+def why_summaries(frame: pd.DataFrame) -> List[str]:
+    """explain.generate_why_summary for every row of frame (pass only the rows on display)."""
+    rules = rules_triggered(frame)
+    known = frame["known_list"].astype(object).where(frame["known_list"].notna(), None)
+    return [
+        explain.generate_why_summary(
+            url=url,
+            ml_label=label,
+            ml_probability=float(prob),
+            rules_triggered=row_rules,
+            risk_score=int(score),
+            risk_level=level,
+            known_list=known_list,
+        )
+        for url, label, prob, row_rules, score, level, known_list in zip(
+            frame["url"], frame["ml_label"], frame["ml_probability"], rules, frame["risk_score"], frame["risk_level"], known
+        )
+    ]
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """analyze_urls-style result dicts for the rows of frame, why_summary included."""
+    records = frame.drop(columns="rules_mask").astype(object).where(frame.notna().drop(columns="rules_mask"), None)
+    rows = records.to_dict("records")
+    for row, rules, why in zip(rows, rules_triggered(frame), why_summaries(frame)):
+        row["rules_triggered"] = rules
+        row["why_summary"] = why
+        row["ml_probability"] = float(row["ml_probability"])
+        row["risk_score"] = int(row["risk_score"])
+        row["occurrences"] = int(row["occurrences"])
+    return rows
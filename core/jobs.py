@@ -0,0 +1,120 @@
+"""
+Background analysis jobs for the Streamlit pages.
+
+A large upload analysed in one analyze_urls call blocks the page until the
+last row is done, long enough for browser and session timeouts. AnalysisJob
+runs analyze_urls_chunks in a worker thread instead: result frames are
+published chunk by chunk, so the Upload page can draw progress (rows/s,
+ETA) and the dashboard can open on the rows finished so far while the rest
+continues. Each distinct URL of the upload is analyzed once: the job's
+frame has one row per distinct URL, with its upload-wide count in
+"occurrences".
+
+The job lives in st.session_state; it keeps running across page switches
+and reruns, which only stop the page script, not the worker thread.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.frames import concat_frames
+from core.pipeline import analyze_urls_chunks, dedupe_urls
+
+# Small enough for frequent progress updates, large enough to batch the model call
+UPLOAD_CHUNK_SIZE = 2_000
+
+
+class JobProgress(NamedTuple):
+    done: int
+    total: int
+    elapsed_s: float
+    rows_per_sec: float
+    eta_s: Optional[float]  # None until the first chunk is done
+    finished: bool
+    error: Optional[str]
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else 1.0
+
+
+class AnalysisJob:
+    """analyze_urls over urls in a daemon thread, chunk by chunk, readable while it runs."""
+
+    def __init__(self, urls: Sequence[str], chunk_size: int = UPLOAD_CHUNK_SIZE) -> None:
+        self.total = len(urls)
+        self.urls, _, self._occurrences = dedupe_urls(urls)
+        self.chunk_size = chunk_size
+        self._frames: List[pd.DataFrame] = []
+        self._done = 0  # input rows covered by the analyzed distinct URLs
+        self._distinct_done = 0
+        # concat of the first _combined_chunks frames, extended on demand by frame()
+        self._combined: Optional[pd.DataFrame] = None
+        self._combined_chunks = 0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._started = 0.0
+        self._finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="analysis-job", daemon=True)
+
+    def start(self) -> "AnalysisJob":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            for chunk in analyze_urls_chunks(self.urls, self.chunk_size, as_frame=True):
+                if self._cancel.is_set():
+                    break
+                counts = self._occurrences[self._distinct_done : self._distinct_done + len(chunk)]
+                chunk["occurrences"] = np.asarray(counts, dtype=np.int32)
+                with self._lock:
+                    self._frames.append(chunk)
+                    self._done += sum(counts)
+                    self._distinct_done += len(chunk)
+        except Exception as exc:
+            self.error = str(exc)
+        finally:
+            self._finished_at = time.perf_counter()
+
+    def cancel(self) -> None:
+        """Stop after the chunk in progress; rows done so far are kept."""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return self.finished
+
+    @property
+    def finished(self) -> bool:
+        return self._finished_at is not None
+
+    def frame(self) -> pd.DataFrame:
+        """The results so far as one analyze_urls_frame frame, in input order."""
+        with self._lock:
+            if self._combined is None or self._combined_chunks < len(self._frames):
+                head = [] if self._combined is None else [self._combined]
+                self._combined = concat_frames(head + self._frames[self._combined_chunks :])
+                self._combined_chunks = len(self._frames)
+            return self._combined
+
+    def progress(self) -> JobProgress:
+        with self._lock:
+            done, distinct_done = self._done, self._distinct_done
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        elapsed = max(end - self._started, 0.0) if self._started else 0.0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        # Frequent URLs come first, so rows/s overstates the pace: estimate from distinct URLs
+        distinct_rate = distinct_done / elapsed if elapsed > 0 else 0.0
+        eta = (len(self.urls) - distinct_done) / distinct_rate if distinct_rate > 0 else None
+        if self.finished:
+            eta = 0.0
+        return JobProgress(done, self.total, elapsed, rate, eta, self.finished, self.error)
@@ -0,0 +1,239 @@
+"""
+Known-URL short-circuit filters.
+
+Our own endpoints (known good) and URLs from past incidents (known bad) are
+settled before ML scoring: analyze_urls checks every distinct URL against an
+allow and a deny list, and URLs found on either skip core.ml entirely. Rules
+still run on them, so a signature hit is reported whatever the lists say.
+
+Each list is a Bloom filter (about 1.4 bytes per URL at the default 0.1%
+false-positive rate) built from a plain-text file: one URL per line, exactly
+as analyze_urls sees it after stripping, "#" comments. A Bloom filter never
+misses a listed URL but may claim an unlisted one, so the deny list also
+keeps the URLs themselves and confirms every filter hit exactly; a false
+positive there would mark an unknown URL malicious. The allow list trusts
+the filter (confirm it too with confirm=True); a false positive only means
+an unlisted URL goes unscored by ML, and the rules still see it.
+
+Lists are read from KNOWN_GOOD_PATH / KNOWN_BAD_PATH on first use; a missing
+file disables that side. SHORT_CIRCUIT_STATS counts how much traffic the
+lists settled.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+from collections import Counter
+from hashlib import blake2b
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KNOWN_GOOD_PATH = Path(os.environ.get("KNOWN_GOOD_URLS", "rules/known_urls/allow.txt"))
+KNOWN_BAD_PATH = Path(os.environ.get("KNOWN_BAD_URLS", "rules/known_urls/deny.txt"))
+DEFAULT_FP_RATE = 0.001
+
+ALLOW = "allow"
+DENY = "deny"
+# (ml label, malicious probability) reported for URLs settled by a list
+KNOWN_VERDICTS: Dict[str, Tuple[str, float]] = {ALLOW: ("benign", 0.0), DENY: ("malicious", 1.0)}
+
+
+def _url_hashes(urls: Sequence[str]) -> np.ndarray:
+    """Two independent 64-bit hashes per URL, shape (len(urls), 2)."""
+    digests = b"".join(blake2b(url.encode("utf-8", "surrogatepass"), digest_size=16).digest() for url in urls)
+    return np.frombuffer(digests, dtype="<u8").reshape(len(urls), 2)
+
+
+class BloomFilter:
+    """Bit array probed at n_hashes positions derived from two base hashes (Kirsch-Mitzenmacher)."""
+
+    def __init__(self, n_bits: int, n_hashes: int) -> None:
+        self.n_bits = max(8, int(n_bits))
+        self.n_hashes = max(1, int(n_hashes))
+        self.bits = np.zeros(-(-self.n_bits // 8), dtype=np.uint8)
+
+    @classmethod
+    def for_capacity(cls, n: int, fp_rate: float = DEFAULT_FP_RATE) -> "BloomFilter":
+        if not 0.0 < fp_rate < 1.0:
+            raise ValueError("fp_rate must be in (0, 1)")
+        n = max(1, n)
+        n_bits = math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2)
+        return cls(n_bits, round(n_bits / n * math.log(2)))
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        i = np.arange(self.n_hashes, dtype=np.uint64)
+        h1 = hashes[:, :1]
+        h2 = hashes[:, 1:] | np.uint64(1)
+        return (h1 + i * h2) % np.uint64(self.n_bits)  # wraps mod 2**64, as intended
+
+    def add(self, hashes: np.ndarray) -> None:
+        pos = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Boolean array: True where the URL may be in the set, False where it certainly is not."""
+        pos = self._positions(hashes)
+        bit = (pos & np.uint64(7)).astype(np.uint8)
+        return ((self.bits[pos >> np.uint64(3)] >> bit) & 1).all(axis=1)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+
+class KnownURLList:
+    """One list: a Bloom filter, plus the URLs themselves when hits are confirmed."""
+
+    def __init__(self, urls: Iterable[str], fp_rate: float = DEFAULT_FP_RATE, confirm: bool = False) -> None:
+        distinct = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+        self.size = len(distinct)
+        hashes = _url_hashes(distinct)
+        self.bloom = BloomFilter.for_capacity(self.size, fp_rate)
+        self.bloom.add(hashes)
+        self._exact = frozenset(distinct) if confirm else None
+
+    @classmethod
+    def load(cls, path: Path, fp_rate: float = DEFAULT_FP_RATE, confirm: bool = False) -> "KnownURLList":
+        with Path(path).open(encoding="utf-8") as fh:
+            return cls((line for line in fh if not line.lstrip().startswith("#")), fp_rate, confirm)
+
+    @property
+    def confirms(self) -> bool:
+        return self._exact is not None
+
+    def match(self, urls: Sequence[str], hashes: np.ndarray) -> Tuple[np.ndarray, int]:
+        """(listed mask, filter hits rejected by exact confirmation) for urls and their _url_hashes."""
+        hits = self.bloom.contains(hashes)
+        if self._exact is None:
+            return hits, 0
+        rejected = 0
+        for i in np.flatnonzero(hits).tolist():
+            if urls[i] not in self._exact:
+                hits[i] = False
+                rejected += 1
+        return hits, rejected
+
+
+class ShortCircuitStats:
+    """Thread-safe counts of URLs settled by the allow/deny lists vs sent to ML scoring."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.denied = 0
+        self.scored = 0
+        self.rejected = 0
+
+    def record(self, allowed: int, denied: int, scored: int, rejected: int = 0) -> None:
+        with self._lock:
+            self.allowed += allowed
+            self.denied += denied
+            self.scored += scored
+            self.rejected += rejected
+
+    def reset(self) -> None:
+        with self._lock:
+            self.allowed = self.denied = self.scored = self.rejected = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.allowed + self.denied + self.scored
+            return {
+                "allowed": self.allowed,
+                "denied": self.denied,
+                "scored": self.scored,
+                "deny_rejected": self.rejected,
+                "short_circuit_fraction": ((self.allowed + self.denied) / total) if total else 0.0,
+            }
+
+
+# Shared across analyze_urls calls; inspect with SHORT_CIRCUIT_STATS.stats()
+SHORT_CIRCUIT_STATS = ShortCircuitStats()
+
+
+class KnownURLFilters:
+    """The allow and deny lists together; either may be None."""
+
+    def __init__(self, allow: Optional[KnownURLList] = None, deny: Optional[KnownURLList] = None) -> None:
+        self.allow = allow
+        self.deny = deny
+
+    @property
+    def enabled(self) -> bool:
+        return self.allow is not None or self.deny is not None
+
+    def classify(self, urls: Sequence[str], counts: Optional[Sequence[int]] = None) -> List[Optional[str]]:
+        """
+        ALLOW, DENY or None (not listed) per URL, deny first when a URL is on both.
+        Counts every position in SHORT_CIRCUIT_STATS, repeats included; for an
+        already deduplicated urls, counts[i] is the number of positions of urls[i].
+        """
+        if not self.enabled:
+            SHORT_CIRCUIT_STATS.record(0, 0, sum(counts) if counts is not None else len(urls))
+            return [None] * len(urls)
+        distinct = list(dict.fromkeys(urls))
+        hashes = _url_hashes(distinct)
+        verdicts: Dict[str, str] = {}
+        rejected = 0
+        for name, known in ((ALLOW, self.allow), (DENY, self.deny)):
+            if known is not None:
+                hits, n = known.match(distinct, hashes)
+                rejected += n
+                verdicts.update((distinct[i], name) for i in np.flatnonzero(hits).tolist())
+
+        out = [verdicts.get(url) for url in urls]
+        totals: Counter = Counter()
+        for verdict, n in zip(out, counts if counts is not None else repeat(1)):
+            totals[verdict] += n
+        SHORT_CIRCUIT_STATS.record(totals[ALLOW], totals[DENY], totals[None], rejected)
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        """List sizes and filter memory, for display next to SHORT_CIRCUIT_STATS."""
+        row: Dict[str, float] = {}
+        for name, known in ((ALLOW, self.allow), (DENY, self.deny)):
+            row[f"{name}_urls"] = known.size if known is not None else 0
+            row[f"{name}_filter_bytes"] = known.bloom.nbytes if known is not None else 0
+        return row
+
+
+_FILTERS: Optional[KnownURLFilters] = None
+_FILTERS_LOCK = threading.Lock()
+
+
+def load_known_url_filters(
+    allow_path: Optional[Path] = KNOWN_GOOD_PATH,
+    deny_path: Optional[Path] = KNOWN_BAD_PATH,
+    fp_rate: float = DEFAULT_FP_RATE,
+) -> KnownURLFilters:
+    """Filters built from the list files; a missing (or None) path leaves that side empty."""
+    allow = KnownURLList.load(allow_path, fp_rate) if allow_path and Path(allow_path).exists() else None
+    deny = KnownURLList.load(deny_path, fp_rate, confirm=True) if deny_path and Path(deny_path).exists() else None
+    return KnownURLFilters(allow, deny)
+
+
+def get_known_url_filters() -> KnownURLFilters:
+    filters = _FILTERS
+    if filters is None:
+        with _FILTERS_LOCK:
+            if _FILTERS is None:
+                set_known_url_filters(load_known_url_filters())
+            filters = _FILTERS
+    return filters  # type: ignore[return-value]
+
+
+def set_known_url_filters(filters: KnownURLFilters) -> None:
+    global _FILTERS
+    _FILTERS = filters
+
+
+def reload_known_url_filters() -> KnownURLFilters:
+    """Rebuild from the list files and swap in; analyze_urls calls in flight keep the old filters."""
+    filters = load_known_url_filters()
+    set_known_url_filters(filters)
+    return filters
@@ -0,0 +1,400 @@
+"""
+Single-pass multi-pattern matching for the URL rules.
+
+A rule is either a set of literals or a regex. Every literal in the rule set
+is compiled into one prefix-factored trie regex (login|logout|wp ->
+log(?:in|out)|wp) with an empty named group at each word end, so one C-level
+search pass over the URL finds every literal occurrence, Aho-Corasick style:
+the trie prefers the longest word at a position and each word carries the
+precomputed outputs of all shorter words on its path, so no match is hidden
+by another one starting at the same place.
+
+Regex rules ride on the same pass. From each regex's parse tree we extract a
+set of literals at least one of which any match must contain (union\\s+select
+-> {"select"}); those literals go into the trie as triggers, and a regex is only
+run when one of its triggers occurs (a rule may also name its triggers
+explicitly). Regexes without triggers are always run, unless the matcher
+requires a prefilter, in which case they are rejected. IGNORECASE lets four
+non-ASCII characters match ASCII letters (see _ASCII_FOLD), so triggers are
+looked for in a copy of the text with those folded. Results are therefore
+exactly those of searching every rule on its own.
+
+The guarantee against catastrophic backtracking is load-time: rule packs vet
+every pattern with core.redos, so each regex search is linear in the text.
+On top of that a budget caps the characters regexes may scan per text: each
+regex run is charged the text's length, and a run that would exceed the
+budget (the first one included) is skipped and the scan raises RuleTimeout
+with the hits found so far. Being counted rather than timed, the budget
+gives the same verdict on every run and machine.
+
+scan_batch() evaluates the same rules column-wise over many texts: each
+literal rule, and each regex rule's trigger set, becomes one escaped literal
+alternation searched over a pandas string array (Arrow's RE2 when pyarrow is
+installed, where pure literal alternation means the same as in re), and each
+regex only runs on the rows its triggers selected; the budget applies per row.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+
+class Rule(NamedTuple):
+    name: str
+    explanation: str
+    regex: Optional[str] = None
+    literals: Tuple[str, ...] = ()
+    prefilter: Tuple[str, ...] = ()  # regex triggers, when they cannot be read off the pattern
+
+
+class RuleTimeout(Exception):
+    """A scan ran out of budget; hits holds the rules that fired before it stopped."""
+
+    def __init__(self, hits: List[int]) -> None:
+        super().__init__(f"rule evaluation budget exhausted after {len(hits)} hit(s)")
+        self.hits = hits
+
+
+# The only non-ASCII characters IGNORECASE matches to ASCII letters (İ ı ſ K);
+# trigger literals are ASCII, so the prefilter looks for them with these folded
+_ASCII_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+def _prefilter_text(text: str, lowered: str) -> str:
+    return lowered if lowered.isascii() else text.translate(_ASCII_FOLD).lower()
+
+
+# ---------------------------------------------------------------------------
+# Required-literal extraction
+# ---------------------------------------------------------------------------
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+_ATOMIC = getattr(sre_constants, "ATOMIC_GROUP", None)
+# Character classes larger than this are not worth using as triggers
+_MAX_CLASS_LITERALS = 8
+
+
+def _better(a: Optional[FrozenSet[str]], b: Optional[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """The more selective trigger set: longer shortest literal, then fewer literals."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    key_a = (min(map(len, a)), -len(a))
+    key_b = (min(map(len, b)), -len(b))
+    return a if key_a >= key_b else b
+
+
+def _required(items) -> Optional[FrozenSet[str]]:
+    best: Optional[FrozenSet[str]] = None
+    run: List[str] = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            best = _better(best, frozenset(["".join(run)]))
+            run = []
+        candidate: Optional[FrozenSet[str]] = None
+        if op is sre_constants.SUBPATTERN:
+            candidate = _required(av[-1].data)
+        elif op is sre_constants.BRANCH:
+            parts = [_required(branch.data) for branch in av[1]]
+            if all(part is not None for part in parts):
+                candidate = frozenset().union(*parts)
+        elif op in _REPEATS and av[0] >= 1:
+            candidate = _required(av[2].data)
+        elif op is _ATOMIC:
+            candidate = _required(av.data)
+        elif op is sre_constants.IN:
+            chars = [chr(v) for o, v in av if o is sre_constants.LITERAL]
+            if len(chars) == len(av) and len(chars) <= _MAX_CLASS_LITERALS:
+                candidate = frozenset(chars)
+        best = _better(best, candidate)
+    if run:
+        best = _better(best, frozenset(["".join(run)]))
+    return best
+
+
+def required_literals(regex: str, flags: int = re.IGNORECASE) -> Optional[FrozenSet[str]]:
+    """
+    Lowercase ASCII literals one of which every match of regex contains, or None
+    when no such set can be read off the pattern.
+    """
+    literals = _required(sre_parse.parse(regex, flags).data)
+    if not literals or not all(lit and lit.isascii() for lit in literals):
+        return None
+    return frozenset(lit.lower() for lit in literals)
+
+
+# ---------------------------------------------------------------------------
+# Literal trie
+# ---------------------------------------------------------------------------
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """Alternation over words as a trie; word i ends in an empty group named w<i>."""
+    trie: dict = {}
+    for i, word in enumerate(words):
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[None] = i
+
+    def emit(node: dict) -> str:
+        # Longer words first so the match at a position is the longest one
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items(), key=_key) if ch is not None]
+        if None in node:
+            branches.append(f"(?P<w{node[None]}>)")
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return "|".join(re.escape(ch) + emit(child) for ch, child in sorted(trie.items(), key=_key))
+
+
+def _key(item) -> str:
+    return item[0] or ""
+
+
+def _literal_alternation(literals: Iterable[str]) -> str:
+    """
+    Alternation matching any of literals, valid for both re and RE2: ASCII
+    punctuation and whitespace become \\xHH escapes, which the two engines read
+    alike (re.escape output is not always valid RE2).
+    """
+    return "|".join(
+        "".join(ch if ch.isalnum() or not ch.isascii() else f"\\x{ord(ch):02x}" for ch in lit) for lit in sorted(literals)
+    )
+
+
+def _string_array(texts: List[str]) -> pd.Series:
+    try:
+        return pd.Series(texts, dtype="str")
+    except UnicodeError:  # lone surrogates cannot go to Arrow
+        return pd.Series(texts, dtype=object)
+
+
+class MultiPatternMatcher:
+    """
+    Compiled rule set; scan(text) returns the indices of the rules that fire, in rule order.
+
+    Literals always match the lowercased text. Regexes run on the lowercased
+    text too unless lowercase=False, in which case they see the original (the
+    trigger prefilter still works on the lowercased copy).
+
+    require_prefilter rejects regexes without trigger literals. budget
+    (characters of regex scanning per text, None for no limit) makes scan()
+    raise RuleTimeout.
+
+    With profile set, scan() accumulates the time of the shared literal pass
+    (scan_seconds) and of every regex run per rule (regex_seconds/regex_runs).
+    Counters are plain ints/floats: approximate under concurrent scans.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        flags: int = re.IGNORECASE,
+        lowercase: bool = True,
+        require_prefilter: bool = False,
+        budget: Optional[int] = None,
+    ) -> None:
+        self.rules = list(rules)
+        self.flags = flags
+        self.lowercase = lowercase
+        self.budget = budget
+        self.profile = False
+        self.reset_counters()
+        self._regexes: Dict[int, "re.Pattern[str]"] = {}
+        self._always: List[int] = []  # regex rules without usable trigger literals
+        self._columns: Dict[int, str] = {}  # rule -> literal alternation for scan_batch
+
+        hits: Dict[str, Set[int]] = {}  # literal -> literal rules it fires
+        triggers: Dict[str, Set[int]] = {}  # literal -> regex rules it makes worth running
+        for i, rule in enumerate(self.rules):
+            if rule.regex is not None:
+                pattern = re.compile(rule.regex, flags)
+                if pattern.fullmatch(""):
+                    raise ValueError(f"Rule {rule.name!r} matches the empty string")
+                self._regexes[i] = pattern
+                if rule.prefilter:
+                    if not all(rule.prefilter):
+                        raise ValueError(f"Rule {rule.name!r} has an empty prefilter literal")
+                    literals: Optional[FrozenSet[str]] = frozenset(lit.lower() for lit in rule.prefilter)
+                else:
+                    literals = required_literals(rule.regex, flags)
+                if literals is None:
+                    if require_prefilter:
+                        raise ValueError(
+                            f"Rule {rule.name!r} has no literal every match must contain; give it a prefilter"
+                        )
+                    self._always.append(i)
+                else:
+                    self._columns[i] = _literal_alternation(literals)
+                    for lit in literals:
+                        triggers.setdefault(lit, set()).add(i)
+            else:
+                if not rule.literals or not all(rule.literals):
+                    raise ValueError(f"Rule {rule.name!r} needs non-empty literals")
+                self._columns[i] = _literal_alternation({lit.lower() for lit in rule.literals})
+                for lit in rule.literals:
+                    hits.setdefault(lit.lower(), set()).add(i)
+
+        words = sorted(set(hits) | set(triggers))
+        self._trie = re.compile(_trie_regex(words)) if words else None
+        # Outputs of word w include those of every word that is a prefix of w:
+        # they end on w's trie path, so they match wherever w does.
+        self._outputs: Dict[str, Tuple[FrozenSet[int], FrozenSet[int]]] = {}
+        for n, word in enumerate(words):
+            fired: Set[int] = set()
+            candidates: Set[int] = set()
+            for end in range(1, len(word) + 1):
+                prefix = word[:end]
+                fired |= hits.get(prefix, set())
+                candidates |= triggers.get(prefix, set())
+            self._outputs[f"w{n}"] = (frozenset(fired), frozenset(candidates))
+
+    def scan(self, text: str, lowered: Optional[str] = None) -> List[int]:
+        """lowered, when given, must be text.lower(): callers that have it spare the copy."""
+        if self.profile:
+            return self._scan_profiled(text)
+        if lowered is None:
+            lowered = text.lower()
+        fired, candidates = self._literal_pass(lowered)
+        if not lowered.isascii():
+            candidates = self._folded_candidates(text, lowered, candidates)
+        subject = lowered if self.lowercase else text
+        if self.budget is not None and len(candidates) * len(subject) > self.budget:
+            return self._run_budgeted(subject, fired, candidates)
+        for i in candidates:
+            if self._regexes[i].search(subject):
+                fired.add(i)
+        return sorted(fired)
+
+    def _run_budgeted(self, subject: str, fired: Set[int], candidates: Set[int]) -> List[int]:
+        # Only the regexes that fit run, in rule order: the same ones every time
+        runs = self.budget // len(subject)
+        ordered = sorted(candidates)
+        for i in ordered[:runs]:
+            if self._regexes[i].search(subject):
+                fired.add(i)
+        self.timeouts += 1
+        raise RuleTimeout(sorted(fired))
+
+    def _scan_profiled(self, text: str) -> List[int]:
+        clock = time.perf_counter
+        start = clock()
+        lowered = text.lower()
+        fired, candidates = self._literal_pass(lowered)
+        if not lowered.isascii():
+            candidates = self._folded_candidates(text, lowered, candidates)
+        self.scan_seconds += clock() - start
+        self.scans += 1
+        budget = self.budget
+        spent = 0
+        subject = lowered if self.lowercase else text
+        for i in sorted(candidates):
+            spent += len(subject)
+            if budget is not None and spent > budget:
+                self.timeouts += 1
+                raise RuleTimeout(sorted(fired))
+            start = clock()
+            matched = self._regexes[i].search(subject)
+            elapsed = clock() - start
+            self.regex_seconds[i] += elapsed
+            self.regex_runs[i] += 1
+            if matched:
+                fired.add(i)
+        return sorted(fired)
+
+    def reset_counters(self) -> None:
+        self.scans = 0
+        self.scan_seconds = 0.0
+        self.timeouts = 0
+        self.regex_runs = [0] * len(self.rules)
+        self.regex_seconds = [0.0] * len(self.rules)
+
+    def _folded_candidates(self, text: str, lowered: str, candidates: Set[int]) -> Set[int]:
+        """Regex rules worth running on non-ASCII text: triggers looked up with _ASCII_FOLD applied."""
+        folded = text.translate(_ASCII_FOLD).lower()
+        return candidates if folded == lowered else self._literal_pass(folded)[1]
+
+    def _literal_pass(self, lowered: str) -> Tuple[Set[int], Set[int]]:
+        """(literal rules fired, regex rules worth running) from one trie pass."""
+        fired: Set[int] = set()
+        candidates: Set[int] = set(self._always)
+        if self._trie is not None:
+            search = self._trie.search
+            outputs = self._outputs
+            m = search(lowered)
+            while m is not None:
+                hit, cand = outputs[m.lastgroup]
+                fired |= hit
+                candidates |= cand
+                # Resume one past the match start: overlapping occurrences still count
+                m = search(lowered, m.start() + 1)
+        return fired, candidates
+
+    def scan_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (hits, timed_out): boolean (len(texts), len(rules)) hit matrix whose row r
+        equals scan(texts[r]) as a mask, and the rows that ran out of budget (their
+        remaining regexes count as misses).
+        """
+        clock = time.perf_counter
+        start = clock()
+        texts = list(texts)
+        lowered = [text.lower() for text in texts]
+        n = len(lowered)
+        hits = np.zeros((n, len(self.rules)), dtype=bool)
+        timed_out = np.zeros(n, dtype=bool)
+        if not n:
+            return hits, timed_out
+        column = _string_array(lowered)
+        folded = [_prefilter_text(text, low) for text, low in zip(texts, lowered)]
+        trigger_column = column if folded == lowered else _string_array(folded)
+        for i, pattern in self._columns.items():
+            source = trigger_column if i in self._regexes else column
+            hits[:, i] = source.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        for i in self._always:
+            hits[:, i] = True
+        if self.profile:
+            self.scan_seconds += clock() - start
+            self.scans += n
+
+        subject = lowered if self.lowercase else texts
+        if self.budget is not None:
+            lengths = np.fromiter(map(len, subject), dtype=np.int64, count=n)
+            spent = np.zeros(n, dtype=np.int64)
+        for i, regex in sorted(self._regexes.items()):
+            start = clock()
+            rows = np.flatnonzero(hits[:, i])
+            if self.budget is not None:
+                fits = spent[rows] + lengths[rows] <= self.budget
+                timed_out[rows[~fits]] = True
+                hits[rows[~fits], i] = False
+                rows = rows[fits]
+                spent[rows] += lengths[rows]
+            rows = rows.tolist()
+            search = regex.search
+            hits[rows, i] = [search(subject[r]) is not None for r in rows]
+            if self.profile:
+                self.regex_seconds[i] += clock() - start
+                self.regex_runs[i] += len(rows)
+        self.timeouts += int(timed_out.sum())
+        return hits, timed_out
+
+    def names(self, text: str) -> List[str]:
+        return [self.rules[i].name for i in self.scan(text)]
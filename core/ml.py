@@ -1,59 +1,188 @@
 from __future__ import annotations
 
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, islice, repeat
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 import joblib
 import numpy as np
 import pandas as pd
-from scipy.sparse import csr_matrix, hstack
 
-from feature_extractor import extract_features
+import core.registry as registry
+from core.cache import VerdictCache
+from core.forest import FlatForest, flat_forest_dir, is_forest, is_fresh_export
+from core.url import url_text
+from core.numeric_features import NUMERIC_FEATURE_COLUMNS, combine_feature_blocks, extract_numeric_matrix
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
 
 MODEL_PATH = Path("models/url_model.pkl")
 VECTORIZER_PATH = Path("models/vectorizer.pkl")
+HASHED_MODEL_PATH = Path("models/url_model_hashed.pkl")
+HASHED_VECTORIZER_PATH = Path("models/hashed_vectorizer.pkl")
+LINEAR_SCORER_PATH = Path("models/linear_scorer.bin")
+NUMERIC_MODEL_PATH = Path("models/numeric_model.pkl")
+
+# (model path, vectorizer path) per feature mode, see feature_extractor.FEATURE_MODES.
+# "numeric" is the cascade's first stage: NUMERIC_FEATURE_COLUMNS only, no vectorizer.
+MODEL_PATHS: Dict[str, Tuple[Path, Optional[Path]]] = {
+    "tfidf": (MODEL_PATH, VECTORIZER_PATH),
+    "hashed": (HASHED_MODEL_PATH, HASHED_VECTORIZER_PATH),
+    "numeric": (NUMERIC_MODEL_PATH, None),
+}
+NUMERIC_MODE = "numeric"
+
+# Parallel inference: batches smaller than this are scored in-process because
+# pool start-up and per-worker model loading would dominate.
+PARALLEL_MIN_URLS = 20_000
+DEFAULT_CHUNK_SIZE = 10_000
+
+VERDICT_CACHE_SIZE = 100_000
+# Shared across predict_urls calls; inspect with VERDICT_CACHE.stats()
+VERDICT_CACHE = VerdictCache(VERDICT_CACHE_SIZE)
+
+# Version reported for models loaded from the fixed MODEL_PATHS files
+UNVERSIONED = "unversioned"
+
+# Cascade: URLs the numeric model scores strictly inside (low, high) are sent on
+# to the full model; everything else keeps the numeric verdict.
+CASCADE_BAND: Tuple[float, float] = (0.1, 0.9)
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    vectorizer: Any
+    version: str
+    identity: Tuple[str, str, int]  # (feature_mode, version, load number), keys VERDICT_CACHE
+
+
+# feature_mode -> LoadedModel. Entries are replaced whole (never mutated), so a
+# predict_urls call that already holds one keeps scoring with it during a swap.
+_MODEL_CACHE: Dict[str, LoadedModel] = {}
+_LOAD_LOCK = threading.Lock()
+_LOAD_COUNTER = count(1)
+_WATCHER: "registry.ManifestWatcher | None" = None
+_SCORER_CACHE: "LinearScorer | None" = None
+
+
+class CascadeStats:
+    """Thread-safe counts of URLs settled by the numeric stage vs sent to the full model."""
 
-_MODEL_CACHE: Tuple[Any, Any] | None = None  # (model, vectorizer)
-_NUMERIC_COLUMNS: List[str] | None = None
-
-
-def _load_model_and_vectorizer() -> Tuple[Any, Any]:
-    global _MODEL_CACHE
-    if _MODEL_CACHE is not None:
-        return _MODEL_CACHE
-    if not MODEL_PATH.exists() or not VECTORIZER_PATH.exists():
-        raise FileNotFoundError("Trained model/vectorizer not found in models/. Run training first.")
-    model = joblib.load(MODEL_PATH)
-    vectorizer = joblib.load(VECTORIZER_PATH)
-    _MODEL_CACHE = (model, vectorizer)
-    return _MODEL_CACHE
-
-
-def _numeric_columns() -> List[str]:
-    global _NUMERIC_COLUMNS
-    if _NUMERIC_COLUMNS is not None:
-        return _NUMERIC_COLUMNS
-    # Infer column order from feature_extractor
-    sample_df = extract_features(pd.DataFrame([{"url": "http://example.local", "label": None}]))
-    cols = [c for c in sample_df.columns if c != "label"]
-    _NUMERIC_COLUMNS = cols
-    return cols
-
-
-def _build_numeric_matrix(urls: List[str]) -> csr_matrix:
-    cols = _numeric_columns()
-    rows = []
-    for url in urls:
-        feat_df = extract_features(pd.DataFrame([{"url": url, "label": None}]))
-        if feat_df.empty:
-            row = {c: 0.0 for c in cols}
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.numeric = 0
+        self.full = 0
+
+    def record(self, numeric: int, full: int) -> None:
+        with self._lock:
+            self.numeric += numeric
+            self.full += full
+
+    def reset(self) -> None:
+        with self._lock:
+            self.numeric = self.full = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.numeric + self.full
+            return {
+                "numeric": self.numeric,
+                "full": self.full,
+                "numeric_fraction": (self.numeric / total) if total else 0.0,
+                "full_fraction": (self.full / total) if total else 0.0,
+            }
+
+
+# Shared across predict_urls(cascade=True) calls; inspect with CASCADE_STATS.stats()
+CASCADE_STATS = CascadeStats()
+
+
+def _load_from_disk(feature_mode: str, version: Optional[str] = None) -> LoadedModel:
+    """
+    Load the given registry version, or the active one when version is None.
+    Falls back to the fixed MODEL_PATHS files when the registry has no active
+    version for feature_mode (or version is UNVERSIONED).
+    """
+    if feature_mode not in MODEL_PATHS:
+        raise ValueError(f"Unknown feature_mode {feature_mode!r}; expected one of {tuple(MODEL_PATHS)}")
+    if version is None:
+        version = registry.active_version(feature_mode, registry.REGISTRY_DIR) or UNVERSIONED
+
+    if version == UNVERSIONED:
+        model_path, vectorizer_path = MODEL_PATHS[feature_mode]
+        if not model_path.exists() or (vectorizer_path is not None and not vectorizer_path.exists()):
+            raise FileNotFoundError("Trained model/vectorizer not found in models/. Run training first.")
+        # Array data stays in the page cache and is shared between processes
+        vectorizer = joblib.load(vectorizer_path, mmap_mode="r") if vectorizer_path is not None else None
+        forest_dir = flat_forest_dir(model_path)
+        if is_fresh_export(forest_dir, model_path):
+            # sklearn would copy a forest's nodes into private memory: map the sidecar export
+            # instead and never unpickle the forest
+            model = FlatForest.load(forest_dir)
         else:
-            row = feat_df.iloc[0].to_dict()
-            row.pop("label", None)
-            # Ensure all columns present and ordered
-            row = {c: row.get(c, 0.0) for c in cols}
-        rows.append([row[c] for c in cols])
-    return csr_matrix(np.array(rows))
+            model = joblib.load(model_path, mmap_mode="r")
+            if is_forest(model):
+                # No sidecar (the pickle predates it): a private per-process flat copy
+                model = FlatForest.from_model(model)
+    else:
+        model, vectorizer = registry.load_version(version, registry.REGISTRY_DIR)
+    return LoadedModel(model, vectorizer, version, (feature_mode, version, next(_LOAD_COUNTER)))
+
+
+def _get_model(feature_mode: str = "tfidf") -> LoadedModel:
+    loaded = _MODEL_CACHE.get(feature_mode)
+    if loaded is not None:
+        return loaded
+    with _LOAD_LOCK:
+        loaded = _MODEL_CACHE.get(feature_mode)
+        if loaded is None:
+            loaded = _load_from_disk(feature_mode)
+            _MODEL_CACHE[feature_mode] = loaded
+    return loaded
+
+
+def active_model_version(feature_mode: str = "tfidf") -> str:
+    return _get_model(feature_mode).version
+
+
+def refresh_models() -> Dict[str, str]:
+    """
+    Load any newly activated registry version for the feature modes in use and swap
+    it in. Loading happens before the swap, so in-flight predict_urls calls are never
+    blocked. Returns {feature_mode: new_version} for the modes that changed.
+    """
+    swapped: Dict[str, str] = {}
+    with _LOAD_LOCK:
+        for feature_mode, current in list(_MODEL_CACHE.items()):
+            target = registry.active_version(feature_mode, registry.REGISTRY_DIR) or UNVERSIONED
+            if target == current.version:
+                continue
+            _MODEL_CACHE[feature_mode] = _load_from_disk(feature_mode, target)
+            swapped[feature_mode] = target
+    return swapped
+
+
+def start_model_watcher(interval: float = 5.0) -> "registry.ManifestWatcher":
+    """Start (once per process) a background watcher that calls refresh_models on manifest changes."""
+    global _WATCHER
+    with _LOAD_LOCK:
+        if _WATCHER is None or not _WATCHER.running:
+            _WATCHER = registry.ManifestWatcher(refresh_models, registry.REGISTRY_DIR, interval).start()
+    return _WATCHER
+
+
+def _build_feature_matrix(urls: List[str], vectorizer) -> "csr_matrix | np.ndarray":
+    numeric_matrix = extract_numeric_matrix(urls)
+    if vectorizer is None:
+        return numeric_matrix
+    tfidf_matrix = vectorizer.transform(pd.Series([url_text(u) for u in urls]).fillna("").astype(str))
+    return combine_feature_blocks(numeric_matrix, tfidf_matrix)
 
 
 def _malicious_probs(model, X) -> np.ndarray:
@@ -81,23 +210,358 @@ def _malicious_probs(model, X) -> np.ndarray:
     return np.array([1.0 if p == "malicious" else 0.0 for p in preds])
 
 
-def predict_urls(urls: List[str]) -> List[Dict[str, Any]]:
+def _score_urls(urls: List[str], loaded: LoadedModel) -> np.ndarray:
+    return _malicious_probs(loaded.model, _build_feature_matrix(urls, loaded.vectorizer))
+
+
+def _init_worker(feature_mode: str, version: str) -> None:
+    # Load once per worker process, pinned to the caller's version; tasks then
+    # only carry URL chunks. Forked workers usually inherit it already.
+    loaded = _MODEL_CACHE.get(feature_mode)
+    if loaded is None or loaded.version != version:
+        _MODEL_CACHE[feature_mode] = _load_from_disk(feature_mode, version)
+
+
+def _score_chunk(urls: List[str], feature_mode: str) -> np.ndarray:
+    return _score_urls(urls, _MODEL_CACHE[feature_mode])
+
+
+def _score_parallel(urls: List[str], loaded: LoadedModel, workers: int, chunk_size: int) -> np.ndarray:
+    feature_mode, version, _ = loaded.identity
+    chunks = [urls[i : i + chunk_size] for i in range(0, len(urls), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        initializer=_init_worker,
+        initargs=(feature_mode, version),
+    ) as pool:
+        # map() yields in submission order, so input order is preserved
+        parts = list(pool.map(_score_chunk, chunks, repeat(feature_mode)))
+    return np.concatenate(parts)
+
+
+def predict_urls(
+    urls: List[str],
+    feature_mode: str = "tfidf",
+    workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    use_cache: bool = True,
+    cascade: bool = False,
+    band: Optional[Tuple[float, float]] = None,
+) -> List[Dict[str, Any]]:
     """
     Pure inference: given a list of URLs, return predicted label and malicious probability.
+    feature_mode picks the model trained on "tfidf" or "hashed" text features.
+    workers > 1 (or -1 for all cores) shards batches of at least PARALLEL_MIN_URLS
+    across a process pool in chunks of chunk_size; smaller batches run in-process.
+    With use_cache, repeated URLs are served from VERDICT_CACHE and only distinct
+    uncached URLs are scored. Each result carries the model_version that scored it.
+    With cascade, the numeric model scores every URL first and only those inside
+    band (default CASCADE_BAND) pay for the full model; see CASCADE_STATS.
+    urls may be core.url.ParsedURL objects; results still carry the URL strings.
     """
-    model, vectorizer = _load_model_and_vectorizer()
-    numeric_matrix = _build_numeric_matrix(urls)
-    tfidf_matrix = vectorizer.transform(pd.Series(urls).fillna("").astype(str))
-    X = hstack([numeric_matrix, tfidf_matrix])
+    urls = list(urls)
+    texts = [url_text(u) for u in urls]
+    # One snapshot for the whole call; a concurrent hot swap does not affect it.
+    # Loading here also surfaces a missing model in the caller, not in a worker.
+    loaded = _get_model(feature_mode)
+    numeric: Optional[LoadedModel] = None
+    version = loaded.version
+    model_id: Any = loaded.identity
+    if cascade:
+        if feature_mode == NUMERIC_MODE:
+            raise ValueError("cascade needs a text feature mode for its second stage")
+        band = tuple(band or CASCADE_BAND)
+        if not 0.0 <= band[0] <= band[1] <= 1.0:
+            raise ValueError("band must satisfy 0 <= low <= high <= 1")
+        numeric = _get_model(NUMERIC_MODE)
+        version = f"{loaded.version}+{NUMERIC_MODE}:{numeric.version}"
+        model_id = (loaded.identity, numeric.identity, band)
+
+    if workers is not None and workers < 0:
+        workers = os.cpu_count() or 1
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+
+    def score(batch: List[str]) -> np.ndarray:
+        if numeric is not None:
+            return _score_cascade(batch, numeric, loaded, band, workers, chunk_size)
+        return _score_batch(batch, loaded, workers, chunk_size)
+
+    if not use_cache:
+        return _to_results(texts, score(urls), version)
 
-    probs = _malicious_probs(model, X)
+    found, missing = VERDICT_CACHE.lookup(model_id, texts)
+    if missing:
+        # Score the caller's objects (a ParsedURL keeps what it already parsed)
+        by_text = dict(zip(texts, urls))
+        missing_probs = score([by_text[t] for t in missing])
+        VERDICT_CACHE.store(model_id, missing, missing_probs)
+        found.update(zip(missing, missing_probs.tolist()))
+    return _to_results(texts, [found[url] for url in texts], version)
+
+
+def _score_batch(urls: List[str], loaded: LoadedModel, workers: int | None, chunk_size: int) -> np.ndarray:
+    if workers and workers > 1 and len(urls) >= PARALLEL_MIN_URLS and len(urls) > chunk_size:
+        return _score_parallel(urls, loaded, workers, chunk_size)
+    return _score_urls(urls, loaded)
+
+
+def _score_cascade(
+    urls: List[str],
+    numeric: LoadedModel,
+    full: LoadedModel,
+    band: Tuple[float, float],
+    workers: int | None,
+    chunk_size: int,
+) -> np.ndarray:
+    probs = np.array(_score_urls(urls, numeric), dtype=np.float64)
+    uncertain = np.flatnonzero((probs > band[0]) & (probs < band[1]))
+    if uncertain.size:
+        probs[uncertain] = _score_batch([urls[i] for i in uncertain], full, workers, chunk_size)
+    CASCADE_STATS.record(len(urls) - uncertain.size, uncertain.size)
+    return probs
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Lists of up to chunk_size consecutive items; never holds more than one chunk."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def predict_urls_iter(
+    urls: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    feature_mode: str = "tfidf",
+    use_cache: bool = True,
+    cascade: bool = False,
+    band: Optional[Tuple[float, float]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming predict_urls over any iterable (file handle, generator, DB cursor).
+    URLs are pulled and scored chunk_size at a time, so feature matrices and result
+    dicts never cover more than one chunk. Results come out in input order; each
+    chunk is scored by the model active at that moment (see model_version).
+    """
+    for chunk in iter_chunks(urls, chunk_size):
+        yield from predict_urls(
+            chunk,
+            feature_mode=feature_mode,
+            chunk_size=chunk_size,
+            use_cache=use_cache,
+            cascade=cascade,
+            band=band,
+        )
+
+
+def _to_results(urls: List[str], probs: np.ndarray, version: str) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
     for url, prob in zip(urls, probs):
         label = "malicious" if prob >= 0.5 else "benign"
-        results.append({"url": url, "label": label, "malicious_probability": float(prob)})
+        results.append(
+            {"url": url, "label": label, "malicious_probability": float(prob), "model_version": version}
+        )
     return results
 
 
+# ---------------------------------------------------------------------------
+# Compiled linear scorer
+#
+# File layout: 8-byte magic, little-endian uint32 header length, a JSON header
+# describing the arrays, then the raw arrays, each aligned to 64 bytes so they
+# can be viewed straight out of a read-only memory map.
+# ---------------------------------------------------------------------------
+
+_SCORER_MAGIC = b"URLLIN01"
+_SCORER_ALIGN = 64
+_WHITE_SPACES = re.compile(r"\s\s+")  # same normalisation as sklearn's char analyzer
+
+
+def export_linear_scorer(
+    model, vectorizer, path: Path = LINEAR_SCORER_PATH, version: Optional[str] = None
+) -> Path:
+    """
+    Write a binary LogisticRegression/LinearSVC + char TF-IDF model that
+    LinearScorer can load without sklearn. Raises ValueError for unsupported models.
+    """
+    coef = getattr(model, "coef_", None)
+    if coef is None or coef.shape[0] != 1:
+        raise ValueError(f"Only binary linear models can be exported, got {type(model).__name__}")
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError("Only vocabulary-based TF-IDF vectorizers can be exported")
+    if (
+        vectorizer.analyzer != "char"
+        or vectorizer.norm != "l2"
+        or vectorizer.sublinear_tf
+        or vectorizer.binary
+        or vectorizer.preprocessor is not None
+        or vectorizer.strip_accents is not None
+    ):
+        raise ValueError("Only default char TF-IDF vectorizers can be exported")
+
+    classes = [str(c) for c in model.classes_]
+    if hasattr(model, "predict_proba") and "malicious" in classes:
+        # predict_proba column for classes_[1] is sigmoid(decision)
+        sign = 1.0 if classes.index("malicious") == 1 else -1.0
+    else:
+        sign = 1.0
+
+    terms = sorted(vectorizer.vocabulary_.items(), key=lambda kv: kv[1])
+    encoded = [term.encode("utf-8") for term, _ in terms]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    n_terms = len(terms)
+    idf = getattr(vectorizer, "idf_", None) if vectorizer.use_idf else None
+
+    arrays = {
+        "vocab_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "vocab_offsets": offsets,
+        "idf": np.asarray(idf if idf is not None else np.ones(n_terms), dtype=np.float64),
+        "coef": np.asarray(coef[0], dtype=np.float64),
+    }
+    if arrays["coef"].shape[0] != len(NUMERIC_FEATURE_COLUMNS) + n_terms:
+        raise ValueError("Model coefficients do not match numeric + TF-IDF feature count")
+
+    header: Dict[str, Any] = {
+        "model_type": type(model).__name__,
+        "version": version,
+        "classes": classes,
+        "intercept": float(np.ravel(model.intercept_)[0]),
+        "sign": sign,
+        "ngram_range": list(vectorizer.ngram_range),
+        "lowercase": bool(vectorizer.lowercase),
+        "numeric_columns": list(NUMERIC_FEATURE_COLUMNS),
+        "arrays": {},
+    }
+    offset = 0
+    for name, arr in arrays.items():
+        header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += -(-arr.nbytes // _SCORER_ALIGN) * _SCORER_ALIGN
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = len(_SCORER_MAGIC) + 4 + len(header_bytes)
+    data_start = -(-prefix // _SCORER_ALIGN) * _SCORER_ALIGN
+
+    # Write a new file and rename it into place: running scorers mmap the old
+    # file, and truncating it in place would crash them.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        fh.write(_SCORER_MAGIC)
+        fh.write(len(header_bytes).to_bytes(4, "little"))
+        fh.write(header_bytes)
+        fh.write(b"\0" * (data_start - prefix))
+        for name, arr in arrays.items():
+            fh.seek(data_start + header["arrays"][name]["offset"])
+            fh.write(arr.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class LinearScorer:
+    """
+    sklearn-free scorer for artifacts written by export_linear_scorer.
+    Reproduces predict_urls probabilities with a sparse dot product.
+    """
+
+    def __init__(self, path: Path = LINEAR_SCORER_PATH, mmap: bool = True) -> None:
+        path = Path(path)
+        if mmap:
+            buf = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            buf = np.fromfile(path, dtype=np.uint8)
+        if bytes(buf[: len(_SCORER_MAGIC)]) != _SCORER_MAGIC:
+            raise ValueError(f"{path} is not a compiled linear scorer")
+        header_len = int.from_bytes(bytes(buf[len(_SCORER_MAGIC) : len(_SCORER_MAGIC) + 4]), "little")
+        header_end = len(_SCORER_MAGIC) + 4 + header_len
+        header = json.loads(bytes(buf[len(_SCORER_MAGIC) + 4 : header_end]).decode("utf-8"))
+        data_start = -(-header_end // _SCORER_ALIGN) * _SCORER_ALIGN
+
+        arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            start = data_start + spec["offset"]
+            arrays[name] = buf[start : start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+        if header["numeric_columns"] != list(NUMERIC_FEATURE_COLUMNS):
+            raise ValueError("Compiled scorer was built for a different numeric feature schema")
+
+        self.path = path
+        self.version: str = header.get("version") or UNVERSIONED
+        self.model_type: str = header["model_type"]
+        self.classes: List[str] = header["classes"]
+        self.intercept: float = header["intercept"]
+        self.sign: float = header["sign"]
+        self.ngram_range: Tuple[int, int] = tuple(header["ngram_range"])
+        self.lowercase: bool = header["lowercase"]
+        self.idf = arrays["idf"]
+        n_numeric = len(NUMERIC_FEATURE_COLUMNS)
+        self.numeric_coef = arrays["coef"][:n_numeric]
+        self.tfidf_coef = arrays["coef"][n_numeric:]
+
+        blob = arrays["vocab_blob"].tobytes()
+        offsets = arrays["vocab_offsets"]
+        self.vocabulary: Dict[str, int] = {
+            blob[offsets[i] : offsets[i + 1]].decode("utf-8"): i for i in range(len(offsets) - 1)
+        }
+
+    def _tfidf_dot(self, text: str) -> float:
+        if self.lowercase:
+            text = text.lower()
+        text = _WHITE_SPACES.sub(" ", text)
+        vocab_get = self.vocabulary.get
+        counts: Dict[int, int] = {}
+        min_n, max_n = self.ngram_range
+        text_len = len(text)
+        for n in range(min_n, min(max_n + 1, text_len + 1)):
+            for i in range(text_len - n + 1):
+                idx = vocab_get(text[i : i + n])
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+        if not counts:
+            return 0.0
+        idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[idx]
+        norm = np.sqrt(weights @ weights)
+        return float(weights @ self.tfidf_coef[idx]) / norm
+
+    def decision_function(self, urls: List[str]) -> np.ndarray:
+        texts = ["" if u is None or (isinstance(u, float) and u != u) else str(url_text(u)) for u in urls]
+        numeric = extract_numeric_matrix(urls).astype(np.float64)
+        scores = numeric @ self.numeric_coef + self.intercept
+        scores += np.fromiter((self._tfidf_dot(t) for t in texts), dtype=np.float64, count=len(texts))
+        return scores
+
+    def malicious_probs(self, urls: List[str]) -> np.ndarray:
+        return 1 / (1 + np.exp(-self.sign * self.decision_function(urls)))
+
+
+def load_linear_scorer(path: Path = LINEAR_SCORER_PATH) -> LinearScorer:
+    global _SCORER_CACHE
+    if _SCORER_CACHE is not None and _SCORER_CACHE.path == Path(path):
+        return _SCORER_CACHE
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Compiled scorer not found at {path}. Run training first.")
+    _SCORER_CACHE = LinearScorer(path)
+    return _SCORER_CACHE
+
+
+def predict_urls_compiled(urls: List[str], path: Path = LINEAR_SCORER_PATH) -> List[Dict[str, Any]]:
+    """
+    Same output as predict_urls, scored from the compiled linear artifact
+    (no sklearn/scipy import, no unpickling).
+    """
+    scorer = load_linear_scorer(path)
+    return _to_results(urls, scorer.malicious_probs(urls), scorer.version)
+
+
 # Backward-compatible API for pipeline
 def ml_predict(events: List[Any], feature_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     urls = []
@@ -0,0 +1,183 @@
+"""
+Numeric URL features (NUMERIC_FEATURE_COLUMNS) shared by training
+(feature_extractor) and scoring (core.ml), and the [numeric | text] CSR
+assembly both use.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.domains import get_domain_index
+from core.url import ParsedURL, _safe_parse
+
+
+def _count_digits(text: str) -> int:
+    return sum(map(str.isdigit, text or ""))
+
+
+_SPECIAL_CHARS = re.compile(r"[^a-zA-Z0-9]")
+
+
+def _count_special(text: str) -> int:
+    return len(_SPECIAL_CHARS.findall(text or ""))
+
+
+def _has_ip(domain: str) -> int:
+    if not domain:
+        return 0
+    # Simple IPv4 check
+    parts = domain.split(".")
+    if len(parts) != 4:
+        return 0
+    for part in parts:
+        if not part.isdigit():
+            return 0
+        val = int(part)
+        if val < 0 or val > 255:
+            return 0
+    return 1
+
+
+def _tld_risk(domain: str) -> int:
+    """Reputation of domain in core.domains: 3 high, 2 medium, otherwise 1."""
+    if not domain or "." not in domain:
+        return 1
+    return max(1, get_domain_index().level(domain))
+
+
+def _entropy(text: str) -> float:
+    if not text:
+        return 0.0
+    counts = Counter(text)
+    length = len(text)
+    entropy = 0.0
+    for c in counts.values():
+        p = c / length
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+NUMERIC_FEATURE_COLUMNS: List[str] = [
+    "url_length",
+    "domain_length",
+    "path_length",
+    "query_length",
+    "num_digits",
+    "num_special_chars",
+    "num_subdomains",
+    "digit_ratio",
+    "symbol_ratio",
+    "uppercase_ratio",
+    "shannon_entropy",
+    "suspicious_keyword_count",
+    "has_ip_address",
+    "tld_risk_score",
+]
+SUSPICIOUS_KEYWORDS = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
+
+
+def _numeric_row(url) -> Optional[Tuple[float, ...]]:
+    """
+    Compute the numeric feature values for one URL (a string or a ParsedURL)
+    in NUMERIC_FEATURE_COLUMNS order. Returns None when the URL cannot be parsed.
+    """
+    if isinstance(url, ParsedURL):
+        parsed = url.parts
+        if not parsed:
+            return None
+        lowered, url = url.lower, url.raw
+    else:
+        parsed = _safe_parse(url)
+        if not parsed:
+            return None
+        lowered = url.lower()
+
+    domain = parsed.netloc or ""
+    path = parsed.path or ""
+    query = parsed.query or ""
+    url_len = len(url)
+    num_digits = _count_digits(url)
+    num_special = _count_special(url)
+    num_upper = sum(map(str.isupper, url))
+
+    return (
+        url_len,
+        len(domain),
+        len(path),
+        len(query),
+        num_digits,
+        num_special,
+        max(0, domain.count(".") - 1) if domain else 0,
+        (num_digits / url_len) if url_len else 0.0,
+        (num_special / url_len) if url_len else 0.0,
+        (num_upper / url_len) if url_len else 0.0,
+        _entropy(url),
+        sum(kw in lowered for kw in SUSPICIOUS_KEYWORDS),
+        _has_ip(domain),
+        _tld_risk(domain),
+    )
+
+
+def _numeric_matrix_with_mask(urls: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    urls = list(urls)
+    matrix = np.zeros((len(urls), len(NUMERIC_FEATURE_COLUMNS)), dtype=np.float32)
+    valid = np.zeros(len(urls), dtype=bool)
+    for i, url in enumerate(urls):
+        values = _numeric_row(url)
+        if values is not None:
+            matrix[i] = values
+            valid[i] = True
+    return matrix, valid
+
+
+def extract_numeric_matrix(urls: Iterable) -> np.ndarray:
+    """
+    Batched numeric feature extraction over URL strings or ParsedURLs.
+    Returns a float32 array of shape (len(urls), len(NUMERIC_FEATURE_COLUMNS));
+    rows for unparsable URLs are all zeros.
+    """
+    matrix, _ = _numeric_matrix_with_mask(urls)
+    return matrix
+
+
+def combine_feature_blocks(numeric: np.ndarray, tfidf):
+    """
+    Build the model input [numeric | tfidf] as a CSR matrix without hstack.
+    Numeric zeros are not stored, matching csr_matrix(numeric) semantics.
+    """
+    from scipy.sparse import csr_matrix
+
+    tfidf = csr_matrix(tfidf)
+    n_rows, n_numeric = numeric.shape
+    if tfidf.shape[0] != n_rows:
+        raise ValueError(f"Row mismatch: numeric has {n_rows} rows, tfidf has {tfidf.shape[0]}")
+
+    num_rows, num_cols = np.nonzero(numeric)
+    num_counts = np.bincount(num_rows, minlength=n_rows)
+    tf_counts = np.diff(tfidf.indptr)
+
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(num_counts + tf_counts, out=indptr[1:])
+
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    data = np.empty(indptr[-1], dtype=np.result_type(numeric.dtype, tfidf.dtype))
+
+    # Numeric entries come first within each row, in column order.
+    num_first = np.cumsum(num_counts) - num_counts
+    num_pos = indptr[num_rows] + (np.arange(len(num_rows)) - num_first[num_rows])
+    indices[num_pos] = num_cols
+    data[num_pos] = numeric[num_rows, num_cols]
+
+    # TF-IDF entries follow, shifted past the numeric columns.
+    tf_rows = np.repeat(np.arange(n_rows), tf_counts)
+    tf_pos = indptr[tf_rows] + num_counts[tf_rows] + (np.arange(tfidf.nnz) - tfidf.indptr[tf_rows])
+    indices[tf_pos] = tfidf.indices + n_numeric
+    data[tf_pos] = tfidf.data
+
+    return csr_matrix((data, indices, indptr), shape=(n_rows, n_numeric + tfidf.shape[1]))
@@ -1,61 +1,201 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import pandas as pd
+
+import core.frames as frames
 import core.ml as ml
 import core.rules as rules
 import core.score as score
 import core.explain as explain
+import core.known_urls as known_urls
+from core.timing import PIPELINE_TIMER
+from core.url import parse_urls
 
 
 def _safe_url(url: str) -> str:
     return (url or "").strip()
 
 
-def analyze_urls(urls: List[str]) -> List[Dict[str, Any]]:
+def _known_ml_output(url: str, verdict: str) -> Dict[str, Any]:
+    label, prob = known_urls.KNOWN_VERDICTS[verdict]
+    return {"url": url, "label": label, "malicious_probability": prob, "model_version": None}
+
+
+# Keys of an analyze_urls result dict, in order
+RESULT_KEYS = (
+    "url",
+    "ml_label",
+    "ml_probability",
+    "rules_triggered",
+    "risk_score",
+    "risk_level",
+    "why_summary",
+    "model_version",
+    "known_list",
+    "occurrences",
+)
+# Everything but why_summary, which is built from the others on demand (see explain.generate_why_summary)
+_COLUMN_KEYS = tuple(key for key in RESULT_KEYS if key != "why_summary")
+
+
+def dedupe_urls(urls: Iterable[str]) -> Tuple[List[str], List[int], List[int]]:
     """
-    End-to-end inference: ML + rules + risk + explanation.
-    Returns one result dict per URL.
+    (distinct cleaned URLs in first-seen order, index into them per position,
+    occurrences of each): what analyze_urls analyzes and how it fans out.
     """
-    results: List[Dict[str, Any]] = []
-    cleaned_urls = [_safe_url(u) for u in urls]
+    first: Dict[str, int] = {}
+    inverse = [first.setdefault(_safe_url(url), len(first)) for url in urls]
+    occurrences = [0] * len(first)
+    for i in inverse:
+        occurrences[i] += 1
+    return list(first), inverse, occurrences
 
+
+def _analyze_columns(urls: List[str]) -> Tuple[Dict[str, List[Any]], List[int]]:
+    """
+    Results of the distinct cleaned URLs of urls, one list per _COLUMN_KEYS key,
+    and the index of each input position's URL among them.
+    """
+    columns: Dict[str, List[Any]] = {key: [] for key in _COLUMN_KEYS}
+    # Each distinct URL is analyzed once; callers fan the results out to its positions
+    cleaned_urls, inverse, occurrences = dedupe_urls(urls)
+    columns["occurrences"] = occurrences
+    parsed_urls = parse_urls(cleaned_urls)
+    # Plain functions unless PIPELINE_TIMER is enabled (see core.timing)
+    timed = PIPELINE_TIMER.enabled
+    apply_rules_url = PIPELINE_TIMER.timed("rules", rules.apply_rules_url)
+
+    start = time.perf_counter() if timed else 0.0
+    # URLs on the known-good/known-bad lists skip ML scoring
+    known = known_urls.get_known_url_filters().classify(cleaned_urls, occurrences)
+    if timed:
+        PIPELINE_TIMER.record("known_urls", time.perf_counter() - start, len(cleaned_urls))
+
+    ml_start = time.perf_counter() if timed else 0.0
+    to_score = [parsed for parsed, verdict in zip(parsed_urls, known) if verdict is None]
     try:
-        ml_outputs = ml.predict_urls(cleaned_urls)
+        scored = ml.predict_urls(to_score) if to_score else []
     except Exception:
         # Graceful degradation
-        ml_outputs = [{"url": u, "label": "benign", "malicious_probability": 0.05} for u in cleaned_urls]
+        scored = [{"url": p.raw, "label": "benign", "malicious_probability": 0.05} for p in to_score]
+    if timed:
+        PIPELINE_TIMER.record("ml", time.perf_counter() - ml_start, len(to_score))
+    scored_iter = iter(scored)
+    ml_outputs = [
+        next(scored_iter) if verdict is None else _known_ml_output(url, verdict) for url, verdict in zip(cleaned_urls, known)
+    ]
 
-    for url, ml_out in zip(cleaned_urls, ml_outputs):
+    # Large batches evaluate each rule across all URLs at once; if that fails,
+    # the per-URL path below confines the failure to the offending URL
+    batch_rules: Optional[List[Dict[str, Any]]] = None
+    if len(cleaned_urls) >= rules.BATCH_RULES_MIN_URLS:
+        rules_start = time.perf_counter() if timed else 0.0
         try:
-            rule_out = rules.apply_rules_url(url)
+            batch_rules = rules.apply_rules_batch(cleaned_urls).results
         except Exception:
-            rule_out = {"rules_triggered": [], "explanations": []}
+            batch_rules = None
+        if timed:
+            PIPELINE_TIMER.record("rules_batch", time.perf_counter() - rules_start, len(cleaned_urls))
+
+    for n, (url, parsed, ml_out, known_list) in enumerate(zip(cleaned_urls, parsed_urls, ml_outputs, known)):
+        if batch_rules is not None:
+            rule_out = batch_rules[n]
+        else:
+            try:
+                rule_out = apply_rules_url(parsed)
+            except Exception:
+                rule_out = {"rules_triggered": [], "explanations": []}
 
         rules_triggered = rule_out.get("rules_triggered") or []
         ml_label = ml_out.get("label", "benign")
         ml_prob = float(ml_out.get("malicious_probability", 0.0))
+        model_version = ml_out.get("model_version")
 
-        risk = score.compute_risk(ml_prob, rules_triggered)
-        why = explain.generate_why_summary(
-            url=url,
-            ml_label=ml_label,
-            ml_probability=ml_prob,
-            rules_triggered=rules_triggered,
-            risk_score=risk["risk_score"],
-            risk_level=risk["risk_level"],
-        )
+        columns["url"].append(url)
+        columns["ml_label"].append(ml_label)
+        columns["ml_probability"].append(ml_prob)
+        columns["rules_triggered"].append(rules_triggered)
+        columns["model_version"].append(model_version)
+        columns["known_list"].append(known_list)
+
+    # Risk for the whole batch in one vectorised pass over a rule-hit matrix
+    risk_start = time.perf_counter() if timed else 0.0
+    rule_hits, rule_names = score.rule_hit_matrix(columns["rules_triggered"])
+    risk_scores, risk_levels = score.compute_risk_arrays(columns["ml_probability"], rule_hits, rule_names)
+    columns["risk_score"] = risk_scores.tolist()
+    columns["risk_level"] = [score.RISK_LEVELS[level] for level in risk_levels.tolist()]
+    if timed:
+        PIPELINE_TIMER.record("risk", time.perf_counter() - risk_start, len(cleaned_urls))
+
+    if timed:
+        PIPELINE_TIMER.record("analyze_urls", time.perf_counter() - start, len(inverse))
+    return columns, inverse
 
-        results.append(
-            {
-                "url": url,
-                "ml_label": ml_label,
-                "ml_probability": ml_prob,
-                "rules_triggered": rules_triggered,
-                "risk_score": risk["risk_score"],
-                "risk_level": risk["risk_level"],
-                "why_summary": why,
-            }
-        )
 
+def analyze_urls(urls: List[str]) -> List[Dict[str, Any]]:
+    """
+    End-to-end inference: ML + rules + risk + explanation.
+    Returns one result dict per URL; "occurrences" counts the URL's positions in urls.
+    Repeated URLs are analyzed once.
+    """
+    columns, inverse = _analyze_columns(urls)
+    generate_why_summary = PIPELINE_TIMER.timed("explain", explain.generate_why_summary)
+    unique_rows = []
+    for values in zip(*columns.values()):
+        row = dict(zip(_COLUMN_KEYS, values))
+        row["why_summary"] = generate_why_summary(
+            url=row["url"],
+            ml_label=row["ml_label"],
+            ml_probability=row["ml_probability"],
+            rules_triggered=row["rules_triggered"],
+            risk_score=row["risk_score"],
+            risk_level=row["risk_level"],
+            known_list=row["known_list"],
+        )
+        unique_rows.append({key: row[key] for key in RESULT_KEYS})
+    results = []
+    for i in inverse:
+        row = dict(unique_rows[i])
+        row["rules_triggered"] = list(row["rules_triggered"])  # positions never share a mutable list
+        results.append(row)
     return results
+
+
+def analyze_urls_frame(urls: List[str], unique: bool = False) -> pd.DataFrame:
+    """
+    analyze_urls as one columnar DataFrame (see core.frames for the dtypes);
+    rules_triggered is stored as the rules_mask bit mask, and there is no
+    why_summary column: core.frames.why_summaries builds the text for the rows
+    that are shown or exported. With unique, one row per distinct URL in
+    first-seen order instead of one per input position.
+    """
+    columns, inverse = _analyze_columns(urls)
+    frame = frames.results_frame(columns)
+    if unique:
+        return frame
+    return frame.take(inverse).reset_index(drop=True)
+
+
+def analyze_urls_chunks(
+    urls: Iterable[str], chunk_size: int = ml.DEFAULT_CHUNK_SIZE, as_frame: bool = False
+) -> Iterator[Union[List[Dict[str, Any]], pd.DataFrame]]:
+    """
+    Chunked analyze_urls: consumes any iterable and yields the results of each
+    run of up to chunk_size consecutive URLs as one list (one frame with
+    as_frame, see analyze_urls_frame), in input order.
+    """
+    analyze = analyze_urls_frame if as_frame else analyze_urls
+    for chunk in ml.iter_chunks(urls, chunk_size):
+        yield analyze(chunk)
+
+
+def analyze_urls_iter(urls: Iterable[str], chunk_size: int = ml.DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming analyze_urls: consumes any iterable and yields results in input
+    order, holding at most chunk_size URLs and their results at a time.
+    """
+    for rows in analyze_urls_chunks(urls, chunk_size):
+        yield from rows
@@ -0,0 +1,299 @@
+"""
+Load-time backtracking checks for rule regexes.
+
+Python's re backtracks, so some patterns take super-linear time on crafted
+input. backtracking_risk() reads the parse tree and reports the shapes that
+do, for search() semantics:
+
+    nested unbounded repeats          (a+)+, (\\w*x)*        exponential
+    unbounded repeat over overlapping (a|ab)*, (\\w|\\d)+      exponential
+      alternatives
+    adjacent overlapping repeats      \\w+\\d+x, .*.*x         polynomial
+    unanchored repeat that the        ;.*x, \\w+=             quadratic: each start
+      preceding part can restart                              position rescans the input
+
+The check is conservative (it may flag a harmless pattern, never the
+reverse for these shapes). make_linear() returns a pattern unchanged when it
+is clean, rewrites the common quadratic shape P.*S (P of near-fixed width)
+into an equivalent linear form, and raises ValueError otherwise.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+_ATOMIC = getattr(sre_constants, "ATOMIC_GROUP", None)
+_LOOKAROUND = {sre_constants.ASSERT, sre_constants.ASSERT_NOT}
+
+# Characters used to compare character sets: all of ASCII plus a few classes of non-ASCII
+_PROBE = tuple(chr(c) for c in range(128)) + ("é", " ", "٠", "ſ", "K", "中", " ")
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+class _Info(NamedTuple):
+    first: FrozenSet[str]  # characters a match can start with
+    chars: FrozenSet[str]  # characters a match can contain
+    nullable: bool
+    unbounded: bool  # contains an unbounded repeat
+
+
+def _same(ch: str, c: int, ignorecase: bool) -> bool:
+    return ch == chr(c) or (ignorecase and re.fullmatch(re.escape(chr(c)), ch, re.IGNORECASE) is not None)
+
+
+def _class_chars(items, flags: int) -> FrozenSet[str]:
+    ignorecase = bool(flags & re.IGNORECASE)
+    negate = False
+    out = set()
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            out.update(ch for ch in _PROBE if _same(ch, av, ignorecase))
+        elif op is sre_constants.RANGE:
+            lo, hi = av
+            out.update(ch for ch in _PROBE if lo <= ord(ch) <= hi or (ignorecase and lo <= ord(ch.lower()) <= hi))
+        elif op is sre_constants.CATEGORY:
+            pattern = re.compile(_CATEGORIES.get(av, r"[\s\S]"))
+            out.update(ch for ch in _PROBE if pattern.fullmatch(ch))
+        else:  # unknown item: assume anything
+            out.update(_PROBE)
+    return frozenset(_PROBE) - out if negate else frozenset(out)
+
+
+def _atom_chars(op, av, flags: int) -> Optional[FrozenSet[str]]:
+    if op is sre_constants.LITERAL:
+        return _class_chars([(op, av)], flags)
+    if op is sre_constants.NOT_LITERAL:
+        return frozenset(_PROBE) - _class_chars([(sre_constants.LITERAL, av)], flags)
+    if op is sre_constants.ANY:
+        return frozenset(_PROBE) if flags & re.DOTALL else frozenset(_PROBE) - {"\n"}
+    if op is sre_constants.IN:
+        return _class_chars(av, flags)
+    return None
+
+
+def _seq_info(items, flags: int) -> _Info:
+    first: set = set()
+    chars: set = set()
+    nullable = True
+    unbounded = False
+    for op, av in items:
+        info = _node_info(op, av, flags)
+        if nullable:
+            first |= info.first
+        chars |= info.chars
+        nullable = nullable and info.nullable
+        unbounded = unbounded or info.unbounded
+    return _Info(frozenset(first), frozenset(chars), nullable, unbounded)
+
+
+def _node_info(op, av, flags: int) -> _Info:
+    atom = _atom_chars(op, av, flags)
+    if atom is not None:
+        return _Info(atom, atom, False, False)
+    if op is sre_constants.SUBPATTERN:
+        return _seq_info(av[-1].data, flags)
+    if op is sre_constants.BRANCH:
+        infos = [_seq_info(branch.data, flags) for branch in av[1]]
+        return _Info(
+            frozenset().union(*(i.first for i in infos)),
+            frozenset().union(*(i.chars for i in infos)),
+            any(i.nullable for i in infos),
+            any(i.unbounded for i in infos),
+        )
+    if op in _REPEATS:
+        lo, hi, body = av
+        info = _seq_info(body.data, flags)
+        return _Info(info.first, info.chars, lo == 0 or info.nullable, info.unbounded or hi == sre_constants.MAXREPEAT)
+    if op is _ATOMIC:
+        return _seq_info(av.data, flags)
+    if op is sre_constants.AT or op in _LOOKAROUND:
+        return _Info(frozenset(), frozenset(), True, False)
+    # Backreferences, conditionals and anything newer: assume the worst
+    return _Info(frozenset(_PROBE), frozenset(_PROBE), True, True)
+
+
+def _alternatives(body) -> List:
+    """The BRANCH alternatives a repeat body consists of, if it is a single (grouped) alternation."""
+    items = body.data
+    while len(items) == 1 and items[0][0] is sre_constants.SUBPATTERN:
+        items = items[0][1][-1].data
+    if len(items) == 1 and items[0][0] is sre_constants.BRANCH:
+        return list(items[0][1][1])
+    return []
+
+
+_STARTS = {sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING}
+
+
+def _is_anchor(op, av) -> bool:
+    """^, \\A, or an alternation of those and one-character lookbehinds like (?<=\\n)."""
+    if op is sre_constants.AT:
+        return av in _STARTS
+    if op is sre_constants.BRANCH:
+        return all(len(b.data) == 1 and _is_anchor(*b.data[0]) for b in av[1])
+    if op is sre_constants.ASSERT:
+        direction, body = av
+        return direction == -1 and len(body.data) == 1 and _atom_chars(*body.data[0], 0) is not None
+    return False
+
+
+def _walk(items, flags: int, prev: Optional[FrozenSet[str]], anchored: bool, tail: bool, problems: List[str]) -> None:
+    """
+    Check one sequence. prev: characters the preceding part can match (None at
+    the start of the pattern); anchored: the pattern starts with an anchor;
+    tail: something non-optional follows this sequence.
+    """
+    infos = [_node_info(op, av, flags) for op, av in items]
+    prev_repeat: Optional[FrozenSet[str]] = None  # chars of an unbounded repeat just before
+    for k, (op, av) in enumerate(items):
+        info = infos[k]
+        rest_required = tail or any(not i.nullable for i in infos[k + 1 :])
+        if k == 0 and prev is None and _is_anchor(op, av):
+            anchored = True
+            continue
+        if op in _REPEATS:
+            lo, hi, body = av
+            body_info = _seq_info(body.data, flags)
+            if hi == sre_constants.MAXREPEAT and op is not getattr(sre_constants, "POSSESSIVE_REPEAT", None):
+                if body_info.unbounded:
+                    problems.append("nested unbounded repeats")
+                branches = [_seq_info(b.data, flags).first for b in _alternatives(body)]
+                if any(a & b for n, a in enumerate(branches) for b in branches[n + 1 :]):
+                    problems.append("unbounded repeat over overlapping alternatives")
+                if rest_required:
+                    if prev_repeat is not None and prev_repeat & body_info.chars:
+                        problems.append("adjacent overlapping unbounded repeats")
+                    elif not anchored and (prev is None or prev & body_info.chars):
+                        problems.append("unanchored unbounded repeat restarted at every position (quadratic)")
+            _walk(body.data, flags, (prev or frozenset()) | body_info.chars, anchored, True, problems)
+            prev_repeat = body_info.chars if hi == sre_constants.MAXREPEAT else None
+        elif op is sre_constants.SUBPATTERN:
+            _walk(av[-1].data, flags, prev, anchored, rest_required, problems)
+            prev_repeat = None
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _walk(branch.data, flags, prev, anchored, rest_required, problems)
+            prev_repeat = None
+        elif op is _ATOMIC:
+            # Never backtracked into from outside, so it restarts nothing after it
+            _walk(av.data, flags, prev, anchored, False, problems)
+            prev_repeat = None
+        else:
+            prev_repeat = None
+        if op is not sre_constants.AT:
+            prev = info.chars if not info.nullable else (prev or frozenset()) | info.chars
+
+
+def backtracking_risk(regex: str, flags: int = re.IGNORECASE) -> Optional[str]:
+    """Why regex can backtrack super-linearly under search(), or None when it looks linear."""
+    parsed = sre_parse.parse(regex, flags)
+    problems: List[str] = []
+    _walk(parsed.data, flags | parsed.state.flags, None, False, False, problems)
+    return problems[0] if problems else None
+
+
+def _split_dotstar(regex: str) -> Optional[Tuple[str, str]]:
+    """(P, S) when regex is P.*S with exactly one top-level .* and no top-level |."""
+    depth = 0
+    in_class = False
+    cuts = []
+    i = 0
+    while i < len(regex):
+        ch = regex[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+            if regex[i + 1 : i + 2] == "]":
+                i += 1
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif depth == 0 and ch == "|":
+            return None
+        elif depth == 0 and regex.startswith(".*", i) and regex[i + 2 : i + 3] not in ("?", "+"):
+            cuts.append(i)
+        i += 1
+    if len(cuts) != 1:
+        return None
+    return regex[: cuts[0]], regex[cuts[0] + 2 :]
+
+
+def _literal_alternatives(regex: str, flags: int) -> Optional[List[str]]:
+    """The strings regex is an alternation of, or None if it is anything else."""
+    items = sre_parse.parse(regex, flags).data
+    while len(items) == 1 and items[0][0] is sre_constants.SUBPATTERN:
+        items = items[0][1][-1].data
+    branches = items[0][1][1] if len(items) == 1 and items[0][0] is sre_constants.BRANCH else [items]
+    words = []
+    for branch in branches:
+        data = branch.data if hasattr(branch, "data") else branch
+        if not all(op is sre_constants.LITERAL for op, _ in data):
+            return None
+        words.append("".join(chr(av) for _, av in data).lower())
+    return words
+
+
+def _earliest_is_enough(prefix: str, flags: int) -> bool:
+    """
+    Whether, of all P matches on a line, the one found first (earliest start,
+    first alternative) also ends first: true when P has a fixed width, or is a
+    set of literals one character apart in length with none a prefix of another
+    (then at most one can match at any position).
+    """
+    lo, hi = sre_parse.parse(prefix, flags).getwidth()
+    if lo < 1:
+        return False
+    if lo == hi:
+        return True
+    words = _literal_alternatives(prefix, flags) if hi - lo == 1 else None
+    return bool(words) and not any(a != b and b.startswith(a) for a in words for b in words)
+
+
+def make_linear(regex: str, flags: int = re.IGNORECASE) -> str:
+    """
+    regex itself when backtracking_risk() finds nothing; otherwise an
+    equivalent (for search() truthiness) linear rewrite of the P.*S shape.
+    Raises ValueError when neither applies.
+
+    P.*S matches iff some P match is followed, on the same line, by an S match.
+    When the first P match found on a line also ends first (_earliest_is_enough),
+    trying only that one per line is enough:
+        (?:\\A|(?<=\\n))(?>[^\\n]*?(?:P))[^\\n]*(?:S)
+    The atomic group stops the search from retrying later P matches.
+    """
+    risk = backtracking_risk(regex, flags)
+    if risk is None:
+        return regex
+    split = _split_dotstar(regex)
+    global_flags = re.match(r"\(\?[aiLmsux]+\)", regex)
+    if split is not None and split[0] and not global_flags and not flags & (re.DOTALL | re.VERBOSE | re.MULTILINE):
+        prefix, suffix = split
+        if backtracking_risk(prefix, flags) is None and _earliest_is_enough(prefix, flags):
+            rewritten = rf"(?:\A|(?<=\n))(?>[^\n]*?(?:{prefix}))[^\n]*(?:{suffix})"
+            if backtracking_risk(rewritten, flags) is None:
+                return rewritten
+    raise ValueError(f"pattern can backtrack super-linearly ({risk})")
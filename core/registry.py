@@ -0,0 +1,237 @@
+"""
+Versioned model registry.
+
+Layout:
+    models/registry/manifest.json
+    models/registry/<version>/url_model.pkl
+    models/registry/<version>/vectorizer.pkl
+    models/registry/<version>/forest/     (tree ensembles only, see core.forest)
+
+Versions are immutable once published, so their artifacts are loaded with
+memory mapping: array data (linear coefficients, idf tables, flattened forest
+nodes) lives in the page cache and is shared by every process on the host.
+
+The manifest records every published version and which one is active per
+feature mode. It is only ever replaced atomically, so readers see either the
+old or the new manifest, never a partial one.
+
+Retention: publish prunes each feature mode down to its KEEP_VERSIONS newest
+versions, always keeping the active one. Pruned versions leave the manifest
+first and their directories are deleted after; a process still mapping their
+files keeps its pages until it swaps (unlinked files stay readable on POSIX).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+from core.forest import FlatForest, export_forest, is_forest
+
+REGISTRY_DIR = Path("models/registry")
+MANIFEST_NAME = "manifest.json"
+MODEL_FILE = "url_model.pkl"
+VECTORIZER_FILE = "vectorizer.pkl"
+FOREST_DIR = "forest"
+IDF_FILE = "idf.npy"
+KEEP_VERSIONS = 5
+
+
+def _empty_manifest() -> Dict[str, Any]:
+    return {"active": {}, "versions": {}}
+
+
+def read_manifest(registry_dir: Path = REGISTRY_DIR) -> Dict[str, Any]:
+    path = Path(registry_dir) / MANIFEST_NAME
+    if not path.exists():
+        return _empty_manifest()
+    with path.open("r", encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    manifest.setdefault("active", {})
+    manifest.setdefault("versions", {})
+    return manifest
+
+
+def _write_manifest(manifest: Dict[str, Any], registry_dir: Path) -> None:
+    path = Path(registry_dir) / MANIFEST_NAME
+    tmp = path.with_suffix(".json.tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _new_version(registry_dir: Path) -> str:
+    base = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    version, n = base, 1
+    while (registry_dir / version).exists():
+        n += 1
+        version = f"{base}-{n}"
+    return version
+
+
+def publish(
+    model,
+    vectorizer,
+    feature_mode: str = "tfidf",
+    metrics: Optional[Dict[str, Any]] = None,
+    registry_dir: Path = REGISTRY_DIR,
+    activate: bool = True,
+    keep: Optional[int] = KEEP_VERSIONS,
+) -> str:
+    """
+    Write model + vectorizer as a new immutable version and record it in the manifest.
+    Artifacts are fully written before the manifest points at them. Older versions
+    of the same feature mode are then pruned to `keep` (None keeps everything).
+    """
+    registry_dir = Path(registry_dir)
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    version = _new_version(registry_dir)
+    version_dir = registry_dir / version
+    version_dir.mkdir()
+    joblib.dump(model, version_dir / MODEL_FILE)
+    if hasattr(vectorizer, "save_idf") and vectorizer.idf_ is not None:
+        # Hashed vectorizers keep their idf table beside the pickle, mapped on load
+        vectorizer.save_idf(version_dir / IDF_FILE)
+    joblib.dump(vectorizer, version_dir / VECTORIZER_FILE)
+    if is_forest(model):
+        export_forest(model, version_dir / FOREST_DIR)
+
+    manifest = read_manifest(registry_dir)
+    manifest["versions"][version] = {
+        "feature_mode": feature_mode,
+        "model_type": type(model).__name__,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "metrics": metrics or {},
+    }
+    if activate:
+        manifest["active"][feature_mode] = version
+    _write_manifest(manifest, registry_dir)
+    if keep is not None:
+        prune(keep, feature_mode=feature_mode, registry_dir=registry_dir)
+    return version
+
+
+def prune(keep: int = KEEP_VERSIONS, feature_mode: Optional[str] = None, registry_dir: Path = REGISTRY_DIR) -> List[str]:
+    """
+    Drop all but the `keep` newest versions of each feature mode (or just `feature_mode`).
+    The active version of a mode is never dropped. Returns the removed versions.
+    """
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+    registry_dir = Path(registry_dir)
+    manifest = read_manifest(registry_dir)
+    active = set(manifest["active"].values())
+    by_mode: Dict[str, List[str]] = {}
+    for version, info in manifest["versions"].items():
+        by_mode.setdefault(info.get("feature_mode"), []).append(version)
+
+    removed = []
+    for mode, versions in by_mode.items():
+        if feature_mode is not None and mode != feature_mode:
+            continue
+        versions.sort(key=lambda v: (manifest["versions"][v].get("created", ""), v), reverse=True)
+        removed.extend(v for v in versions[keep:] if v not in active)
+    if not removed:
+        return []
+
+    for version in removed:
+        del manifest["versions"][version]
+    _write_manifest(manifest, registry_dir)
+    # Directories go only after the manifest stops listing them
+    for version in removed:
+        shutil.rmtree(registry_dir / version, ignore_errors=True)
+    return removed
+
+
+def activate(version: str, registry_dir: Path = REGISTRY_DIR) -> None:
+    """Point the version's feature mode at it (also used for rollbacks)."""
+    manifest = read_manifest(registry_dir)
+    if version not in manifest["versions"]:
+        raise KeyError(f"Unknown model version {version!r}")
+    manifest["active"][manifest["versions"][version]["feature_mode"]] = version
+    _write_manifest(manifest, registry_dir)
+
+
+def active_version(feature_mode: str = "tfidf", registry_dir: Path = REGISTRY_DIR) -> Optional[str]:
+    return read_manifest(registry_dir)["active"].get(feature_mode)
+
+
+def load_version(version: str, registry_dir: Path = REGISTRY_DIR, mmap: bool = True) -> Tuple[Any, Any]:
+    """
+    Load a version's (model, vectorizer). Forests come back as a FlatForest over
+    the mmapped node arrays (their pickle is never loaded); other models are
+    unpickled with their arrays mmapped.
+    """
+    version_dir = Path(registry_dir) / version
+    if not (version_dir / MODEL_FILE).exists() or not (version_dir / VECTORIZER_FILE).exists():
+        raise FileNotFoundError(f"Model version {version!r} not found in {registry_dir}")
+    mmap_mode = "r" if mmap else None
+    if (version_dir / FOREST_DIR).exists():
+        model = FlatForest.load(version_dir / FOREST_DIR, mmap=mmap)
+    else:
+        model = joblib.load(version_dir / MODEL_FILE, mmap_mode=mmap_mode)
+    return model, joblib.load(version_dir / VECTORIZER_FILE, mmap_mode=mmap_mode)
+
+
+class ManifestWatcher:
+    """
+    Daemon thread that polls the manifest mtime and calls on_change when it moves.
+    Errors raised by on_change are kept in last_error; the watcher keeps running.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[], Any],
+        registry_dir: Path = REGISTRY_DIR,
+        interval: float = 5.0,
+    ) -> None:
+        self.on_change = on_change
+        self.path = Path(registry_dir) / MANIFEST_NAME
+        self.interval = interval
+        self.last_error: Optional[BaseException] = None
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def poll(self) -> bool:
+        """Check once; returns True if a change was seen and on_change ran."""
+        mtime = self._current_mtime()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            self.on_change()
+            self.last_error = None
+        except Exception as exc:
+            self.last_error = exc
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "ManifestWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
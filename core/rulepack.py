@@ -0,0 +1,535 @@
+"""
+Declarative rule packs.
+
+Rules live in a JSON file (rules/default.json) rather than in code:
+
+    {"name": "default", "version": 1,
+     "sets": {"url": {"lowercase": true}, ...},
+     "rules": [{"id": "XSS_PATTERN", "set": "url", "attack_type": "XSS",
+                "severity": "medium", "pattern": "<script|...",
+                "explanation": "..."}, ...]}
+
+Every rule has a unique id and exactly one of:
+    pattern   a regex, searched case-insensitively; it must not backtrack
+              super-linearly (core.redos: P.*S shapes are rewritten, other
+              risky shapes are rejected) and must contain a literal every
+              match includes, or list such literals under "prefilter"
+    literals  a list of substrings, matched case-insensitively
+    host      a check on the URL host: "ipv4"; "tld" with a "tlds" list; or
+              "domain" with a "level": the host's risk level in the domain
+              reputation index (core.domains) is that level. "{tld}" in the
+              explanation is replaced by the host's TLD, "{domain}" by the
+              index entry that matched; a "domain" rule may give a separate
+              "domain_explanation" for entries that are full domains rather
+              than TLDs
+
+name (what callers report, defaults to the id) may be shared between rules.
+Rules are grouped into named sets; each set compiles its text rules into one
+MultiPatternMatcher when the pack is loaded, so evaluation never compiles.
+lowercase=false makes a set's regexes see the original text instead of the
+lowercased one. budget_chars (default DEFAULT_BUDGET_CHARS, null for none)
+caps the characters a set's regexes scan on one text, each run costing the
+text's length: regexes that do not fit are skipped and the text gets the
+RULE_TIMEOUT hit instead. Pattern vetting is what keeps each run linear; the
+budget bounds how many runs a long text gets, the same way on every machine.
+
+The active pack is swapped atomically by reload_rule_pack(); a pack that fails
+validation raises and leaves the previous one in place. Each rule counts its
+hits; with profiling on (RulePack.set_profile or URL_RULE_PROFILE=1) sets also
+accumulate evaluation time per regex and host rule and for the shared literal
+scan. Counters are plain ints/floats: approximate under concurrent use.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .matcher import MultiPatternMatcher, Rule, RuleTimeout
+from .redos import make_linear
+from .domains import LEVELS, DomainMatch, get_domain_index
+from .url import _tld
+
+RULE_PACK_PATH = Path(os.environ.get("URL_RULE_PACK", "rules/default.json"))
+SEVERITIES = ("low", "medium", "high")
+HOST_CHECKS = ("ipv4", "tld", "domain")
+LITERAL_SCAN = "(literal scan)"
+# Tens of milliseconds of linear regex scanning (python -m benchmarks.adversarial)
+DEFAULT_BUDGET_CHARS = 1_000_000
+
+
+class PackRule(NamedTuple):
+    id: str
+    set: str
+    name: str
+    attack_type: str
+    severity: str
+    explanation: str
+    pattern: Optional[str] = None
+    literals: Tuple[str, ...] = ()
+    host: Optional[str] = None
+    tlds: frozenset = frozenset()
+    prefilter: Tuple[str, ...] = ()
+    level: Optional[str] = None  # host "domain": reputation level that fires the rule
+    domain_explanation: Optional[str] = None  # host "domain": explanation when a full domain (not a TLD) matched
+
+
+# Reported in place of the rules a text ran out of budget for
+RULE_TIMEOUT = PackRule(
+    id="RULE_TIMEOUT",
+    set="",
+    name="RULE_TIMEOUT",
+    attack_type="Suspicious",
+    severity="medium",
+    explanation="Rule evaluation exceeded its time budget; the remaining rules were skipped.",
+)
+
+
+def _is_ipv4(host: str) -> bool:
+    if not host:
+        return False
+    host = host.split(":")[0]  # strip port
+    parts = host.split(".")
+    if len(parts) != 4:
+        return False
+    try:
+        return all(0 <= int(p) <= 255 for p in parts)
+    except ValueError:
+        return False
+
+
+def _domain_match(host: str) -> Optional[DomainMatch]:
+    host = host.split(":")[0]  # strip port
+    if "." not in host:
+        return None  # a bare label ("tk", "localhost") has no TLD, as in _tld
+    return get_domain_index().lookup(host)
+
+
+def _explain(rule: PackRule, tld: str, match: Optional[DomainMatch]) -> str:
+    """A host rule's explanation with {tld} and {domain} filled in."""
+    explanation = rule.explanation
+    if match is not None and "." in match.entry and rule.domain_explanation is not None:
+        explanation = rule.domain_explanation
+    explanation = explanation.replace("{tld}", tld)
+    return explanation.replace("{domain}", match.entry) if match is not None else explanation
+
+
+def _row_codes(matrix: np.ndarray) -> np.ndarray:
+    """Small integer per row, equal for equal rows of a boolean matrix."""
+    if matrix.shape[1] <= 62:
+        return pd.factorize(matrix.astype(np.int64) @ (1 << np.arange(matrix.shape[1], dtype=np.int64)))[0]
+    return np.unique(np.packbits(matrix, axis=1), axis=0, return_inverse=True)[1].reshape(-1)
+
+
+class RuleSet:
+    """The compiled rules of one set; evaluate() returns (rule, explanation) hits in pack order."""
+
+    def __init__(
+        self, name: str, rules: List[PackRule], lowercase: bool = True, budget_chars: Optional[int] = DEFAULT_BUDGET_CHARS
+    ) -> None:
+        self.name = name
+        self.rules = rules
+        self.lowercase = lowercase
+        self.budget_chars = budget_chars
+        self.by_name: Dict[str, PackRule] = {}
+        for rule in rules:
+            self.by_name.setdefault(rule.name, rule)
+        self._text = [i for i, r in enumerate(rules) if r.host is None]  # matcher index -> rule index
+        self._host = [i for i, r in enumerate(rules) if r.host is not None]
+        # Host rules resolved up front: the IPv4 hits, and the hits for each listed TLD
+        self._ipv4 = [(i, r.explanation) for i, r in enumerate(rules) if r.host == "ipv4"]
+        self._tld_hits: Dict[str, List[Tuple[int, str]]] = {}
+        for i, r in enumerate(rules):
+            for tld in sorted(r.tlds):
+                self._tld_hits.setdefault(tld, []).append((i, r.explanation.replace("{tld}", tld)))
+        self._domain = [i for i, r in enumerate(rules) if r.host == "domain"]
+        self.matcher = MultiPatternMatcher(
+            [
+                Rule(r.id, r.explanation, regex=r.pattern, literals=r.literals, prefilter=r.prefilter)
+                for r in (rules[i] for i in self._text)
+            ],
+            lowercase=lowercase,
+            require_prefilter=True,
+            budget=budget_chars,
+        )
+        self.profile = False
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.hits = [0] * len(self.rules)
+        self.host_runs = [0] * len(self.rules)
+        self.host_seconds = [0.0] * len(self.rules)
+        self.matcher.reset_counters()
+
+    def set_profile(self, enabled: bool) -> None:
+        self.profile = enabled
+        self.matcher.profile = enabled
+
+    def evaluate(self, text: str, host: str = "", lowered: Optional[str] = None) -> List[Tuple[PackRule, str]]:
+        """lowered, when given, must be text.lower() (see MultiPatternMatcher.scan)."""
+        try:
+            scanned = self.matcher.scan(text, lowered)
+        except RuleTimeout as exc:
+            scanned, timed_out = exc.hits, True
+        else:
+            timed_out = False
+        if self.profile:
+            fired = self._fired_profiled(scanned, host)
+        else:
+            rules, text_ids = self.rules, self._text
+            fired = [(text_ids[i], rules[text_ids[i]].explanation) for i in scanned]
+            if self._host:
+                extra = list(self._ipv4) if self._ipv4 and _is_ipv4(host) else []
+                extra += self._tld_hits.get(_tld(host), ()) if self._tld_hits else ()
+                if self._domain:
+                    match = _domain_match(host)
+                    if match is not None:
+                        extra += [
+                            (i, _explain(rules[i], _tld(host), match)) for i in self._domain if rules[i].level == match.level
+                        ]
+                if extra:
+                    fired += extra
+                    fired.sort()
+        rules, hits, out = self.rules, self.hits, []
+        for i, explanation in fired:
+            hits[i] += 1
+            out.append((rules[i], explanation))
+        if timed_out:
+            out.append((RULE_TIMEOUT, RULE_TIMEOUT.explanation))
+        return out
+
+    def evaluate_batch(
+        self, texts: Sequence[str], hosts: Optional[Sequence[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray, List[Tuple[Tuple[PackRule, str], ...]]]:
+        """
+        evaluate() over many texts: (boolean texts x rules hit matrix, boolean
+        timed-out mask, per-text hits). Text rules go through
+        MultiPatternMatcher.scan_batch; host rules run once per distinct host.
+        Texts with the same hits share one (immutable) tuple.
+        """
+        n = len(texts)
+        matrix = np.zeros((n, len(self.rules)), dtype=bool)
+        timed_out = np.zeros(n, dtype=bool)
+        if not n:
+            return matrix, timed_out, []
+        if self._text:
+            matrix[:, self._text], timed_out = self.matcher.scan_batch(texts)
+
+        host_codes = np.zeros(n, dtype=np.intp)
+        tlds = [""]
+        if self._host:
+            clock = time.perf_counter
+            host_codes, unique_hosts = pd.factorize(np.asarray(hosts if hosts is not None else [""] * n, dtype=object))
+            tlds = [_tld(host) for host in unique_hosts]
+            if self._domain:
+                matches = [_domain_match(host) for host in unique_hosts]
+            for i in self._host:
+                start = clock()
+                rule = self.rules[i]
+                if rule.host == "ipv4":
+                    column = np.fromiter((_is_ipv4(host) for host in unique_hosts), dtype=bool, count=len(unique_hosts))
+                elif rule.host == "domain":
+                    column = np.fromiter(
+                        (m is not None and m.level == rule.level for m in matches), dtype=bool, count=len(matches)
+                    )
+                else:
+                    column = np.fromiter((tld in rule.tlds for tld in tlds), dtype=bool, count=len(tlds))
+                matrix[:, i] = column[host_codes]
+                if self.profile:
+                    self.host_seconds[i] += clock() - start
+                    self.host_runs[i] += n
+
+        hits = self.hits
+        for i, count in enumerate(matrix.sum(axis=0).tolist()):
+            hits[i] += count
+
+        # One hit tuple per distinct (row pattern, timeout, host); host explanations depend on the host
+        keys = _row_codes(np.column_stack([matrix, timed_out])) * len(tlds) + host_codes
+        fired: Dict[int, Tuple[Tuple[PackRule, str], ...]] = {}
+        rows = []
+        for r, key in enumerate(keys.tolist()):
+            row = fired.get(key)
+            if row is None:
+                tld = tlds[host_codes[r]]
+                match = matches[host_codes[r]] if self._domain else None
+                row = tuple(
+                    (rule, _explain(rule, tld, match) if rule.host in ("tld", "domain") else rule.explanation)
+                    for rule in (self.rules[i] for i in np.flatnonzero(matrix[r]).tolist())
+                )
+                if timed_out[r]:
+                    row += ((RULE_TIMEOUT, RULE_TIMEOUT.explanation),)
+                fired[key] = row
+            rows.append(row)
+        return matrix, timed_out, rows
+
+    def _fired_profiled(self, scanned: List[int], host: str) -> List[Tuple[int, str]]:
+        clock = time.perf_counter
+        fired = [(self._text[i], self.rules[self._text[i]].explanation) for i in scanned]
+        tld = _tld(host)
+        for i in self._host:
+            rule = self.rules[i]
+            start = clock()
+            match = None
+            if rule.host == "ipv4":
+                matched = _is_ipv4(host)
+            elif rule.host == "domain":
+                match = _domain_match(host)
+                matched = match is not None and match.level == rule.level
+            else:
+                matched = tld in rule.tlds
+            self.host_seconds[i] += clock() - start
+            self.host_runs[i] += 1
+            if matched:
+                fired.append((i, _explain(rule, tld, match)))
+        fired.sort()
+        return fired
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """One row per rule plus the shared literal scan; *_ms columns stay 0 until profiling is on."""
+        matcher = self.matcher
+        rows = [
+            {
+                "set": self.name,
+                "rule": LITERAL_SCAN,
+                "kind": "scan",
+                "hits": 0,
+                "runs": matcher.scans,
+                "total_ms": matcher.scan_seconds * 1000,
+            }
+        ]
+        for m, i in enumerate(self._text):
+            rule = self.rules[i]
+            rows.append(
+                {
+                    "set": self.name,
+                    "rule": rule.id,
+                    "kind": "regex" if rule.pattern is not None else "literals",
+                    "hits": self.hits[i],
+                    "runs": matcher.regex_runs[m],
+                    "total_ms": matcher.regex_seconds[m] * 1000,
+                }
+            )
+        for i in self._host:
+            rows.append(
+                {
+                    "set": self.name,
+                    "rule": self.rules[i].id,
+                    "kind": f"host:{self.rules[i].host}",
+                    "hits": self.hits[i],
+                    "runs": self.host_runs[i],
+                    "total_ms": self.host_seconds[i] * 1000,
+                }
+            )
+        rows.append(
+            {
+                "set": self.name,
+                "rule": RULE_TIMEOUT.id,
+                "kind": "budget",
+                "hits": matcher.timeouts,
+                "runs": 0,
+                "total_ms": 0.0,
+            }
+        )
+        for row in rows:
+            row["mean_us"] = row["total_ms"] * 1000 / row["runs"] if row["runs"] else 0.0
+        return rows
+
+
+class RulePack:
+    def __init__(self, name: str, version: Any, path: Optional[Path], sets: Dict[str, RuleSet]) -> None:
+        self.name = name
+        self.version = version
+        self.path = path
+        self.sets = sets
+        self.loaded_at = time.time()
+
+    def rule_set(self, name: str) -> RuleSet:
+        try:
+            return self.sets[name]
+        except KeyError:
+            raise ValueError(f"Rule pack {self.name!r} has no rule set {name!r}") from None
+
+    def set_profile(self, enabled: bool) -> None:
+        for rule_set in self.sets.values():
+            rule_set.set_profile(enabled)
+
+    @property
+    def profile(self) -> bool:
+        return any(rule_set.profile for rule_set in self.sets.values())
+
+    def reset_counters(self) -> None:
+        for rule_set in self.sets.values():
+            rule_set.reset_counters()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [row for rule_set in self.sets.values() for row in rule_set.stats()]
+
+
+def _parse_rule(raw: Any, seen: Dict[str, PackRule]) -> PackRule:
+    if not isinstance(raw, dict):
+        raise ValueError(f"Rule entries must be objects, got {raw!r}")
+    rule_id = raw.get("id")
+    if not isinstance(rule_id, str) or not rule_id:
+        raise ValueError(f"Rule without a valid id: {raw!r}")
+    if rule_id in seen:
+        raise ValueError(f"Duplicate rule id {rule_id!r}")
+
+    def fail(message: str) -> ValueError:
+        return ValueError(f"Rule {rule_id!r}: {message}")
+
+    kinds = [key for key in ("pattern", "literals", "host") if raw.get(key) is not None]
+    if len(kinds) != 1:
+        raise fail("needs exactly one of pattern, literals or host")
+    severity = raw.get("severity", "medium")
+    if severity not in SEVERITIES:
+        raise fail(f"severity must be one of {SEVERITIES}, got {severity!r}")
+    explanation = raw.get("explanation", "")
+    if not isinstance(explanation, str):
+        raise fail("explanation must be a string")
+
+    if raw.get("prefilter") is not None and kinds[0] != "pattern":
+        raise fail("prefilter only applies to pattern rules")
+
+    pattern, literals, host, tlds, prefilter, level = None, (), None, frozenset(), (), None
+    domain_explanation = raw.get("domain_explanation")
+    if domain_explanation is not None and (raw.get("host") != "domain" or not isinstance(domain_explanation, str)):
+        raise fail("domain_explanation must be a string and only applies to host 'domain' rules")
+    if kinds[0] == "pattern":
+        pattern = raw["pattern"]
+        if not isinstance(pattern, str):
+            raise fail("pattern must be a string")
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as exc:
+            raise fail(f"bad pattern: {exc}") from None
+        try:
+            pattern = make_linear(pattern)
+        except ValueError as exc:
+            raise fail(str(exc)) from None
+        prefilter = raw.get("prefilter") or ()
+        if not isinstance(prefilter, (list, tuple)) or not all(isinstance(s, str) and s for s in prefilter):
+            raise fail("prefilter must be a list of non-empty strings")
+        prefilter = tuple(prefilter)
+    elif kinds[0] == "literals":
+        literals = raw["literals"]
+        if not isinstance(literals, list) or not literals or not all(isinstance(s, str) and s for s in literals):
+            raise fail("literals must be a non-empty list of non-empty strings")
+        literals = tuple(literals)
+    else:
+        host = raw["host"]
+        if host not in HOST_CHECKS:
+            raise fail(f"host must be one of {HOST_CHECKS}, got {host!r}")
+        if host == "tld":
+            raw_tlds = raw.get("tlds")
+            if not isinstance(raw_tlds, list) or not raw_tlds or not all(isinstance(t, str) and t for t in raw_tlds):
+                raise fail("host 'tld' needs a non-empty tlds list")
+            tlds = frozenset(t.lower().lstrip(".") for t in raw_tlds)
+        elif host == "domain":
+            level = raw.get("level")
+            if level not in LEVELS:
+                raise fail(f"host 'domain' needs a level in {LEVELS}, got {level!r}")
+
+    return PackRule(
+        id=rule_id,
+        set=str(raw.get("set", "url")),
+        name=str(raw.get("name", rule_id)),
+        attack_type=str(raw.get("attack_type", "Suspicious")),
+        severity=severity,
+        explanation=explanation,
+        pattern=pattern,
+        literals=literals,
+        host=host,
+        tlds=tlds,
+        prefilter=prefilter,
+        level=level,
+        domain_explanation=domain_explanation,
+    )
+
+
+def build_rule_pack(spec: Dict[str, Any], path: Optional[Path] = None) -> RulePack:
+    """Validate a parsed pack and compile every set; raises ValueError on the first problem."""
+    if not isinstance(spec, dict) or not isinstance(spec.get("rules"), list):
+        raise ValueError("A rule pack is an object with a 'rules' list")
+    set_options = spec.get("sets") or {}
+    if not isinstance(set_options, dict):
+        raise ValueError("'sets' must map set names to options")
+
+    seen: Dict[str, PackRule] = {}
+    grouped: Dict[str, List[PackRule]] = {name: [] for name in set_options}
+    for raw in spec["rules"]:
+        rule = _parse_rule(raw, seen)
+        seen[rule.id] = rule
+        grouped.setdefault(rule.set, []).append(rule)
+
+    sets: Dict[str, RuleSet] = {}
+    for name, members in grouped.items():
+        options = set_options.get(name) or {}
+        if "budget_ms" in options:
+            raise ValueError(f"Rule set {name!r}: budget_ms was replaced by budget_chars (characters, not time)")
+        budget_chars = options.get("budget_chars", DEFAULT_BUDGET_CHARS)
+        if budget_chars is not None and (
+            not isinstance(budget_chars, int) or isinstance(budget_chars, bool) or budget_chars <= 0
+        ):
+            raise ValueError(f"Rule set {name!r}: budget_chars must be a positive integer or null")
+        try:
+            sets[name] = RuleSet(
+                name, members, lowercase=bool(options.get("lowercase", True)), budget_chars=budget_chars
+            )
+        except ValueError as exc:
+            raise ValueError(f"Rule set {name!r}: {exc}") from None
+    return RulePack(str(spec.get("name", "unnamed")), spec.get("version"), path, sets)
+
+
+def load_rule_pack(path: Path = RULE_PACK_PATH) -> RulePack:
+    path = Path(path)
+    with path.open("r", encoding="utf-8") as fh:
+        try:
+            spec = json.load(fh)
+        except ValueError as exc:
+            raise ValueError(f"{path}: not valid JSON ({exc})") from None
+    try:
+        return build_rule_pack(spec, path)
+    except ValueError as exc:
+        raise ValueError(f"{path}: {exc}") from None
+
+
+_PACK: Optional[RulePack] = None
+_PACK_LOCK = threading.Lock()
+
+
+def get_rule_pack() -> RulePack:
+    """The active pack, loaded from RULE_PACK_PATH on first use."""
+    pack = _PACK
+    if pack is None:
+        with _PACK_LOCK:
+            if _PACK is None:
+                _activate(load_rule_pack(RULE_PACK_PATH), profile=os.environ.get("URL_RULE_PROFILE") == "1")
+            pack = _PACK
+    return pack  # type: ignore[return-value]
+
+
+def reload_rule_pack(path: Optional[Path] = None) -> RulePack:
+    """
+    Load and compile a pack (default: the active pack's file) and make it active.
+    Raises without touching the active pack if the new one is invalid.
+    """
+    current = _PACK
+    source = Path(path) if path is not None else (current.path if current and current.path else RULE_PACK_PATH)
+    pack = load_rule_pack(source)
+    with _PACK_LOCK:
+        _activate(pack, profile=current.profile if current else os.environ.get("URL_RULE_PROFILE") == "1")
+    return pack
+
+
+def _activate(pack: RulePack, profile: bool) -> None:
+    global _PACK
+    pack.set_profile(profile)
+    _PACK = pack
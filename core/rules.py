@@ -1,110 +1,111 @@
 from __future__ import annotations
 
-import re
-from typing import Any, Dict, List
-from urllib.parse import urlparse
+from typing import Any, Dict, List, NamedTuple, Sequence, Union
 
-from .schema import Event, Finding
-
-SQL_PATTERN = re.compile(
-    r"('|\%27)\s*or\s*1=1|--|union\s+select|\%3d|\%27", re.IGNORECASE
-)
-XSS_PATTERN = re.compile(
-    r"<script|javascript:|onerror=|onload=|\%3cscript\%3e", re.IGNORECASE
-)
-SUSPICIOUS_KEYWORDS = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
-ABUSED_TLDS_HIGH = {"tk", "ml", "ga", "cf"}
-ABUSED_TLDS_MEDIUM = {"ru", "cn", "xyz"}
-
-
-def _is_ipv4(host: str) -> bool:
-    if not host:
-        return False
-    host = host.split(":")[0]  # strip port
-    parts = host.split(".")
-    if len(parts) != 4:
-        return False
-    try:
-        return all(0 <= int(p) <= 255 for p in parts)
-    except ValueError:
-        return False
+import numpy as np
+import pandas as pd
 
+from .rulepack import _is_ipv4, get_rule_pack  # noqa: F401  (host helpers used to live here)
+from .schema import Event, Finding
+from .url import _SCHEME_PREFIX, _URLSPLIT_STRIPPED, ParsedURL, _host, _tld  # noqa: F401  (_host/_tld lived here too)
 
-def _tld(host: str) -> str:
-    host = host.split(":")[0] if host else ""
-    if "." not in host:
-        return ""
-    return host.rsplit(".", 1)[-1].lower()
+# apply_rules_url reports the hits of this set of the active rule pack (rules/default.json)
+URL_RULE_SET = "url"
+# From this many URLs on, apply_rules_batch beats apply_rules_url per URL (fixed pandas overhead below)
+BATCH_RULES_MIN_URLS = 1_024
 
 
-def apply_rules_url(url: str) -> Dict[str, Any]:
+def _hosts(targets: List[str]) -> List[str]:
+    """
+    _host over a batch: the usual shapes with pandas string ops (regex
+    replace/match stay in Arrow, unlike extract), the unusual ones one by one.
+    """
+    column = pd.Series(targets, dtype="str")
+    has_scheme = column.str.contains("://", regex=False)
+    after_prefix = column.str.replace("^" + _SCHEME_PREFIX, "", regex=True)
+    netloc = after_prefix.where(has_scheme, column).str.replace(r"(?s)[/?#].*", "", regex=True)
+    netloc = netloc.where(column.str.match(_SCHEME_PREFIX), "").where(has_scheme, "example.local" + netloc)
+    unusual = (
+        netloc.str.contains(r"[^\x00-\x7f]", regex=True)  # not str.isascii: missing before pandas 3
+        | netloc.str.contains(r"[\[\]]", regex=True)
+        | column.str.contains(_URLSPLIT_STRIPPED.pattern, regex=True)
+    )
+    hosts = netloc.to_numpy(dtype=object).tolist()
+    for i in np.flatnonzero(unusual.to_numpy(dtype=bool)).tolist():
+        hosts[i] = _host(targets[i])
+    return hosts
+
+
+def apply_rules_url(url: Union[str, ParsedURL]) -> Dict[str, Any]:
     """
     Detect well-known malicious URL patterns and return rule hits + explanations.
     Does NOT assign a final label or score.
     """
-    rules_triggered: List[str] = []
-    explanations: List[str] = []
-
-    target = url or ""
-    parsed = urlparse(target if "://" in target else f"http://example.local{target}")
-    host = parsed.netloc
-    lower_url = target.lower()
-
-    # SQLi
-    if SQL_PATTERN.search(lower_url):
-        rules_triggered.append("SQL_INJECTION_PATTERN")
-        explanations.append("SQLi indicators found (e.g., UNION/OR=1).")
-
-    # XSS
-    if XSS_PATTERN.search(lower_url):
-        rules_triggered.append("XSS_PATTERN")
-        explanations.append("XSS indicators found (e.g., <script>, javascript:).")
-
-    # Suspicious keywords
-    if any(kw in lower_url for kw in SUSPICIOUS_KEYWORDS):
-        rules_triggered.append("SUSPICIOUS_KEYWORD")
-        explanations.append("Suspicious keywords present (login/verify/update/etc.).")
-
-    # IP-based URL
-    if _is_ipv4(host):
-        rules_triggered.append("IP_BASED_URL")
-        explanations.append("Domain is a raw IPv4 address.")
-
-    # Abused TLDs
-    tld = _tld(host)
-    if tld in ABUSED_TLDS_HIGH:
-        rules_triggered.append("ABUSED_TLD")
-        explanations.append(f"High-risk TLD detected: .{tld}")
-    elif tld in ABUSED_TLDS_MEDIUM:
-        rules_triggered.append("ABUSED_TLD")
-        explanations.append(f"Medium-risk TLD detected: .{tld}")
-
+    # Text rules share one scan of the URL; host rules (IP, TLD) see the netloc
+    rule_set = get_rule_pack().sets[URL_RULE_SET]
+    if isinstance(url, ParsedURL):
+        hits = rule_set.evaluate(url.raw, url.host, url.lower)
+    else:
+        target = url or ""
+        hits = rule_set.evaluate(target, _host(target))
+    rules_triggered: List[str] = [rule.name for rule, _ in hits]
+    explanations: List[str] = [explanation for _, explanation in hits]
     return {"rules_triggered": rules_triggered, "explanations": explanations}
 
 
+class RuleBatch(NamedTuple):
+    rule_ids: List[str]  # hit matrix columns: rule ids of the url rule set, in pack order
+    hits: np.ndarray  # bool, len(urls) x len(rule_ids)
+    results: List[Dict[str, Any]]  # apply_rules_url(url) for every url
+    timed_out: np.ndarray  # bool, len(urls): rule evaluation ran out of budget (RULE_TIMEOUT)
+
+
+def apply_rules_batch(urls: Sequence[str]) -> RuleBatch:
+    """
+    apply_rules_url over a whole batch, each rule evaluated across all URLs at
+    once (see RuleSet.evaluate_batch). Raises the ValueError apply_rules_url
+    would raise for the first URL it rejects.
+    """
+    targets = [url or "" for url in urls]
+    rule_set = get_rule_pack().sets[URL_RULE_SET]
+    try:
+        hosts = _hosts(targets)
+    except UnicodeError:  # lone surrogates cannot go to Arrow
+        hosts = [_host(target) for target in targets]
+    hits, timed_out, fired = rule_set.evaluate_batch(targets, hosts)
+    # Rows with the same hits share one tuple: format each distinct one once
+    formatted: Dict[int, Any] = {}
+    results = []
+    for row in fired:
+        names_explanations = formatted.get(id(row))
+        if names_explanations is None:
+            names_explanations = formatted[id(row)] = ([rule.name for rule, _ in row], [text for _, text in row])
+        results.append({"rules_triggered": list(names_explanations[0]), "explanations": list(names_explanations[1])})
+    return RuleBatch([rule.id for rule in rule_set.rules], hits, results, timed_out)
+
+
+def _event_url(event: Event) -> str:
+    url = (event.metadata or {}).get("clean_url") if event.metadata else None
+    return url or event.url or ""
+
+
+def _rule_results(urls: List[str]) -> List[Dict[str, Any]]:
+    if len(urls) >= BATCH_RULES_MIN_URLS:
+        try:
+            return apply_rules_batch(urls).results
+        except Exception:
+            # As in analyze_urls: the per-URL path confines a failure to the offending URL
+            pass
+    return [apply_rules_url(url) for url in urls]
+
+
 # Legacy compatibility for existing pipeline usage
 def _apply_rules_features(features: List[dict]) -> List[Finding]:
     findings: List[Finding] = []
-    severity_map = {
-        "SQL_INJECTION_PATTERN": "high",
-        "XSS_PATTERN": "medium",
-        "SUSPICIOUS_KEYWORD": "low",
-        "IP_BASED_URL": "medium",
-        "ABUSED_TLD": "low",
-    }
-    attack_map = {
-        "SQL_INJECTION_PATTERN": "SQL Injection",
-        "XSS_PATTERN": "XSS",
-        "SUSPICIOUS_KEYWORD": "Suspicious",
-        "IP_BASED_URL": "Suspicious",
-        "ABUSED_TLD": "Suspicious",
-    }
-
-    for row in features:
-        event: Event = row["event"]
-        url = (event.metadata or {}).get("clean_url") if event.metadata else None
-        url = url or event.url or ""
-        detection = apply_rules_url(url)
+    url_rules = get_rule_pack().rule_set(URL_RULE_SET).by_name
+
+    events: List[Event] = [row["event"] for row in features]
+    for event, detection in zip(events, _rule_results([_event_url(event) for event in events])):
         triggers = detection["rules_triggered"]
         if not triggers:
             continue
@@ -112,8 +113,8 @@ def _apply_rules_features(features: List[dict]) -> List[Finding]:
         for trig in triggers:
             findings.append(
                 Finding(
-                    attack_type=attack_map.get(trig, "Suspicious"),
-                    severity=severity_map.get(trig, "medium"),
+                    attack_type=url_rules[trig].attack_type if trig in url_rules else "Suspicious",
+                    severity=url_rules[trig].severity if trig in url_rules else "medium",
                     confidence=confidence,
                     event=event,
                     details={"rule": trig, "explanations": detection["explanations"]},
@@ -127,10 +128,7 @@ def rule_detect(events: List[Event]) -> List[Dict]:
     Wrapper for compatibility; returns per-event labels based on apply_rules.
     """
     results: List[Dict] = []
-    for event in events:
-        url = (event.metadata or {}).get("clean_url") if event.metadata else None
-        url = url or event.url or ""
-        detection = apply_rules_url(url)
+    for event, detection in zip(events, _rule_results([_event_url(event) for event in events])):
         label = (
             "Normal"
             if not detection["rules_triggered"]
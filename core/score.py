@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from .schema import Finding
 
 SEVERITY_WEIGHT = {"critical": 3, "high": 2, "medium": 1, "low": 0}
 
+RISK_LEVELS = ("Low", "Medium", "High")
+# Lower bound of each level above Low, in RISK_LEVELS order
+_LEVEL_THRESHOLDS = np.array([40.0, 70.0])
+_BONUS_RULES = frozenset({"SQL_INJECTION_PATTERN", "XSS_PATTERN"})
+
 
 def _weight(finding: Finding) -> int:
     return SEVERITY_WEIGHT.get(finding.severity.lower(), 0)
@@ -25,30 +32,71 @@ def _ip_risk_boost(ip: Optional[str], correlations: Optional[Dict]) -> float:
     return boost
 
 
-def rank(findings: List[Finding], ml_results: List[Dict], correlations: Optional[Dict] = None) -> List[Finding]:
+def _top_k(confidence: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest confidences, highest first, earlier position first on ties."""
+    if k < len(confidence):
+        kth = np.partition(confidence, len(confidence) - k)[len(confidence) - k]
+        above = np.flatnonzero(confidence > kth)
+        at = np.flatnonzero(confidence == kth)[: k - len(above)]
+        picked = np.concatenate([above, at])
+    else:
+        picked = np.arange(len(confidence))
+    return picked[np.lexsort((picked, -confidence[picked]))]
+
+
+def rank(
+    findings: List[Finding],
+    ml_results: List[Dict],
+    correlations: Optional[Dict] = None,
+    limit: Optional[int] = None,
+) -> List[Finding]:
     """
     Merge rule and ML findings and return them ordered by severity and confidence,
-    with boosts for multi-stage or repeated behavior per IP.
+    with boosts for multi-stage or repeated behavior per IP. With limit, only the
+    top limit findings: each severity is partially sorted, and ML findings are
+    built only for the results that make the cut.
     """
-    merged: List[Finding] = list(findings)
-
-    for result in ml_results:
-        label = result.get("label")
-        if label and label != "Normal":
-            ip = getattr(result.get("event"), "source_ip", None)
-            boost = _ip_risk_boost(ip, correlations)
-            confidence = float(result.get("score", 0.5)) + boost
-            merged.append(
+    flagged = [result for result in ml_results if result.get("label") and result.get("label") != "Normal"]
+    severities = [str(result.get("severity") or "medium") for result in flagged]
+    weights = np.array(
+        [_weight(f) for f in findings] + [SEVERITY_WEIGHT.get(severity.lower(), 0) for severity in severities],
+        dtype=np.int8,
+    )
+    confidence = np.array(
+        [f.confidence for f in findings]
+        + [
+            float(result.get("score", 0.5)) + _ip_risk_boost(getattr(result.get("event"), "source_ip", None), correlations)
+            for result in flagged
+        ],
+        dtype=np.float64,
+    )
+
+    remaining = len(weights) if limit is None else max(0, limit)
+    order: List[int] = []
+    for weight in sorted(SEVERITY_WEIGHT.values(), reverse=True):
+        if remaining == 0:
+            break
+        bucket = np.flatnonzero(weights == weight)
+        top = bucket[_top_k(confidence[bucket], remaining)]
+        order.extend(top.tolist())
+        remaining -= len(top)
+
+    ranked: List[Finding] = []
+    for i in order:
+        if i < len(findings):
+            ranked.append(findings[i])
+        else:
+            j = i - len(findings)
+            ranked.append(
                 Finding(
-                    attack_type=label,
-                    severity=str(result.get("severity") or "medium"),
-                    confidence=confidence,
-                    event=result["event"],
+                    attack_type=flagged[j]["label"],
+                    severity=severities[j],
+                    confidence=float(confidence[i]),
+                    event=flagged[j]["event"],
                     details={"source": "ml"},
                 )
             )
-
-    return sorted(merged, key=lambda f: (_weight(f), f.confidence), reverse=True)
+    return ranked
 
 
 def compute_risk(ml_prob: float, rules_triggered: List[str]) -> Dict[str, Any]:
@@ -57,7 +105,7 @@ def compute_risk(ml_prob: float, rules_triggered: List[str]) -> Dict[str, Any]:
     """
     base = float(ml_prob) * 60.0
     additions = len(rules_triggered) * 5.0
-    bonus = 15.0 if any(r in {"SQL_INJECTION_PATTERN", "XSS_PATTERN"} for r in rules_triggered) else 0.0
+    bonus = 15.0 if any(r in _BONUS_RULES for r in rules_triggered) else 0.0
     score = min(100.0, max(0.0, base + additions + bonus))
 
     if score >= 70:
@@ -70,5 +118,43 @@ def compute_risk(ml_prob: float, rules_triggered: List[str]) -> Dict[str, Any]:
     return {"risk_score": int(round(score)), "risk_level": level}
 
 
+def rule_hit_matrix(rules_list: Sequence[Sequence[str]]) -> Tuple[np.ndarray, List[str]]:
+    """
+    (count matrix, rule names): matrix[i, j] is how many times rules_list[i]
+    names rule j. Names are counted with repeats, as len() does in compute_risk;
+    rules may share a name.
+    """
+    columns: Dict[str, int] = {}
+    cells = [(row, columns.setdefault(name, len(columns))) for row, names in enumerate(rules_list) for name in names]
+    matrix = np.zeros((len(rules_list), len(columns)), dtype=np.int16)
+    if cells:
+        rows, cols = zip(*cells)
+        np.add.at(matrix, (list(rows), list(cols)), 1)
+    return matrix, list(columns)
+
+
+def compute_risk_arrays(
+    ml_probs: Sequence[float], rule_hits: np.ndarray, rule_names: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    compute_risk over a batch in one pass: ml_probs per URL and the rule_hits
+    count matrix of rule_hit_matrix (a boolean matrix also works). Returns (risk_score int array, risk level codes
+    int8 array indexing RISK_LEVELS).
+    """
+    probs = np.asarray(ml_probs, dtype=np.float64)
+    rule_hits = np.asarray(rule_hits, dtype=np.int16).reshape(len(probs), len(rule_names))
+    bonus_cols = [j for j, name in enumerate(rule_names) if name in _BONUS_RULES]
+    # Same operation order as compute_risk, so the float results match it exactly
+    score = probs * 60.0 + rule_hits.sum(axis=1) * 5.0 + np.where(rule_hits[:, bonus_cols].any(axis=1), 15.0, 0.0)
+    score = np.clip(score, 0.0, 100.0)
+    levels = np.searchsorted(_LEVEL_THRESHOLDS, score, side="right").astype(np.int8)
+    return np.rint(score).astype(np.int64), levels
+
+
 def compute_batch_risk(ml_probs: List[float], rules_list: List[List[str]]) -> List[Dict[str, Any]]:
-    return [compute_risk(p, rules) for p, rules in zip(ml_probs, rules_list)]
+    matrix, names = rule_hit_matrix(rules_list)
+    scores, levels = compute_risk_arrays(ml_probs, matrix, names)
+    return [
+        {"risk_score": risk_score, "risk_level": RISK_LEVELS[level]}
+        for risk_score, level in zip(scores.tolist(), levels.tolist())
+    ]
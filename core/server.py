@@ -0,0 +1,283 @@
+"""
+Local scoring service for inline use from reverse proxies.
+
+    python -m core.server --port 8765          # TCP
+    python -m core.server --unix /run/urlscore.sock
+
+Endpoints (HTTP/1.1, keep-alive, JSON):
+    POST /score     {"url": "..."} -> one result, {"urls": [...]} -> list of results
+    GET  /healthz   model version, batching counters
+
+Concurrent requests are coalesced by MicroBatcher into one analyze_urls call
+per batch (up to max_batch URLs, or whatever arrived within max_delay of the
+first waiting URL). Scoring runs on a single worker thread so the event loop
+keeps accepting connections while a batch is in the model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import core.ml as ml
+from core.pipeline import analyze_urls
+
+DEFAULT_PORT = 8765
+MAX_BATCH = 256
+MAX_DELAY = 0.005  # seconds the first queued URL waits for company
+MAX_URLS_PER_REQUEST = 1_000
+MAX_BODY_BYTES = 1 << 20
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class MicroBatcher:
+    """
+    Queue URLs from many callers and score them together.
+    submit() resolves with exactly the results for the caller's URLs, in order.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[List[str]], List[Dict[str, Any]]] = analyze_urls,
+        max_batch: int = MAX_BATCH,
+        max_delay: float = MAX_DELAY,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.score = score
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="url-scorer")
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.urls = 0
+
+    def start(self) -> "MicroBatcher":
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, urls: List[str]) -> List[Dict[str, Any]]:
+        if not urls:
+            return []
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((urls, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], asyncio.Future]]:
+        pending = [await self._queue.get()]
+        size = len(pending[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while size < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = await self._collect()
+            batch = [url for urls, _ in pending for url in urls]
+            try:
+                results = await loop.run_in_executor(self._executor, self.score, batch)
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.urls += len(batch)
+            offset = 0
+            for urls, future in pending:
+                if not future.done():  # caller may have disconnected
+                    future.set_result(results[offset : offset + len(urls)])
+                offset += len(urls)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "urls": self.urls,
+            "mean_batch": (self.urls / self.batches) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """(method, path, headers, body), or None when the client closed the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _parse_score_body(body: bytes) -> Tuple[List[str], bool]:
+    """(urls, single) from a /score body; single means the caller sent {"url": ...}."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Body must be JSON")
+    if isinstance(payload, dict) and isinstance(payload.get("url"), str):
+        return [payload["url"]], True
+    urls = payload.get("urls") if isinstance(payload, dict) else None
+    if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+        raise HTTPError(400, 'Expected {"url": str} or {"urls": [str, ...]}')
+    if len(urls) > MAX_URLS_PER_REQUEST:
+        raise HTTPError(413, f"At most {MAX_URLS_PER_REQUEST} URLs per request")
+    return urls, False
+
+
+class ScoringServer:
+    def __init__(self, batcher: MicroBatcher) -> None:
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/score":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            urls, single = _parse_score_body(body)
+            results = await self.batcher.submit(urls)
+            return 200, results[0] if single else results
+        if path == "/healthz":
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            return 200, {
+                "status": "ok",
+                "model_version": ml.active_model_version(),
+                "uptime_s": round(time.time() - self.started, 1),
+                "batching": self.batcher.stats(),
+            }
+        raise HTTPError(404, f"No route for {path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, payload, keep_alive = exc.status, {"error": str(exc)}, False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as exc:
+                    status, payload, keep_alive = 500, {"error": str(exc)}, False
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    unix_path: Optional[str] = None,
+    max_batch: int = MAX_BATCH,
+    max_delay: float = MAX_DELAY,
+) -> None:
+    # Load the model before accepting traffic so the first request does not pay for it
+    ml.active_model_version()
+    batcher = MicroBatcher(analyze_urls, max_batch, max_delay).start()
+    server = ScoringServer(batcher)
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path)
+        where = unix_path
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"[info] Scoring server listening on {where} (max_batch={max_batch}, max_delay={max_delay * 1000:.1f}ms)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-batching URL scoring server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-delay-ms", type=float, default=MAX_DELAY * 1000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_batch, args.max_delay_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import core.ml as ml
+from core.cache import VerdictCache
+
+URLS = [
+    "http://test.com/index.php?id=1' OR 1=1--",
+    "https://www.google.com",
+    "/search?q=<script>alert(1)</script>",
+    "http://192.168.1.10/login",
+    "http://evil.tk/admin/panel?cmd=cat%20/etc/passwd",
+    "https://docs.python.org/3/library/re.html",
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(ml, "VERDICT_CACHE", VerdictCache(100))
+    monkeypatch.setattr(ml, "CASCADE_STATS", ml.CascadeStats())
+
+
+def _probs(results):
+    return np.array([r["malicious_probability"] for r in results])
+
+
+def test_band_decides_which_stage_scores_each_url():
+    full = _probs(ml.predict_urls(URLS, use_cache=False))
+    numeric = _probs(ml.predict_urls(URLS, feature_mode=ml.NUMERIC_MODE, use_cache=False))
+
+    # Empty band: the numeric model settles everything
+    np.testing.assert_allclose(_probs(ml.predict_urls(URLS, cascade=True, band=(0.5, 0.5))), numeric)
+    # Full band: everything goes on to the full model
+    np.testing.assert_allclose(_probs(ml.predict_urls(URLS, cascade=True, band=(0.0, 1.0))), full)
+    assert ml.CASCADE_STATS.stats()["numeric"] == len(URLS)
+    assert ml.CASCADE_STATS.stats()["full"] == len(URLS)
+
+    band = (0.2, 0.8)
+    uncertain = (numeric > band[0]) & (numeric < band[1])
+    results = ml.predict_urls(URLS, cascade=True, band=band)
+    np.testing.assert_allclose(_probs(results), np.where(uncertain, full, numeric))
+    assert {r["model_version"] for r in results} == {f"{ml.UNVERSIONED}+numeric:{ml.UNVERSIONED}"}
+
+
+def test_cascade_verdicts_are_cached_per_band():
+    ml.predict_urls(URLS, cascade=True, band=(0.5, 0.5))
+    ml.predict_urls(URLS, cascade=True, band=(0.5, 0.5))
+    ml.predict_urls(URLS, cascade=True, band=(0.0, 1.0))
+    stats = ml.CASCADE_STATS.stats()
+    assert stats["numeric"] + stats["full"] == 2 * len(URLS)
+
+
+def test_rejects_bad_band():
+    with pytest.raises(ValueError):
+        ml.predict_urls(URLS, cascade=True, band=(0.9, 0.1))
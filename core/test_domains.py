@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import core.domains as domains
+import core.rulepack as rulepack
+from core.domains import DomainIndex, DomainMatch, build_domain_index
+from core.numeric_features import _tld_risk
+from core.rules import apply_rules_url
+
+# core.numeric_features._tld_risk as it was hard-coded before the domain index
+LEGACY_HIGH = {"tk", "ml", "ga", "cf"}
+LEGACY_MEDIUM = {"ru", "cn", "xyz"}
+
+
+def _legacy_tld_risk(domain):
+    if not domain or "." not in domain:
+        return 1
+    tld = domain.rsplit(".", 1)[-1].lower()
+    return 3 if tld in LEGACY_HIGH else 2 if tld in LEGACY_MEDIUM else 1
+
+
+@pytest.fixture
+def restore_index():
+    saved = domains.get_domain_index()
+    yield
+    domains.set_domain_index(saved)
+
+
+def test_default_index_reproduces_legacy_tld_sets():
+    hosts = ["evil.tk", "A.B.ML", "x.ru", "example.com", "tk", "evil.tk.", "evil.tk:8080", "u@evil.cf", "", "xyz.com"]
+    assert [_tld_risk(h) for h in hosts] == [_legacy_tld_risk(h) for h in hosts]
+    assert apply_rules_url("http://shop.evil.tk/")["explanations"] == ["High-risk TLD detected: .tk"]
+    # A dot-less host is not under any TLD, even when the label is a listed one
+    for url in ("http://tk/", "http://gA/x", "http://tk:8080/"):
+        assert apply_rules_url(url)["rules_triggered"] == [], url
+
+
+def test_built_index_matches_in_memory_index_and_suffix_semantics(tmp_path):
+    (tmp_path / "high.txt").write_text("# comment\nevil.com\n0.0.0.0 www.bad.co.uk\n*.phish.github.io\n")
+    (tmp_path / "low.txt").write_text("com\nevil.com\n")
+    (tmp_path / "suffixes.txt").write_text("co.uk\ngithub.io\n")
+    lists = {"high": [tmp_path / "high.txt"], "low": [tmp_path / "low.txt"]}
+    out = build_domain_index(lists, tmp_path / "index.bin", tmp_path / "suffixes.txt", registrable=True)
+    index = DomainIndex.load(out)
+
+    assert index.lookup("a.b.EVIL.com") == DomainMatch("evil.com", "high")  # longest entry, highest level
+    assert index.lookup("other.com") == DomainMatch("com", "low")
+    assert index.lookup("mail.bad.co.uk") == DomainMatch("bad.co.uk", "high")  # reduced to eTLD+1
+    assert index.lookup("phish.github.io") == DomainMatch("phish.github.io", "high")
+    assert index.lookup("github.io") is None and index.lookup("good.co.uk") is None
+    assert index.registrable_domain("x.y.bad.co.uk") == "bad.co.uk" and index.registrable_domain("co.uk") is None
+
+    in_memory = DomainIndex.from_lists(
+        {"high": ["evil.com", "www.bad.co.uk", "phish.github.io"], "low": ["com", "evil.com"]},
+        ["co.uk", "github.io"],
+        registrable=True,
+    )
+    for name in ("hashes", "flags", "key_offsets", "key_blob"):
+        np.testing.assert_array_equal(index._arrays[name], in_memory._arrays[name])
+
+
+def test_domain_rules_follow_the_active_index(restore_index):
+    domains.set_domain_index(DomainIndex.from_lists({"high": ["evil.example"], "medium": ["tk"]}))
+    url_rules = rulepack.get_rule_pack().rule_set("url")
+    assert [(r.id, text) for r, text in url_rules.evaluate("/", "cdn.evil.example:443")] == [
+        ("ABUSED_TLD_HIGH", "High-risk domain detected: evil.example")
+    ]
+    assert [text for _, text in url_rules.evaluate("/", "x.tk")] == ["Medium-risk TLD detected: .tk"]
+    batch = url_rules.evaluate_batch(["/", "/", "/"], ["cdn.evil.example:443", "x.tk", "x.ml"])[2]
+    assert [[r.id for r, _ in row] for row in batch] == [["ABUSED_TLD_HIGH"], ["ABUSED_TLD_MEDIUM"], []]
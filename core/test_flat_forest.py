@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import core.registry as registry
+from core.forest import PER_TREE_MIN_ROWS, FlatForest, export_forest, flat_forest_dir, replace_forest_export
+from feature_extractor import build_feature_matrix
+
+
+@pytest.fixture(scope="module")
+def forest_and_data():
+    X_train, X_val, X_test, y_train, _, _, vectorizer = build_feature_matrix()
+    forest = RandomForestClassifier(n_estimators=25, random_state=0).fit(X_train, y_train)
+    return forest, vectorizer, [X_train, X_val, X_test]
+
+
+def test_flat_forest_matches_sklearn(tmp_path, forest_and_data):
+    forest, _, splits = forest_and_data
+    flat = FlatForest.load(export_forest(forest, tmp_path / "forest"))
+
+    assert isinstance(flat.threshold, np.memmap)
+    assert list(flat.classes_) == list(forest.classes_)
+    for X in splits:
+        np.testing.assert_allclose(flat.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+
+
+def test_registry_serves_forests_from_flat_arrays(tmp_path, forest_and_data):
+    forest, vectorizer, splits = forest_and_data
+    version = registry.publish(forest, vectorizer, registry_dir=tmp_path)
+
+    model, loaded_vectorizer = registry.load_version(version, tmp_path)
+    assert isinstance(model, FlatForest) and isinstance(model.threshold, np.memmap)
+    np.testing.assert_allclose(model.predict_proba(splits[1]), forest.predict_proba(splits[1]), atol=1e-12)
+    assert isinstance(loaded_vectorizer.idf_, np.memmap)
+
+
+def test_batch_traversal_matches_sklearn_on_deep_trees():
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, 12))
+    X[:, 3] = rng.integers(0, 4, 5000)  # many ties on an integer feature
+    y = rng.choice(["benign", "malicious"], 5000)  # noise -> fully grown, deep trees
+    forest = RandomForestClassifier(n_estimators=30, random_state=1).fit(X, y)
+    flat = FlatForest.from_model(forest)
+
+    # Large blocks walk one tree at a time, small ones all (row, tree) pairs at once
+    assert len(X) >= PER_TREE_MIN_ROWS > 500
+    np.testing.assert_array_equal(flat.apply(X), forest.apply(X) + flat.roots)
+    np.testing.assert_array_equal(flat.apply(X[:500]), forest.apply(X[:500]) + flat.roots)
+    np.testing.assert_allclose(flat.predict_proba(X), forest.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_unversioned_forest_is_scored_by_flat_engine(tmp_path, monkeypatch, forest_and_data):
+    import joblib
+
+    import core.ml as ml
+    from core.cache import VerdictCache
+
+    forest, vectorizer, _ = forest_and_data
+    joblib.dump(forest, tmp_path / "url_model.pkl")
+    joblib.dump(vectorizer, tmp_path / "vectorizer.pkl")
+    monkeypatch.setattr(registry, "REGISTRY_DIR", tmp_path / "registry")
+    monkeypatch.setattr(ml, "MODEL_PATHS", {"tfidf": (tmp_path / "url_model.pkl", tmp_path / "vectorizer.pkl")})
+    monkeypatch.setattr(ml, "_MODEL_CACHE", {})
+    monkeypatch.setattr(ml, "VERDICT_CACHE", VerdictCache(10))
+
+    urls = ["http://test.com/index.php?id=1' OR 1=1--", "https://www.google.com", "/home"]
+    results = ml.predict_urls(urls)
+
+    assert isinstance(ml._get_model().model, FlatForest)
+    expected = ml._malicious_probs(forest, ml._build_feature_matrix(urls, vectorizer))
+    np.testing.assert_allclose([r["malicious_probability"] for r in results], expected, atol=1e-12)
+
+
+def test_unversioned_forest_maps_a_fresh_sidecar_export(tmp_path, monkeypatch, forest_and_data):
+    import joblib
+
+    import core.ml as ml
+
+    forest, vectorizer, _ = forest_and_data
+    model_path = tmp_path / "url_model.pkl"
+    joblib.dump(forest, model_path)
+    joblib.dump(vectorizer, tmp_path / "vectorizer.pkl")
+    monkeypatch.setattr(registry, "REGISTRY_DIR", tmp_path / "registry")
+    monkeypatch.setattr(ml, "MODEL_PATHS", {"tfidf": (model_path, tmp_path / "vectorizer.pkl")})
+
+    replace_forest_export(forest, flat_forest_dir(model_path))
+    loaded, load = [], joblib.load
+    monkeypatch.setattr(ml.joblib, "load", lambda path, **kw: loaded.append(path) or load(path, **kw))
+    assert isinstance(ml._load_from_disk("tfidf").model.threshold, np.memmap)
+    assert model_path not in loaded  # the forest pickle stays out of the serving process
+
+    joblib.dump(forest, model_path)  # retrained after the export: the sidecar is stale
+    assert not isinstance(ml._load_from_disk("tfidf").model.threshold, np.memmap)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+import core.explain as explain
+from core.frames import concat_frames, encode_rules, frame_records, rules_triggered, why_summaries
+from core.pipeline import analyze_urls, analyze_urls_frame
+from core.test_parsed_url import URLS
+
+
+def test_frame_holds_the_same_results_as_the_dicts():
+    rows = analyze_urls(URLS)
+    frame = analyze_urls_frame(URLS)
+
+    assert frame["ml_label"].dtype == "category" and frame["risk_level"].cat.ordered
+    assert (frame["ml_probability"].dtype, frame["risk_score"].dtype) == (np.float32, np.int8)
+    assert frame["rules_mask"].dtype == np.uint8
+    records = frame_records(frame)
+    np.testing.assert_allclose([r["ml_probability"] for r in records], [r["ml_probability"] for r in rows], rtol=1e-6)
+    for record, row in zip(records, rows):
+        record["ml_probability"] = row["ml_probability"]
+    assert records == [{key: row[key] for key in record} for record, row in zip(records, rows)]
+
+    high = frame.sort_values("risk_score", ascending=False)[lambda f: f["risk_level"] >= "Medium"]
+    assert rules_triggered(high) == [rows[i]["rules_triggered"] for i in high.index]
+
+
+def test_concat_remaps_masks_between_rule_packs():
+    first = analyze_urls_frame(URLS[:3])
+    second = analyze_urls_frame(URLS[3:])
+    names = ["NEW_RULE", *second.attrs["rule_names"]]
+    second["rules_mask"] = encode_rules(rules_triggered(second), names)
+    second.attrs["rule_names"] = tuple(names)
+
+    combined = concat_frames([first, second])
+    assert rules_triggered(combined) == rules_triggered(first) + rules_triggered(second)
+    assert combined["model_version"].dtype == "category" and isinstance(combined["url"].dtype, pd.StringDtype)
+    assert len(concat_frames([])) == 0
+
+
+def test_repeated_urls_are_analyzed_once_and_fanned_out(monkeypatch):
+    calls = []
+    why = explain.generate_why_summary
+    monkeypatch.setattr(explain, "generate_why_summary", lambda **kw: calls.append(kw["url"]) or why(**kw))
+    urls = [URLS[0], " " + URLS[1], URLS[0], URLS[1], URLS[0]]
+
+    rows = analyze_urls(urls)
+    assert len(calls) == 2
+    assert [r["occurrences"] for r in rows] == [3, 2, 3, 2, 3]
+    assert rows[0] == rows[2] and rows[0]["rules_triggered"] is not rows[2]["rules_triggered"]
+    unique = analyze_urls_frame(urls, unique=True)
+    assert unique["url"].tolist() == [URLS[0], URLS[1]] and unique["occurrences"].tolist() == [3, 2]
+    assert frame_records(analyze_urls_frame(urls)) == frame_records(unique.take([0, 1, 0, 1, 0]).reset_index(drop=True))
+
+
+def test_why_summaries_are_built_on_demand_and_memoised():
+    rows = analyze_urls(URLS)
+    frame = analyze_urls_frame(URLS)
+    assert "why_summary" not in frame.columns
+
+    explain._why_summary.cache_clear()
+    assert why_summaries(frame) == [row["why_summary"] for row in rows]
+    misses = explain._why_summary.cache_info().misses
+    assert why_summaries(frame) == why_summaries(frame.iloc[::-1])[::-1]
+    assert explain._why_summary.cache_info().misses == misses
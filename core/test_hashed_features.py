@@ -0,0 +1,48 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from feature_extractor import HashedNgramVectorizer, build_feature_matrix
+
+URLS = ["http://test.com/index.php?id=1' OR 1=1--", "https://www.google.com", "/home", ""]
+
+
+def test_hashed_vectorizer_is_stateless_apart_from_idf():
+    fitted = HashedNgramVectorizer(n_features=2**10).fit(URLS)
+    copy = pickle.loads(pickle.dumps(fitted))
+
+    X = fitted.transform(URLS)
+    assert X.shape == (len(URLS), 2**10)
+    assert fitted.idf_.shape == (2**10,)
+    np.testing.assert_array_equal(X.toarray(), copy.transform(URLS).toarray())
+
+    norms = np.sqrt(X.multiply(X).sum(axis=1)).A1
+    np.testing.assert_allclose(norms, [1.0, 1.0, 1.0, 0.0])
+
+    unfitted = HashedNgramVectorizer(n_features=2**10, use_idf=False).fit(URLS)
+    assert unfitted.idf_ is None
+
+
+def test_saved_idf_is_pickled_by_reference_and_mapped(tmp_path):
+    fitted = HashedNgramVectorizer(n_features=2**10).fit(URLS)
+    expected = fitted.transform(URLS).toarray()
+    inline_size = len(pickle.dumps(fitted))
+
+    fitted.save_idf(tmp_path / "idf.npy")
+    payload = pickle.dumps(fitted)
+    assert len(payload) < inline_size - 2**10 * 4 // 2
+
+    copy = pickle.loads(payload)
+    assert isinstance(copy.idf_, np.memmap)
+    np.testing.assert_array_equal(copy.transform(URLS).toarray(), expected)
+
+
+def test_build_feature_matrix_hashed_mode():
+    X_train, X_val, _, y_train, _, _, vectorizer = build_feature_matrix(feature_mode="hashed")
+    assert isinstance(vectorizer, HashedNgramVectorizer)
+    assert X_train.shape[1] == X_val.shape[1] == 14 + vectorizer.n_features
+    assert X_train.shape[0] == len(y_train)
+
+    with pytest.raises(ValueError):
+        build_feature_matrix(feature_mode="bogus")
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import core.known_urls as known_urls
+import core.ml as ml
+from benchmarks.corpus import synthetic_urls
+from core.known_urls import ALLOW, DENY, KnownURLFilters, KnownURLList, _url_hashes
+from core.pipeline import analyze_urls
+
+GOOD = "https://intranet.example/healthz"
+BAD = "http://test.com/index.php?id=1' OR 1=1--"
+OTHER = "/search?q=<script>alert(1)</script>"
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(known_urls, "_FILTERS", None)
+    monkeypatch.setattr(known_urls, "SHORT_CIRCUIT_STATS", known_urls.ShortCircuitStats())
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    listed = synthetic_urls(20_000)
+    others = list(set(synthetic_urls(20_000, seed=9)) - set(listed))
+    known = KnownURLList(listed, fp_rate=0.01)
+    assert known.bloom.contains(_url_hashes(listed)).all()
+    assert known.bloom.contains(_url_hashes(others)).mean() < 0.02
+
+
+def test_listed_urls_skip_ml_and_deny_hits_are_confirmed(tmp_path, monkeypatch):
+    (tmp_path / "allow.txt").write_text(f"# our endpoints\n{GOOD}\n")
+    (tmp_path / "deny.txt").write_text(f"  {BAD}  \n")
+    filters = known_urls.load_known_url_filters(tmp_path / "allow.txt", tmp_path / "deny.txt")
+    assert not filters.allow.confirms and filters.deny.confirms
+    known_urls.set_known_url_filters(filters)
+
+    scored = []
+    predict_urls = ml.predict_urls
+    monkeypatch.setattr(ml, "predict_urls", lambda urls, **kw: scored.extend(urls) or predict_urls(urls, **kw))
+    results = analyze_urls([GOOD, BAD, OTHER, BAD])
+
+    assert [p.raw for p in scored] == [OTHER]
+    assert [r["known_list"] for r in results] == [ALLOW, DENY, None, DENY]
+    assert [r["ml_label"] for r in results[:2]] == ["benign", "malicious"]
+    assert "SQL_INJECTION_PATTERN" in results[1]["rules_triggered"]  # rules still run on listed URLs
+    assert results[1]["why_summary"].startswith("This URL is on the known-bad list")
+    stats = known_urls.SHORT_CIRCUIT_STATS.stats()
+    assert (stats["allowed"], stats["denied"], stats["scored"]) == (1, 2, 1)
+    assert stats["short_circuit_fraction"] == 0.75
+
+
+def test_deny_filter_false_positives_are_rejected():
+    deny = KnownURLList([BAD], fp_rate=0.5, confirm=True)
+    candidates = synthetic_urls(2_000)
+    false_hits = [u for u, hit in zip(candidates, deny.bloom.contains(_url_hashes(candidates))) if hit and u != BAD]
+    assert false_hits  # a 50% filter claims plenty of unlisted URLs
+
+    verdicts = KnownURLFilters(deny=deny).classify(false_hits + [BAD])
+    assert verdicts == [None] * len(false_hits) + [DENY]
+    assert known_urls.SHORT_CIRCUIT_STATS.stats()["deny_rejected"] == len(set(false_hits))
+    assert np.array_equal(KnownURLFilters().classify([BAD, OTHER]), [None, None])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from core.ml import LinearScorer, _build_feature_matrix, _malicious_probs, export_linear_scorer
+from feature_extractor import build_feature_matrix
+from train_models import train_logistic, train_svm
+
+URLS = [
+    "http://test.com/index.php?id=1' OR 1=1--",
+    "https://www.google.com",
+    "/search?q=<script>alert(1)</script>",
+    "http://192.168.1.10/login",
+    "https://docs.python.org/3/library/  re.html",
+    "ab",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    X_train, _, _, y_train, _, _, vectorizer = build_feature_matrix()
+    return X_train, y_train, vectorizer
+
+
+@pytest.mark.parametrize("train", [train_logistic, train_svm])
+def test_compiled_scorer_matches_sklearn(tmp_path, training_data, train):
+    X_train, y_train, vectorizer = training_data
+    model = train(X_train, y_train)
+    path = export_linear_scorer(model, vectorizer, tmp_path / "linear_scorer.bin")
+
+    expected = _malicious_probs(model, _build_feature_matrix(URLS, vectorizer))
+    for mmap in (True, False):
+        scorer = LinearScorer(path, mmap=mmap)
+        np.testing.assert_allclose(scorer.malicious_probs(URLS), expected, rtol=0, atol=1e-12)
+
+
+def test_export_rejects_non_linear_models(tmp_path, training_data):
+    X_train, y_train, vectorizer = training_data
+    forest = RandomForestClassifier(n_estimators=2, random_state=0).fit(X_train, y_train)
+    with pytest.raises(ValueError):
+        export_linear_scorer(forest, vectorizer, tmp_path / "linear_scorer.bin")
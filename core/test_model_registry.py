@@ -0,0 +1,91 @@
+import copy
+import os
+
+import joblib
+import pytest
+
+import core.ml as ml
+import core.registry as registry
+from core.cache import VerdictCache
+
+URLS = ["http://test.com/index.php?id=1' OR 1=1--", "https://www.google.com"]
+
+
+@pytest.fixture
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_DIR", tmp_path)
+    monkeypatch.setattr(ml, "_MODEL_CACHE", {})
+    monkeypatch.setattr(ml, "VERDICT_CACHE", VerdictCache(100))
+    return tmp_path
+
+
+def _flipped(model):
+    flipped = copy.deepcopy(model)
+    flipped.coef_ = -flipped.coef_
+    flipped.intercept_ = -flipped.intercept_
+    return flipped
+
+
+def test_falls_back_to_unversioned_files_without_registry(registry_dir):
+    assert {r["model_version"] for r in ml.predict_urls(URLS)} == {ml.UNVERSIONED}
+
+
+def test_hot_swap_and_rollback(registry_dir):
+    model = joblib.load(ml.MODEL_PATH)
+    vectorizer = joblib.load(ml.VECTORIZER_PATH)
+    v1 = registry.publish(model, vectorizer, registry_dir=registry_dir)
+    before = ml.predict_urls(URLS)
+    assert {r["model_version"] for r in before} == {v1}
+
+    in_flight = ml._get_model()
+    v2 = registry.publish(_flipped(model), vectorizer, registry_dir=registry_dir)
+    assert v2 != v1
+    # Nothing changes until the watcher refreshes
+    assert ml.predict_urls(URLS) == before
+
+    assert ml.refresh_models() == {"tfidf": v2}
+    after = ml.predict_urls(URLS)
+    assert {r["model_version"] for r in after} == {v2}
+    for old, new in zip(before, after):
+        assert new["malicious_probability"] == pytest.approx(1 - old["malicious_probability"])
+    # A caller still holding the old snapshot keeps a consistent model
+    assert in_flight.version == v1 and in_flight.model is not ml._get_model().model
+
+    registry.activate(v1, registry_dir)
+    assert ml.refresh_models() == {"tfidf": v1}
+    assert ml.predict_urls(URLS) == before
+    assert ml.refresh_models() == {}
+
+
+def test_watcher_polls_manifest_mtime(registry_dir):
+    calls = []
+    registry.publish(object(), object(), registry_dir=registry_dir)
+    watcher = registry.ManifestWatcher(lambda: calls.append(1), registry_dir, interval=60)
+    assert watcher.poll() is False
+
+    manifest = registry_dir / registry.MANIFEST_NAME
+    stat = manifest.stat()
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert watcher.poll() is True and calls == [1]
+
+
+def test_publish_keeps_newest_versions_and_active(registry_dir):
+    first = registry.publish(object(), object(), registry_dir=registry_dir, keep=None)
+    numeric = registry.publish(object(), None, feature_mode="numeric", registry_dir=registry_dir, keep=None)
+    versions = [first] + [registry.publish(object(), object(), registry_dir=registry_dir, keep=None) for _ in range(3)]
+    registry.activate(first, registry_dir)
+
+    newest = registry.publish(object(), object(), registry_dir=registry_dir, activate=False, keep=2)
+    manifest = registry.read_manifest(registry_dir)
+    tfidf = {v for v, info in manifest["versions"].items() if info["feature_mode"] == "tfidf"}
+    # The two newest plus the rolled-back active one survive; other modes are untouched
+    assert tfidf == {newest, versions[-1], first}
+    assert len(manifest["versions"]) == 4
+    for version in versions[1:-1]:
+        assert not (registry_dir / version).exists()
+    assert (registry_dir / first / registry.MODEL_FILE).exists()
+
+    assert registry.prune(1, registry_dir=registry_dir) == [versions[-1]]
+    assert set(registry.read_manifest(registry_dir)["versions"]) == {newest, first, numeric}
+    with pytest.raises(ValueError):
+        registry.prune(0, registry_dir=registry_dir)
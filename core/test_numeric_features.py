@@ -0,0 +1,171 @@
+import math
+import re
+from collections import Counter
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, hstack
+
+from core.numeric_features import NUMERIC_FEATURE_COLUMNS, _numeric_row, combine_feature_blocks, extract_numeric_matrix
+from feature_extractor import extract_features
+
+PARITY_URLS = [
+    "http://test.com/index.php?id=1' OR 1=1--",
+    "https://www.google.com",
+    "/login?id=1' OR '1'='1",
+    "/search?q=<script>alert(1)</script>",
+    "http://192.168.1.10/admin/Shell.PHP?cmd=whoami",
+    "http://evil.tk/verify/update?token=ABC123",
+    "https://sub.domain.example.ru/wp-login.php",
+    "http://xn--80ak6aa92e.xyz/%3Cscript%3E",
+    "https://例え.jp/パス?q=١٢٣",
+    "",
+    "/",
+    "http://[::1",  # urlparse raises -> unparsable
+]
+
+
+# Verbatim copies of the per-row helpers from before batching: the reference must not follow the new code
+def _legacy_safe_parse(url: str):
+    if not isinstance(url, str):
+        return None
+    if url.startswith("/"):
+        url = f"http://example.local{url}"
+    try:
+        return urlparse(url)
+    except Exception:
+        return None
+
+
+def _legacy_count_digits(text: str) -> int:
+    return sum(ch.isdigit() for ch in text or "")
+
+
+def _legacy_count_special(text: str) -> int:
+    return len(re.findall(r"[^a-zA-Z0-9]", text or ""))
+
+
+def _legacy_count_keywords(text: str, keywords) -> int:
+    lowered = (text or "").lower()
+    return sum(kw in lowered for kw in keywords)
+
+
+def _legacy_has_ip(domain: str) -> int:
+    if not domain:
+        return 0
+    # Simple IPv4 check
+    parts = domain.split(".")
+    if len(parts) != 4:
+        return 0
+    for part in parts:
+        if not part.isdigit():
+            return 0
+        val = int(part)
+        if val < 0 or val > 255:
+            return 0
+    return 1
+
+
+def _legacy_tld_risk(domain: str) -> int:
+    if not domain or "." not in domain:
+        return 1
+    tld = domain.rsplit(".", 1)[-1].lower()
+    if tld in {"tk", "ml", "ga", "cf"}:
+        return 3
+    if tld in {"ru", "cn", "xyz"}:
+        return 2
+    return 1
+
+
+def _legacy_entropy(text: str) -> float:
+    if not text:
+        return 0.0
+    counts = Counter(text)
+    length = len(text)
+    entropy = 0.0
+    for c in counts.values():
+        p = c / length
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+def _legacy_rows(urls):
+    """Per-row numeric features (float64) exactly as the pre-batching extract_features built them."""
+    suspicious_keywords = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
+    rows = []
+    for url in urls:
+        parsed = _legacy_safe_parse(url)
+        if not parsed:
+            rows.append([0.0] * len(NUMERIC_FEATURE_COLUMNS))
+            continue
+        domain = parsed.netloc or ""
+        path = parsed.path or ""
+        query = parsed.query or ""
+        url_len = len(url)
+        num_digits = _legacy_count_digits(url)
+        num_special = _legacy_count_special(url)
+        num_upper = sum(ch.isupper() for ch in url or "")
+        safe_div = lambda num: (num / url_len) if url_len else 0.0
+        rows.append(
+            [
+                url_len,
+                len(domain),
+                len(path),
+                len(query),
+                num_digits,
+                num_special,
+                max(0, domain.count(".") - 1) if domain else 0,
+                safe_div(num_digits),
+                safe_div(num_special),
+                safe_div(num_upper),
+                _legacy_entropy(url),
+                _legacy_count_keywords(url, suspicious_keywords),
+                _legacy_has_ip(domain),
+                _legacy_tld_risk(domain),
+            ]
+        )
+    return np.array(rows, dtype=np.float64)
+
+
+def test_batched_matrix_matches_per_row_implementation():
+    batched = extract_numeric_matrix(PARITY_URLS)
+    legacy = _legacy_rows(PARITY_URLS)
+
+    # Full precision first: the per-row values are identical, not merely equal after rounding
+    rows = np.array(
+        [_numeric_row(url) or [0.0] * len(NUMERIC_FEATURE_COLUMNS) for url in PARITY_URLS], dtype=np.float64
+    )
+    np.testing.assert_array_equal(rows, legacy)
+    # The matrix stores them as float32, the only intended difference
+    assert batched.dtype == np.float32
+    assert batched.shape == (len(PARITY_URLS), len(NUMERIC_FEATURE_COLUMNS))
+    np.testing.assert_array_equal(batched, legacy.astype(np.float32))
+
+
+def test_extract_features_drops_unparsable_rows_and_keeps_labels():
+    df = pd.DataFrame({"url": PARITY_URLS, "label": [f"l{i}" for i in range(len(PARITY_URLS))]})
+    out = extract_features(df)
+
+    assert list(out.columns) == NUMERIC_FEATURE_COLUMNS + ["label"]
+    assert len(out) == len(PARITY_URLS) - 1
+    assert "l11" not in set(out["label"])
+    np.testing.assert_array_equal(
+        out[NUMERIC_FEATURE_COLUMNS].to_numpy(), _legacy_rows(PARITY_URLS[:-1]).astype(np.float32)
+    )
+
+
+def test_combine_feature_blocks_matches_hstack():
+    numeric = extract_numeric_matrix(PARITY_URLS)
+    rng = np.random.default_rng(0)
+    dense = rng.random((len(PARITY_URLS), 40))
+    dense[dense < 0.7] = 0.0
+    dense[3] = 0.0  # row with no tfidf entries
+    tfidf = csr_matrix(dense)
+
+    combined = combine_feature_blocks(numeric, tfidf)
+    expected = hstack([csr_matrix(numeric), tfidf]).tocsr()
+
+    assert combined.shape == expected.shape
+    np.testing.assert_array_equal(combined.toarray(), expected.toarray())
+    np.testing.assert_array_equal(combined.indptr, expected.indptr)
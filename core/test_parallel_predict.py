@@ -0,0 +1,34 @@
+import numpy as np
+
+import core.ml as ml
+
+URLS = [
+    "http://test.com/index.php?id=1' OR 1=1--",
+    "https://www.google.com",
+    "/search?q=<script>alert(1)</script>",
+    "http://192.168.1.10/login",
+    "http://evil.tk/admin/panel?cmd=cat%20/etc/passwd",
+] * 7
+
+
+def test_parallel_predict_matches_serial_and_preserves_order(monkeypatch):
+    urls = [f"{u}&n={i}" for i, u in enumerate(URLS)]
+    serial = ml.predict_urls(urls, use_cache=False)
+
+    monkeypatch.setattr(ml, "PARALLEL_MIN_URLS", 1)
+    parallel = ml.predict_urls(urls, workers=3, chunk_size=4, use_cache=False)
+
+    assert [r["url"] for r in parallel] == urls
+    assert [r["label"] for r in parallel] == [r["label"] for r in serial]
+    np.testing.assert_allclose(
+        [r["malicious_probability"] for r in parallel],
+        [r["malicious_probability"] for r in serial],
+    )
+
+
+def test_small_batches_stay_in_process(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("pool should not be used for small batches")
+
+    monkeypatch.setattr(ml, "_score_parallel", fail)
+    assert len(ml.predict_urls(URLS, workers=4, chunk_size=2, use_cache=False)) == len(URLS)
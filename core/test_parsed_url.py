@@ -0,0 +1,35 @@
+import pickle
+
+import numpy as np
+
+import core.ml as ml
+from core.rules import apply_rules_url
+from core.test_numeric_features import PARITY_URLS
+from core.url import ParsedURL, _host, _safe_parse, parse_urls
+from core.numeric_features import extract_numeric_matrix
+
+URLS = PARITY_URLS + ["evil.tk/login", "http://1.2.3.4:8080/%27%20or%201=1", "HTTP://EXAMPLE.COM/Admin", PARITY_URLS[0]]
+UNPARSABLE = {"http://[::1"}  # the host rules raise ValueError, with or without ParsedURL
+
+
+def test_parsed_url_fields_match_the_per_stage_readings():
+    parsed = parse_urls(URLS)
+    assert parsed[-1] is parsed[0] and len({id(p) for p in parsed}) == len(set(URLS))
+    for url, p in zip(URLS, parsed):
+        parts = _safe_parse(url)
+        assert p.parts == parts
+        assert (p.netloc, p.path, p.query) == ((parts.netloc, parts.path, parts.query) if parts else ("", "", ""))
+        assert p.lower == url.lower()
+        if url not in UNPARSABLE:
+            assert p.host == _host(url)
+        assert pickle.loads(pickle.dumps(p)).parts == parts
+
+
+def test_stages_give_the_same_results_on_parsed_urls():
+    parsed = parse_urls(URLS)
+    np.testing.assert_array_equal(extract_numeric_matrix(parsed), extract_numeric_matrix(URLS))
+    assert [apply_rules_url(p) for p in parsed if p.raw not in UNPARSABLE] == [
+        apply_rules_url(url) for url in URLS if url not in UNPARSABLE
+    ]
+    assert ml.predict_urls(parsed, use_cache=False) == ml.predict_urls(URLS, use_cache=False)
+    assert [r["url"] for r in ml.predict_urls([ParsedURL("/x"), "/x"])] == ["/x", "/x"]
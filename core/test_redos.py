@@ -0,0 +1,55 @@
+import random
+import re
+import time
+
+import pytest
+
+from core.matcher import _ASCII_FOLD
+from core.redos import backtracking_risk, make_linear
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [r"(a+)+$", r"(\w*x)*y", r"(a|ab)*c", r"(\w|\d)+!", r"\w+\d+x", r".*.*x", r";.*x", r"\w+="],
+)
+def test_risky_patterns_are_flagged(regex):
+    assert backtracking_risk(regex) is not None
+
+
+@pytest.mark.parametrize(
+    "regex",
+    [r"union\s+select", r"<script|javascript:|onerror=", r"^\w+=", r"(\.\./|%2e%2e%2f)", r"a[0-9]{1,3}b", r"^(?:ab)+c"],
+)
+def test_linear_patterns_pass_unchanged(regex):
+    assert backtracking_risk(regex) is None
+    assert make_linear(regex) == regex
+
+
+def test_dotstar_rewrite_is_equivalent_and_linear():
+    alphabet = ";&|lsca tw\nx"
+    rng = random.Random(5)
+    for regex in [r"(;|&&|\|).*(ls|cat|pwd|whoami)", r"x.*(ls|cat)", r"(ab|cd).*e"]:
+        original, rewritten = re.compile(regex, re.I), re.compile(make_linear(regex), re.I)
+        assert rewritten.pattern != regex
+        for _ in range(3_000):
+            text = "".join(rng.choice(alphabet + "abcde") for _ in range(rng.randrange(12)))
+            assert bool(original.search(text)) == bool(rewritten.search(text)), (regex, text)
+
+    attack = ";" * 20_000
+    start = time.perf_counter()
+    re.compile(make_linear(r"(;|&&|\|).*(ls|cat|pwd|whoami)"), re.I).search(attack)
+    assert time.perf_counter() - start < 0.05
+
+
+@pytest.mark.parametrize("regex", [r"(a+)+$", r"(ab|a).*b", r"(?:x\d|y).*z", r"(?s)a.*b"])
+def test_unsafe_patterns_without_rewrite_are_rejected(regex):
+    with pytest.raises(ValueError, match="super-linearly"):
+        make_linear(regex)
+
+
+def test_ascii_fold_covers_every_ignorecase_collision():
+    # The matcher's prefilter relies on these being the only non-ASCII characters
+    # IGNORECASE matches to ASCII letters
+    ascii_letter = re.compile("[a-z]", re.I)
+    colliding = {chr(c) for c in range(128, 0x110000) if ascii_letter.fullmatch(chr(c))}
+    assert colliding == {chr(c) for c in _ASCII_FOLD}
@@ -0,0 +1,161 @@
+import random
+import re
+from urllib.parse import urlparse
+
+import pandas as pd
+import pytest
+
+import core.rules as rules
+from core.matcher import MultiPatternMatcher, Rule, required_literals
+
+
+# The rule set as it was hard-coded before rule packs; the reference must not follow the pack
+SQL_PATTERN = re.compile(r"('|\%27)\s*or\s*1=1|--|union\s+select|\%3d|\%27", re.IGNORECASE)
+XSS_PATTERN = re.compile(r"<script|javascript:|onerror=|onload=|\%3cscript\%3e", re.IGNORECASE)
+SUSPICIOUS_KEYWORDS = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
+ABUSED_TLDS = {"tk", "ml", "ga", "cf", "ru", "cn", "xyz"}
+
+
+def _multipass_rules(url):
+    """apply_rules_url as it was before the single-pass engine: one scan per rule."""
+    target = url or ""
+    host = urlparse(target if "://" in target else f"http://example.local{target}").netloc
+    lower_url = target.lower()
+    hits = []
+    if SQL_PATTERN.search(lower_url):
+        hits.append("SQL_INJECTION_PATTERN")
+    if XSS_PATTERN.search(lower_url):
+        hits.append("XSS_PATTERN")
+    if any(kw in lower_url for kw in SUSPICIOUS_KEYWORDS):
+        hits.append("SUSPICIOUS_KEYWORD")
+    if rules._is_ipv4(host):
+        hits.append("IP_BASED_URL")
+    tld = rules._tld(host)
+    if tld in ABUSED_TLDS:
+        hits.append("ABUSED_TLD")
+    return hits
+
+
+def _fuzz_urls(n, seed=0):
+    rng = random.Random(seed)
+    pieces = [
+        "http://", "https://", "//", "ftp:", "a:b", "1.2.3.4", "10.0.0.1:8080", "evil.tk", "x.ru", "site.com",
+        "/", "?", "#", "'", "%27", " or 1=1", "--", "union select", "%3d", "<script", "javascript:", "onerror=",
+        "%3cscript%3e", "login", "LOGIN", "wp", "exec", "shell", "cmd", " ", "\t", "[::1]", "é", "ß", "İ",
+    ]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 8))) for _ in range(n)]
+
+
+def test_single_pass_engine_matches_multipass_rules():
+    urls = pd.read_csv("data/combined_dataset.csv")["url"].dropna().astype(str).tolist() + _fuzz_urls(20_000)
+    for url in urls:
+        try:
+            expected = _multipass_rules(url)
+        except ValueError:
+            with pytest.raises(ValueError):
+                rules.apply_rules_url(url)
+            continue
+        assert rules.apply_rules_url(url)["rules_triggered"] == expected, url
+
+
+def _search_each(rule_set, text):
+    hits = []
+    for rule in rule_set:
+        if rule.regex is not None:
+            fired = re.search(rule.regex, text.lower(), re.I)
+        else:
+            fired = any(lit.lower() in text.lower() for lit in rule.literals)
+        if fired:
+            hits.append(rule.name)
+    return hits
+
+
+def test_matcher_finds_overlapping_and_same_position_matches():
+    rule_set = [
+        Rule("A", "", literals=("abcd",)),
+        Rule("B", "", regex=r"bcd"),  # overlaps A's match
+        Rule("C", "", literals=("ab", "zzz")),  # prefix of A's literal, same start
+        Rule("D", "", regex=r"a\w{5}"),  # no usable trigger literal
+        Rule("E", "", regex=r"(?:x|y)+[pq]\d"),
+        Rule("F", "", regex=r"k"),  # IGNORECASE also matches the Kelvin sign
+    ]
+    matcher = MultiPatternMatcher(rule_set)
+    for text in ["abcd", "xabcdx", "ab", "zzzabc", "aXXXXX", "", "XYQ9", "yp", "\u212a", "ABCD\u00e9"]:
+        assert matcher.names(text) == _search_each(rule_set, text), text
+
+
+def test_required_literals():
+    assert required_literals(r"union\s+select") == {"select"}
+    assert required_literals(SQL_PATTERN.pattern) == {"1=1", "--", "select", "%3d", "%27"}
+    assert required_literals(r"(?:ab|cd)+x") == {"ab", "cd"}
+    assert required_literals(r"\w+=\d") == {"="}
+    assert required_literals(r"a\w{5}") == {"a"}
+    assert required_literals(r"\d+") is None
+    with pytest.raises(ValueError):
+        MultiPatternMatcher([Rule("EMPTY", "", regex=r"x*")])
+
+
+def _parses(url):
+    try:
+        rules.apply_rules_url(url)
+    except ValueError:  # urlparse rejects a few fuzz URLs
+        return False
+    return True
+
+
+def test_apply_rules_batch_matches_per_url_rules():
+    urls = pd.read_csv("data/combined_dataset.csv")["url"].dropna().astype(str).tolist() + _fuzz_urls(5_000, seed=1)
+    urls = [url for url in urls if _parses(url)]
+    batch = rules.apply_rules_batch(urls)
+    assert batch.results == [rules.apply_rules_url(url) for url in urls]
+    assert batch.hits.shape == (len(urls), len(batch.rule_ids))
+    assert batch.hits[:, batch.rule_ids.index("SUSPICIOUS_KEYWORD")].tolist() == [
+        "SUSPICIOUS_KEYWORD" in r["rules_triggered"] for r in batch.results
+    ]
+    with pytest.raises(ValueError):
+        rules.apply_rules_batch(["http://ok.com/", "http://[::1/"])
+
+
+def test_scan_batch_matches_scan():
+    rule_set = [
+        Rule("A", "", literals=("abcd", "a b")),
+        Rule("B", "", regex=r"bcd"),
+        Rule("D", "", regex=r"a\w{5}"),
+        Rule("F", "", regex=r"k"),
+        Rule("S", "", regex=r"is\d"),
+    ]
+    # K, İ and ſ match ASCII letters under IGNORECASE; the prefilter must not miss them
+    texts = ["abcd", "xabcdx", "A B", "aXXXXX", "", "K", "İſ1", "ABCDé", "lone \udcff surrogate"]
+    for lowercase in (True, False):
+        matcher = MultiPatternMatcher(rule_set, lowercase=lowercase)
+        hits, timed_out = matcher.scan_batch(texts)
+        assert not timed_out.any()
+        assert [list(row.nonzero()[0]) for row in hits] == [matcher.scan(t) for t in texts]
+        for t in texts:
+            subject = t.lower() if lowercase else t
+            expected = [i for i, rule in enumerate(rule_set) if rule.regex and re.search(rule.regex, subject, re.I)]
+            assert [i for i in matcher.scan(t) if rule_set[i].regex] == expected, t
+
+
+def test_analyze_urls_batch_rules_path_is_equivalent(monkeypatch):
+    from core.pipeline import analyze_urls
+
+    urls = pd.read_csv("data/combined_dataset.csv")["url"].dropna().astype(str).tolist()[:300] + ["http://[::1/"]
+    monkeypatch.setattr(rules, "BATCH_RULES_MIN_URLS", 10**9)
+    per_url = analyze_urls(urls)
+    monkeypatch.setattr(rules, "BATCH_RULES_MIN_URLS", 1)
+    assert analyze_urls(urls[:-1]) == per_url[:-1]
+    assert analyze_urls(urls) == per_url  # a rejected URL sends the batch down the per-URL path
+
+
+def test_rule_results_fall_back_per_url_when_the_batch_path_fails(monkeypatch):
+    urls = _fuzz_urls(50, seed=3)
+    urls = [url for url in urls if _parses(url)]
+    expected = [rules.apply_rules_url(url) for url in urls]
+
+    def broken(_urls):
+        raise AttributeError("'StringMethods' object has no attribute 'isascii'")
+
+    monkeypatch.setattr(rules, "BATCH_RULES_MIN_URLS", 1)
+    monkeypatch.setattr(rules, "apply_rules_batch", broken)
+    assert rules._rule_results(urls) == expected
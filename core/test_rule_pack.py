@@ -0,0 +1,140 @@
+import json
+import re
+import time
+
+import pandas as pd
+import pytest
+
+import core.rulepack as rulepack
+from core.rules import apply_rules_batch, apply_rules_url
+from detector import SIGNATURE_SET, detect_attack
+
+# detector.PATTERNS as they were hard-coded before rule packs
+LEGACY_SIGNATURES = {
+    "SQL Injection": re.compile(r"(union|select|sleep|drop|--|'\s*or)", re.I),
+    "XSS": re.compile(r"(<script|javascript:|onerror=|onload=)", re.I),
+    "Directory Traversal": re.compile(r"(\.\./|%2e%2e%2f)", re.I),
+    "Command Injection": re.compile(r"(;|&&|\|).*(ls|cat|pwd|whoami)", re.I),
+    "SSRF": re.compile(r"(169\.254\.169\.254|metadata)", re.I),
+}
+
+
+@pytest.fixture
+def restore_pack():
+    saved = rulepack.get_rule_pack()
+    yield
+    rulepack._activate(saved, profile=False)
+    saved.reset_counters()
+
+
+def _write(tmp_path, rules, name="pack.json", sets=None):
+    path = tmp_path / name
+    path.write_text(json.dumps({"name": "test", "version": 2, "sets": sets or {}, "rules": rules}))
+    return path
+
+
+def test_detect_attack_matches_legacy_signatures():
+    urls = pd.read_csv("data/combined_dataset.csv")["url"].dropna().astype(str).tolist()
+    urls += ["/a?x=1;CAT /etc/passwd", "/%2E%2E%2Fetc", "http://169.254.169.254/latest/META", "/q?s=' OR 1", "/K;ls"]
+    for url in urls:
+        expected = [name for name, pattern in LEGACY_SIGNATURES.items() if pattern.search(url)]
+        assert detect_attack(url) == (expected[0] if expected else "Normal", expected), url
+
+
+@pytest.mark.parametrize(
+    "rule, message",
+    [
+        ({"id": "X", "pattern": "(", "explanation": ""}, "bad pattern"),
+        ({"id": "X", "pattern": "a*", "explanation": ""}, "empty string"),
+        ({"id": "X", "pattern": "a", "literals": ["a"]}, "exactly one"),
+        ({"id": "X", "literals": []}, "literals"),
+        ({"id": "X", "host": "tld"}, "tlds"),
+        ({"id": "X", "literals": ["a"], "severity": "urgent"}, "severity"),
+        ({"id": "X", "pattern": "(a+)+b"}, "super-linearly"),
+        ({"id": "X", "pattern": r"^\d{3}\w"}, "prefilter"),
+        ({"id": "X", "literals": ["a"], "prefilter": ["a"]}, "prefilter"),
+    ],
+)
+def test_invalid_rules_are_rejected(tmp_path, rule, message):
+    with pytest.raises(ValueError, match=message):
+        rulepack.load_rule_pack(_write(tmp_path, [rule]))
+
+
+def test_reload_swaps_pack_and_keeps_old_one_on_error(tmp_path, restore_pack):
+    good = _write(
+        tmp_path,
+        [
+            {"id": "EVIL", "literals": ["evil"], "explanation": "evil"},
+            {"id": "BAD_TLD", "host": "tld", "tlds": ["zz"], "explanation": "TLD .{tld}"},
+        ],
+    )
+    pack = rulepack.reload_rule_pack(good)
+    assert rulepack.get_rule_pack() is pack and pack.version == 2
+    assert apply_rules_url("http://evil.zz/") == {"rules_triggered": ["EVIL", "BAD_TLD"], "explanations": ["evil", "TLD .zz"]}
+
+    broken = _write(tmp_path, [{"id": "A", "literals": ["a"]}, {"id": "A", "literals": ["b"]}], "broken.json")
+    with pytest.raises(ValueError, match="Duplicate rule id"):
+        rulepack.reload_rule_pack(broken)
+    assert rulepack.get_rule_pack() is pack
+
+
+def test_counters_and_profiling(restore_pack):
+    pack = rulepack.reload_rule_pack(rulepack.RULE_PACK_PATH)
+    pack.set_profile(True)
+    for url in ["http://1.2.3.4/login", "/x?id=' or 1=1", "https://example.com/"]:
+        apply_rules_url(url)
+    rows = {row["rule"]: row for row in pack.rule_set("url").stats()}
+
+    assert rows["SUSPICIOUS_KEYWORD"]["hits"] == 1
+    assert rows["IP_BASED_URL"]["hits"] == 1 and rows["IP_BASED_URL"]["runs"] == 3
+    assert rows["SQL_INJECTION_PATTERN"]["hits"] == 1 and rows["SQL_INJECTION_PATTERN"]["runs"] >= 1
+    assert rows[rulepack.LITERAL_SCAN]["runs"] == 3 and rows[rulepack.LITERAL_SCAN]["total_ms"] > 0
+
+    pack.reset_counters()
+    assert all(row["hits"] == row["runs"] == 0 for row in pack.stats())
+
+
+def test_adversarial_urls_stay_fast():
+    # ";" * n made the legacy Command Injection signature quadratic
+    for url in ["/?" + ";" * 20_000, "/?q=" + "'" + " " * 20_000, "/" + "|" * 20_000 + "x"]:
+        start = time.perf_counter()
+        detect_attack(url)
+        apply_rules_url(url)
+        assert time.perf_counter() - start < 0.1
+
+
+def test_exhausted_budget_reports_rule_timeout(tmp_path, restore_pack):
+    rules = [
+        {"id": "FIRST", "pattern": "ab", "explanation": "first"},
+        {"id": "SECOND", "pattern": "bc", "explanation": "second"},
+        {"id": "BAD_TLD", "host": "tld", "tlds": ["zz"], "explanation": "TLD .{tld}"},
+    ]
+    url = "http://x.zz/abc"
+    pack = rulepack.reload_rule_pack(_write(tmp_path, rules, sets={"url": {"budget_chars": len(url) + 5}}))
+
+    # The budget fits one scan of the URL: the second regex is skipped, host rules still run
+    out = apply_rules_url("http://x.zz/abc")
+    assert out["rules_triggered"] == ["FIRST", "BAD_TLD", rulepack.RULE_TIMEOUT.name]
+    batch = apply_rules_batch(["http://x.zz/abc", "http://x.zz/"])
+    assert batch.timed_out.tolist() == [True, False]
+    assert batch.results[0] == out and batch.results[1]["rules_triggered"] == ["BAD_TLD"]
+    assert {row["rule"]: row["hits"] for row in pack.stats()}[rulepack.RULE_TIMEOUT.id] == 2
+
+    # Counted, not timed: a budget smaller than the URL skips even the first regex
+    rulepack.reload_rule_pack(_write(tmp_path, rules, sets={"url": {"budget_chars": len(url) - 1}}))
+    assert apply_rules_url(url)["rules_triggered"] == ["BAD_TLD", rulepack.RULE_TIMEOUT.name]
+    with pytest.raises(ValueError, match="budget_chars"):
+        rulepack.reload_rule_pack(_write(tmp_path, rules, sets={"url": {"budget_ms": 50}}))
+
+
+def test_single_regex_is_linear_without_any_budget(tmp_path, restore_pack):
+    # With one regex the budget never gets a say: the load-time rewrite alone must
+    # keep it linear (the pattern as written takes ~0.3 s on this input)
+    rules = [{"id": "CMD", "pattern": r"(;|&&|\|).*(ls|cat|pwd|whoami)", "explanation": "cmd"}]
+    rulepack.reload_rule_pack(_write(tmp_path, rules, sets={"url": {"budget_chars": None}}))
+    url = "/?" + ";" * 2_998
+    assert len(url) == 3_000
+    start = time.perf_counter()
+    assert apply_rules_url(url)["rules_triggered"] == []
+    assert apply_rules_url(url + "ls")["rules_triggered"] == ["CMD"]
+    assert time.perf_counter() - start < 0.05
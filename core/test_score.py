@@ -0,0 +1,43 @@
+import random
+
+from core.schema import Event, Finding
+from core.score import compute_batch_risk, compute_risk, rank
+
+RULES = ["SQL_INJECTION_PATTERN", "XSS_PATTERN", "PATH_TRAVERSAL", "SUSPICIOUS_TLD"]
+
+
+def test_batch_risk_matches_compute_risk():
+    rng = random.Random(0)
+    probs = [rng.choice([rng.random(), 0.0, 0.25, 0.5, 1.0, 5 / 12]) for _ in range(2_000)]
+    rules_list = [rng.sample(RULES, rng.randint(0, 4)) for _ in probs]
+
+    assert compute_batch_risk(probs, rules_list) == [compute_risk(p, r) for p, r in zip(probs, rules_list)]
+    assert compute_batch_risk([], []) == []
+
+
+def test_batch_risk_counts_repeated_rule_names_like_compute_risk():
+    # ABUSED_TLD_HIGH and ABUSED_TLD_MEDIUM both report ABUSED_TLD
+    rules_list = [["ABUSED_TLD", "ABUSED_TLD"], ["XSS_PATTERN", "XSS_PATTERN", "ABUSED_TLD"], ["ABUSED_TLD"]]
+    probs = [0.55, 0.3, 0.55]
+
+    assert compute_batch_risk(probs, rules_list) == [compute_risk(p, r) for p, r in zip(probs, rules_list)]
+    assert compute_batch_risk(probs, rules_list)[0]["risk_score"] == compute_risk(0.55, ["ABUSED_TLD"])["risk_score"] + 5
+
+
+def test_rank_limit_is_the_head_of_the_full_ranking():
+    rng = random.Random(1)
+    events = [Event(url=f"http://a.test/{i}", source_ip=rng.choice(["10.0.0.1", "10.0.0.2", None])) for i in range(60)]
+    severities = ["critical", "high", "medium", "low", "unknown"]
+    findings = [Finding("rule", rng.choice(severities), rng.choice([0.1, 0.5, 0.9]), e) for e in events[:20]]
+    ml_results = [
+        {"label": rng.choice(["Normal", "SQLi"]), "score": rng.choice([0.5, 0.9]), "severity": rng.choice(severities), "event": e}
+        for e in events[20:]
+    ]
+    correlations = {"multi_stage": {"10.0.0.1": True}, "repeated": {"10.0.0.2": {"SQLi": 2}}}
+
+    ranked = rank(findings, ml_results, correlations)
+    assert len(ranked) == 20 + sum(r["label"] != "Normal" for r in ml_results)
+    keys = [(-{"critical": 3, "high": 2, "medium": 1}.get(f.severity, 0), -f.confidence) for f in ranked]
+    assert keys == sorted(keys)
+    for k in (0, 1, 7, 100):
+        assert rank(findings, ml_results, correlations, limit=k) == ranked[:k]
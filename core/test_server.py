@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from core.pipeline import analyze_urls
+from core.server import MicroBatcher, ScoringServer
+
+URLS = ["http://test.com/index.php?id=1' OR 1=1--", "https://www.google.com", "http://192.168.1.10/login"]
+
+
+def test_concurrent_submissions_are_coalesced_and_split_back():
+    batches = []
+
+    def score(urls):
+        batches.append(list(urls))
+        return [{"url": u} for u in urls]
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch=100, max_delay=0.05).start()
+        requests = [[f"u{i}"] for i in range(10)] + [["a", "b", "c"]]
+        results = await asyncio.gather(*(batcher.submit(r) for r in requests))
+        await batcher.stop()
+        return requests, results
+
+    requests, results = asyncio.run(run())
+    assert len(batches) == 1 and len(batches[0]) == 13
+    assert [[r["url"] for r in res] for res in results] == requests
+
+
+def test_http_score_single_and_batch():
+    async def call(port, method, path, payload=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        writer.write(head.encode() + body)
+        raw = await reader.read()
+        writer.close()
+        head, _, data = raw.partition(b"\r\n\r\n")
+        return int(head.split(b" ")[1]), json.loads(data)
+
+    async def run():
+        batcher = MicroBatcher(analyze_urls, max_delay=0.001).start()
+        listener = await asyncio.start_server(ScoringServer(batcher).handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return (
+                await call(port, "POST", "/score", {"url": URLS[0]}),
+                await call(port, "POST", "/score", {"urls": URLS}),
+                await call(port, "POST", "/score", {"urls": "nope"}),
+                await call(port, "GET", "/missing"),
+            )
+        finally:
+            listener.close()
+            await batcher.stop()
+
+    single, batch, bad, missing = asyncio.run(run())
+    expected = analyze_urls(URLS)
+    assert single == (200, expected[0])
+    assert batch == (200, expected)
+    assert bad[0] == 400 and missing[0] == 404
@@ -0,0 +1,86 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+import core.jobs as jobs
+import core.ml as ml
+from core.jobs import AnalysisJob
+from core.frames import frame_records
+from core.pipeline import analyze_urls, analyze_urls_frame, analyze_urls_iter
+
+URLS = [
+    "http://test.com/index.php?id=1' OR 1=1--",
+    "https://www.google.com",
+    "/search?q=<script>alert(1)</script>",
+    "http://192.168.1.10/login",
+    "",
+]
+
+
+class CountingSource:
+    """Iterator that records how far the consumer has pulled."""
+
+    def __init__(self, urls):
+        self._it = iter(urls)
+        self.pulled = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        url = next(self._it)
+        self.pulled += 1
+        return url
+
+
+def test_predict_urls_iter_matches_batch_and_reads_one_chunk_ahead():
+    urls = [f"{u}#{i}" for i, u in enumerate(URLS * 5)]
+    source = CountingSource(urls)
+    stream = ml.predict_urls_iter(source, chunk_size=4, use_cache=False)
+
+    first = next(stream)
+    assert source.pulled == 4
+    results = [first, *stream]
+    assert results == ml.predict_urls(urls, use_cache=False)
+
+
+def test_analyze_urls_iter_is_lazy_and_ordered():
+    urls = [f"{u}#{i}" for i, u in enumerate(URLS * 3)]
+    source = CountingSource(itertools.chain(urls, itertools.repeat("never-read")))
+    head = list(itertools.islice(analyze_urls_iter(source, chunk_size=5), len(urls)))
+
+    assert source.pulled == len(urls)
+    assert [r["url"] for r in head] == [u.strip() for u in urls]
+    assert head == analyze_urls(urls)
+
+
+def test_analysis_job_publishes_rows_chunk_by_chunk(monkeypatch):
+    urls = [f"{u}#{i}" for i, u in enumerate(URLS * 3)]
+    release = threading.Event()
+    chunks = jobs.analyze_urls_chunks
+
+    def gated(urls, chunk_size, as_frame):
+        for n, chunk in enumerate(chunks(urls, chunk_size, as_frame=True)):
+            if n == 1:
+                release.wait(5)
+            yield chunk
+
+    monkeypatch.setattr(jobs, "analyze_urls_chunks", gated)
+    job = AnalysisJob(urls, chunk_size=4).start()
+    while len(job.frame()) < 4:
+        time.sleep(0.01)
+
+    progress = job.progress()
+    assert (progress.done, progress.total, progress.finished) == (4, len(urls), False)
+    assert progress.rows_per_sec > 0 and progress.eta_s > 0
+    release.set()
+    assert job.wait(5)
+    assert frame_records(job.frame()) == frame_records(analyze_urls_frame(urls))
+    assert job.progress().fraction == 1.0 and job.progress().error is None
+
+
+def test_iter_chunks_rejects_bad_size():
+    with pytest.raises(ValueError):
+        list(ml.iter_chunks(URLS, 0))
@@ -0,0 +1,37 @@
+import core.rules as rules
+from core.pipeline import analyze_urls
+from core.timing import PIPELINE_TIMER, StageTimer
+
+URLS = ["http://test.com/index.php?id=1' OR 1=1--", "https://www.google.com", "http://192.168.1.10/login"]
+
+
+def test_disabled_timer_returns_stage_function_unchanged():
+    timer = StageTimer(enabled=False)
+    assert timer.timed("rules", rules.apply_rules_url) is rules.apply_rules_url
+    assert timer.snapshot() == []
+
+
+def test_percentiles_come_from_histogram_buckets():
+    timer = StageTimer(enabled=True)
+    for seconds in [0.001] * 98 + [0.5, 2.0]:
+        timer.record("stage", seconds)
+    (row,) = timer.snapshot()
+    assert row["calls"] == 100
+    assert 1.0 <= row["p50_ms"] < 1.6
+    assert 500 <= row["p99_ms"] < 800
+    assert row["max_ms"] == 2000.0
+    assert sum(b["calls"] for b in timer.histogram("stage")) == 100
+
+
+def test_analyze_urls_records_every_stage(monkeypatch):
+    monkeypatch.setattr(PIPELINE_TIMER, "enabled", True)
+    PIPELINE_TIMER.reset()
+    try:
+        analyze_urls(URLS)
+        stats = {row["stage"]: row for row in PIPELINE_TIMER.snapshot()}
+    finally:
+        PIPELINE_TIMER.reset()
+
+    assert set(stats) == {"known_urls", "ml", "rules", "risk", "explain", "analyze_urls"}
+    assert stats["ml"]["calls"] == 1 and stats["ml"]["items"] == len(URLS)
+    assert stats["rules"]["calls"] == stats["explain"]["calls"] == len(URLS)
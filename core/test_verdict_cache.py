@@ -0,0 +1,36 @@
+import core.ml as ml
+from core.cache import VerdictCache
+
+
+def test_lru_eviction_and_counters():
+    cache = VerdictCache(maxsize=2)
+    cache.store("m1", ["a", "b"], [0.1, 0.2])
+    assert cache.get("m1", "a") == 0.1  # "a" becomes most recent
+    cache.store("m1", ["c"], [0.3])  # evicts "b"
+
+    found, missing = cache.lookup("m1", ["a", "b", "c", "c"])
+    assert found == {"a": 0.1, "c": 0.3}
+    assert missing == ["b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (4, 1, 1, 2)
+
+    # A different model identity never sees these entries
+    assert cache.lookup("m2", ["a"]) == ({}, ["a"])
+
+
+def test_predict_urls_serves_repeats_from_cache(monkeypatch):
+    cache = VerdictCache(maxsize=100)
+    monkeypatch.setattr(ml, "VERDICT_CACHE", cache)
+    urls = ["https://www.google.com", "/home", "https://www.google.com", "/home", "/login?id=1 OR 1=1"]
+
+    uncached = ml.predict_urls(urls, use_cache=False)
+    assert ml.predict_urls(urls) == uncached
+    assert cache.stats()["misses"] == 3 and cache.stats()["hits"] == 2
+
+    assert ml.predict_urls(urls) == uncached
+    assert cache.stats()["misses"] == 3 and cache.stats()["hits"] == 7
+
+    # Reloading the model gives it a new identity, so old verdicts are not reused
+    monkeypatch.setattr(ml, "_MODEL_CACHE", {})
+    ml.predict_urls(urls)
+    assert cache.stats()["misses"] == 6
@@ -0,0 +1,138 @@
+"""
+Per-stage latency counters for core.pipeline.
+
+Stages are timed by wrapping the stage function once per analyze_urls call:
+PIPELINE_TIMER.timed(name, fn) hands back fn itself while the timer is
+disabled, so the per-URL loop pays nothing. Enabled, every call adds its
+latency to a fixed log-spaced histogram (no per-call allocation), from which
+the Performance page reads counts and approximate percentiles.
+
+Enable with PIPELINE_TIMER.enable(), or URL_PIPELINE_TIMING=1 in the environment.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_right
+from functools import wraps
+from typing import Any, Callable, Dict, List, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bucket edges in seconds: 1us .. 10s, 5 buckets per decade; one overflow bucket follows
+BUCKET_EDGES: List[float] = [10 ** (exp / 5) for exp in range(-30, 6)]
+
+
+class StageStats:
+    __slots__ = ("calls", "items", "total", "min", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.items = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_EDGES) + 1)
+
+    def add(self, seconds: float, items: int) -> None:
+        self.calls += 1
+        self.items += items
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_right(BUCKET_EDGES, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the q-th percentile call (seconds), capped at max."""
+        if not self.calls:
+            return 0.0
+        rank = q / 100 * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                edge = BUCKET_EDGES[i] if i < len(BUCKET_EDGES) else self.max
+                return min(edge, self.max)
+        return self.max
+
+
+class StageTimer:
+    """Thread-safe per-stage counters; shared by Streamlit session threads."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def record(self, stage: str, seconds: float, items: int = 1) -> None:
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                stats = self._stats[stage] = StageStats()
+            stats.add(seconds, items)
+
+    def timed(self, stage: str, fn: F) -> F:
+        """fn unchanged while disabled; otherwise a wrapper recording each call under stage."""
+        if not self.enabled:
+            return fn
+        clock = time.perf_counter
+        record = self.record
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(stage, clock() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One row per stage, in first-seen order: counts, totals and latencies in ms."""
+        with self._lock:
+            rows = []
+            for stage, s in self._stats.items():
+                rows.append(
+                    {
+                        "stage": stage,
+                        "calls": s.calls,
+                        "items": s.items,
+                        "total_s": s.total,
+                        "mean_ms": s.total / s.calls * 1000 if s.calls else 0.0,
+                        "p50_ms": s.percentile(50) * 1000,
+                        "p90_ms": s.percentile(90) * 1000,
+                        "p99_ms": s.percentile(99) * 1000,
+                        "max_ms": s.max * 1000,
+                    }
+                )
+            return rows
+
+    def histogram(self, stage: str) -> List[Dict[str, Any]]:
+        """Non-empty buckets of one stage as {"le_ms": upper edge, "calls": n}."""
+        with self._lock:
+            stats = self._stats.get(stage)
+            if stats is None:
+                return []
+            return [
+                {"le_ms": (BUCKET_EDGES[i] if i < len(BUCKET_EDGES) else float("inf")) * 1000, "calls": n}
+                for i, n in enumerate(stats.buckets)
+                if n
+            ]
+
+
+PIPELINE_TIMER = StageTimer(enabled=os.environ.get("URL_PIPELINE_TIMING") == "1")
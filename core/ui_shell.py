@@ -2,8 +2,13 @@ from __future__ import annotations
 
 from base64 import b64encode
 from pathlib import Path
+from typing import TYPE_CHECKING
+
 import streamlit as st
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 BASE_CSS = Path("assets/style.css")
 BG_IMAGE = Path("assets/Bg-1.jpg")
@@ -97,3 +102,53 @@ def top_navbar(active: str = "Home") -> None:
         else:
             st.session_state.show_auth = True
             st.session_state["post_login_target"] = None
+
+
+PROGRESS_REFRESH_S = 1.0
+
+
+def _format_eta(seconds: float | None) -> str:
+    if seconds is None:
+        return "estimating…"
+    seconds = int(round(seconds))
+    return f"{seconds // 60}m {seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+
+def analysis_frame() -> "pd.DataFrame | None":
+    """
+    Results of the latest upload as an analyze_urls_frame frame: all rows once
+    its core.jobs.AnalysisJob has finished, the rows done so far while it
+    runs, or None before any upload.
+    """
+    job = st.session_state.get("analysis_job")
+    if job is None:
+        return st.session_state.get("analysis_frame")
+    if not job.finished:
+        return job.frame()
+    st.session_state["analysis_frame"] = job.frame()
+    st.session_state["analysis_error"] = job.error
+    st.session_state["analysis_job"] = None
+    return st.session_state["analysis_frame"]
+
+
+def analysis_running() -> bool:
+    job = st.session_state.get("analysis_job")
+    return job is not None and not job.finished
+
+
+@st.fragment(run_every=PROGRESS_REFRESH_S)
+def analysis_progress() -> None:
+    """Progress bar of the running upload analysis; reruns the page once the job finishes."""
+    job = st.session_state.get("analysis_job")
+    if job is None:
+        return
+    progress = job.progress()
+    if progress.finished:
+        st.rerun()
+    st.progress(
+        progress.fraction,
+        text=(
+            f"Analyzed {progress.done:,} of {progress.total:,} rows · "
+            f"{progress.rows_per_sec:,.0f} rows/s · ETA {_format_eta(progress.eta_s)}"
+        ),
+    )
@@ -0,0 +1,126 @@
+"""
+Parse-once URL representation shared by the pipeline stages. ParsedURL
+computes each view (lowercase, urlparse parts, rule host) on first access;
+parts follow the numeric features' reading and host follows apply_rules_url's.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import ParseResult, urlparse
+
+# scheme://netloc as urlsplit sees it; anything unusual falls back to urlparse
+_SCHEME_PREFIX = r"(?:[A-Za-z][A-Za-z0-9+.\-]*:)?//"
+_NETLOC = re.compile(_SCHEME_PREFIX + r"([^/?#]*)")
+_URLSPLIT_STRIPPED = re.compile(r"^[\x00-\x20]|[\t\r\n]")
+
+
+def _safe_parse(url: str) -> Optional[ParseResult]:
+    if not isinstance(url, str):
+        return None
+    if url.startswith("/"):
+        url = f"http://example.local{url}"
+    try:
+        return urlparse(url)
+    except Exception:
+        return None
+
+
+def _host(target: str) -> str:
+    """
+    urlparse(...).netloc for apply_rules_url's input: target itself when it has
+    "://", otherwise target appended to http://example.local.
+    """
+    if "://" not in target:
+        end = len(target)
+        for sep in "/?#":
+            i = target.find(sep)
+            if 0 <= i < end:
+                end = i
+        netloc = "example.local" + target[:end]
+    else:
+        m = _NETLOC.match(target)
+        netloc = m.group(1) if m else ""
+    if not netloc.isascii() or "[" in netloc or "]" in netloc or _URLSPLIT_STRIPPED.search(target):
+        # Whitespace stripping, IPv6 brackets and IDNA checks: let urlsplit decide
+        return urlparse(target if "://" in target else f"http://example.local{target}").netloc
+    return netloc
+
+
+def _tld(host: str) -> str:
+    host = host.split(":")[0] if host else ""
+    if "." not in host:
+        return ""
+    return host.rsplit(".", 1)[-1].lower()
+
+
+class ParsedURL:
+    """One URL and its lazily computed views."""
+
+    __slots__ = ("raw", "_lower", "_parts", "_host")
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self._lower: Optional[str] = None
+        self._parts: Union[ParseResult, bool, None] = None  # False: cannot be parsed
+        self._host: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return f"ParsedURL({self.raw!r})"
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.raw.lower()
+        return self._lower
+
+    @property
+    def parts(self) -> Optional[ParseResult]:
+        """urlparse result for the numeric features, or None when the URL cannot be parsed."""
+        if self._parts is None:
+            self._parts = _safe_parse(self.raw) or False
+        return self._parts or None
+
+    @property
+    def netloc(self) -> str:
+        parts = self.parts
+        return parts.netloc if parts is not None else ""
+
+    @property
+    def path(self) -> str:
+        parts = self.parts
+        return parts.path if parts is not None else ""
+
+    @property
+    def query(self) -> str:
+        parts = self.parts
+        return parts.query if parts is not None else ""
+
+    @property
+    def host(self) -> str:
+        """The netloc host rules see (see _host)."""
+        if self._host is None:
+            self._host = _host(self.raw)
+        return self._host
+
+    @property
+    def tld(self) -> str:
+        return _tld(self.host)
+
+
+def parse_urls(urls: Iterable[str]) -> List[ParsedURL]:
+    """One ParsedURL per input URL string, shared between equal URLs."""
+    seen: Dict[str, ParsedURL] = {}
+    out: List[ParsedURL] = []
+    for url in urls:
+        parsed = seen.get(url)
+        if parsed is None:
+            parsed = seen[url] = ParsedURL(url)
+        out.append(parsed)
+    return out
+
+
+def url_text(url: Any) -> Any:
+    """The URL string of url, which may be a ParsedURL; anything else is returned as is."""
+    return url.raw if isinstance(url, ParsedURL) else url
@@ -1,125 +1,35 @@
 from __future__ import annotations
 
+import os
+
+import numpy as np
 import pandas as pd
-import re
-import math
-from collections import Counter
 from pathlib import Path
-from urllib.parse import urlparse
-from scipy.sparse import hstack, csr_matrix
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-
-def _safe_parse(url: str):
-    if not isinstance(url, str):
-        return None
-    if url.startswith("/"):
-        url = f"http://example.local{url}"
-    try:
-        return urlparse(url)
-    except Exception:
-        return None
-
-
-def _count_digits(text: str) -> int:
-    return sum(ch.isdigit() for ch in text or "")
-
-
-def _count_special(text: str) -> int:
-    return len(re.findall(r"[^a-zA-Z0-9]", text or ""))
-
-
-def _count_keywords(text: str, keywords) -> int:
-    lowered = (text or "").lower()
-    return sum(kw in lowered for kw in keywords)
-
-
-def _has_ip(domain: str) -> int:
-    if not domain:
-        return 0
-    # Simple IPv4 check
-    parts = domain.split(".")
-    if len(parts) != 4:
-        return 0
-    for part in parts:
-        if not part.isdigit():
-            return 0
-        val = int(part)
-        if val < 0 or val > 255:
-            return 0
-    return 1
-
-
-def _tld_risk(domain: str) -> int:
-    if not domain or "." not in domain:
-        return 1
-    tld = domain.rsplit(".", 1)[-1].lower()
-    if tld in {"tk", "ml", "ga", "cf"}:
-        return 3
-    if tld in {"ru", "cn", "xyz"}:
-        return 2
-    return 1
-
-
-def _entropy(text: str) -> float:
-    if not text:
-        return 0.0
-    counts = Counter(text)
-    length = len(text)
-    entropy = 0.0
-    for c in counts.values():
-        p = c / length
-        entropy -= p * math.log2(p)
-    return entropy
+from typing import Optional, Tuple
+
+from core.numeric_features import (
+    NUMERIC_FEATURE_COLUMNS,
+    _numeric_matrix_with_mask,
+    combine_feature_blocks,
+)
+
+# sklearn is imported inside the functions that need it; the numeric feature
+# path used by core.ml's compiled scorer lives in core.numeric_features.
 
 
 def extract_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Given a DataFrame with columns ['url', 'label'], return a DataFrame
     with engineered numeric features and the label.
+    Rows whose URL cannot be parsed are dropped.
     """
-    suspicious_keywords = ["login", "verify", "update", "secure", "admin", "cmd", "wp", "shell", "exec"]
-    feature_rows = []
-    for _, row in df.iterrows():
-        url = row.get("url", "")
-        parsed = _safe_parse(url)
-        if not parsed:
-            continue
-
-        domain = parsed.netloc or ""
-        path = parsed.path or ""
-        query = parsed.query or ""
-        url_len = len(url)
-        num_digits = _count_digits(url)
-        num_special = _count_special(url)
-        num_upper = sum(ch.isupper() for ch in url or "")
-        keyword_count = _count_keywords(url, suspicious_keywords)
-        has_ip = _has_ip(domain)
-        tld_risk = _tld_risk(domain)
-
-        safe_div = lambda num: (num / url_len) if url_len else 0.0
-
-        feature_rows.append(
-            {
-                "url_length": url_len,
-                "domain_length": len(domain),
-                "path_length": len(path),
-                "query_length": len(query),
-                "num_digits": num_digits,
-                "num_special_chars": num_special,
-                "num_subdomains": max(0, domain.count(".") - 1) if domain else 0,
-                "digit_ratio": safe_div(num_digits),
-                "symbol_ratio": safe_div(num_special),
-                "uppercase_ratio": safe_div(num_upper),
-                "shannon_entropy": _entropy(url),
-                "suspicious_keyword_count": keyword_count,
-                "has_ip_address": has_ip,
-                "tld_risk_score": tld_risk,
-                "label": row.get("label"),
-            }
-        )
+    urls = df["url"].tolist() if "url" in df.columns else [""] * len(df)
+    labels = df["label"].tolist() if "label" in df.columns else [None] * len(df)
 
-    return pd.DataFrame(feature_rows)
+    matrix, valid = _numeric_matrix_with_mask(urls)
+    out = pd.DataFrame(matrix[valid], columns=NUMERIC_FEATURE_COLUMNS)
+    out["label"] = [label for label, ok in zip(labels, valid) if ok]
+    return out
 
 
 def build_tfidf_features(urls: pd.Series):
@@ -127,6 +37,8 @@ def build_tfidf_features(urls: pd.Series):
     Build character-level TF-IDF features for a series of URLs.
     Returns (sparse_matrix, fitted_vectorizer).
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     vectorizer = TfidfVectorizer(
         analyzer="char",
         ngram_range=(3, 5),
@@ -137,11 +49,91 @@ def build_tfidf_features(urls: pd.Series):
     return X, vectorizer
 
 
-def build_feature_matrix(processed_dir: Path = Path("data/processed")):
+class HashedNgramVectorizer:
+    """
+    Stateless alternative to the fitted TF-IDF vocabulary.
+    Character n-grams are hashed into a fixed number of buckets, so transform needs
+    no per-process vocabulary; the only state is an optional idf table (one float
+    per bucket) fitted on the training split. After save_idf the table lives in
+    its own .npy file: pickles carry only the path and unpickling mmaps it.
+    """
+
+    def __init__(self, n_features: int = 2**15, ngram_range: Tuple[int, int] = (3, 5), use_idf: bool = True):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.use_idf = use_idf
+        self.idf_: Optional[np.ndarray] = None
+        self.idf_path: Optional[str] = None
+
+    def save_idf(self, path: Path) -> Path:
+        """Write idf_ to path (temp file + rename: it may be mapped) and pickle by reference from now on."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, np.asarray(self.idf_, dtype=np.float32))
+        os.replace(tmp, path)
+        self.idf_path = str(path)
+        return path
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if self.idf_path is not None:
+            state["idf_"] = None
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        self.idf_path = state.get("idf_path")
+        if self.idf_path is not None and self.idf_ is None:
+            self.idf_ = np.load(self.idf_path, mmap_mode="r")
+
+    def _counts(self, urls):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        hasher = HashingVectorizer(
+            analyzer="char",
+            ngram_range=self.ngram_range,
+            n_features=self.n_features,
+            alternate_sign=False,
+            norm=None,
+            lowercase=True,
+        )
+        return hasher.transform(pd.Series(urls).fillna("").astype(str))
+
+    def fit(self, urls) -> "HashedNgramVectorizer":
+        if self.use_idf:
+            counts = self._counts(urls)
+            doc_freq = np.bincount(counts.indices, minlength=self.n_features)
+            n_docs = counts.shape[0]
+            # Same smoothed idf as TfidfVectorizer
+            self.idf_ = (np.log((1 + n_docs) / (1 + doc_freq)) + 1.0).astype(np.float32)
+        return self
+
+    def transform(self, urls):
+        from sklearn.preprocessing import normalize
+
+        X = self._counts(urls)
+        if self.idf_ is not None:
+            X.data *= self.idf_[X.indices]
+        return normalize(X, norm="l2", copy=False)
+
+    def fit_transform(self, urls):
+        return self.fit(urls).transform(urls)
+
+
+FEATURE_MODES = ("tfidf", "hashed")
+
+
+def build_feature_matrix(processed_dir: Path = Path("data/processed"), feature_mode: str = "tfidf"):
     """
-    Build combined numeric + TF-IDF feature matrices for train/val/test splits.
+    Build combined numeric + text feature matrices for train/val/test splits.
+    feature_mode selects the text block: "tfidf" (fitted vocabulary) or "hashed"
+    (HashedNgramVectorizer).
     Returns: X_train, X_val, X_test, y_train, y_val, y_test, vectorizer
     """
+    if feature_mode not in FEATURE_MODES:
+        raise ValueError(f"Unknown feature_mode {feature_mode!r}; expected one of {FEATURE_MODES}")
+
     train_path = processed_dir / "train.csv"
     val_path = processed_dir / "val.csv"
     test_path = processed_dir / "test.csv"
@@ -160,13 +152,17 @@ def build_feature_matrix(processed_dir: Path = Path("data/processed")):
     y_test = test_num.pop("label")
 
     # TF-IDF (fit on train, apply to val/test)
-    tfidf_train, vectorizer = build_tfidf_features(train_df["url"])
+    if feature_mode == "hashed":
+        vectorizer = HashedNgramVectorizer()
+        tfidf_train = vectorizer.fit_transform(train_df["url"])
+    else:
+        tfidf_train, vectorizer = build_tfidf_features(train_df["url"])
     tfidf_val = vectorizer.transform(val_df["url"].fillna("").astype(str))
     tfidf_test = vectorizer.transform(test_df["url"].fillna("").astype(str))
 
     # Concatenate numeric + tfidf
-    X_train = hstack([csr_matrix(train_num.values), tfidf_train])
-    X_val = hstack([csr_matrix(val_num.values), tfidf_val])
-    X_test = hstack([csr_matrix(test_num.values), tfidf_test])
+    X_train = combine_feature_blocks(train_num.to_numpy(), tfidf_train)
+    X_val = combine_feature_blocks(val_num.to_numpy(), tfidf_val)
+    X_test = combine_feature_blocks(test_num.to_numpy(), tfidf_test)
 
     return X_train, X_val, X_test, y_train, y_val, y_test, vectorizer
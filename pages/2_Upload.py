@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-from core.pipeline import analyze_urls
-from core.ui_shell import apply_global_styles, top_navbar
+from core.jobs import AnalysisJob
+from core.ui_shell import analysis_progress, analysis_frame, analysis_running, apply_global_styles, top_navbar
 
 st.set_page_config(page_title="Upload", layout="wide", initial_sidebar_state="collapsed")
 
@@ -16,8 +16,10 @@ if not st.session_state.get("auth_ok"):
     st.switch_page("app.py")
 
 st.session_state.setdefault("upload_redirect", False)
-st.session_state.setdefault("analysis_rows", None)
+st.session_state.setdefault("analysis_frame", None)
 st.session_state.setdefault("uploaded_urls", None)
+st.session_state.setdefault("analysis_job", None)
+st.session_state.setdefault("analysis_file_id", None)
 
 st.markdown(
     """
@@ -25,7 +27,8 @@ st.markdown(
       <div class="card-title">Upload URL Access Logs</div>
       <div class="muted">
         Upload a CSV containing columns like <strong>url</strong>, <strong>status_code</strong>, <strong>source_ip</strong>, <strong>user_agent</strong>,
-        and optional labels/verdicts. Data stays local; once processed you'll be redirected to the dashboard.
+        and optional labels/verdicts. Data stays local. Large files are analyzed in chunks: open the dashboard on the
+        rows done so far at any time, or wait to be redirected once every row is processed.
       </div>
     </div>
     """,
@@ -34,21 +37,39 @@ st.markdown(
 
 file = st.file_uploader("CSV file", type="csv", label_visibility="collapsed")
 
-if file:
+if file and st.session_state.get("analysis_file_id") != file.file_id:
     try:
         df = pd.read_csv(file)
         if "url" not in df.columns:
             st.error("Uploaded CSV must contain a 'url' column.")
         else:
             urls = df["url"].dropna().astype(str).tolist()
-            analysis_rows = analyze_urls(urls)
+            previous = st.session_state.get("analysis_job")
+            if previous is not None:
+                previous.cancel()
+            # Runs in a worker thread; reruns and page switches do not stop it
+            st.session_state["analysis_job"] = AnalysisJob(urls).start()
+            st.session_state["analysis_file_id"] = file.file_id
             st.session_state["uploaded_urls"] = urls
-            st.session_state["analysis_rows"] = analysis_rows
-            st.session_state["upload_redirect"] = True
-            st.success("Logs uploaded successfully. Redirecting to dashboard...")
-            st.balloons()
+            st.session_state["analysis_frame"] = None
+            st.session_state["analysis_error"] = None
     except Exception as exc:
         st.error(f"Failed to process file: {exc}")
 
+if analysis_running():
+    analysis_progress()
+    if st.button("Open dashboard with results so far", type="secondary", use_container_width=True):
+        st.switch_page("pages/3_Dashboard.py")
+elif file and st.session_state.get("analysis_file_id") == file.file_id and st.session_state.get("analysis_job"):
+    # Finished since the last rerun: collect the rows, then redirect
+    frame = analysis_frame()
+    if st.session_state.get("analysis_error"):
+        st.error(f"Failed to process file: {st.session_state['analysis_error']} ({len(frame):,} rows analyzed)")
+    else:
+        st.session_state["upload_redirect"] = True
+        st.success("Logs uploaded successfully. Redirecting to dashboard...")
+        st.balloons()
+
 if st.session_state.get("upload_redirect"):
+    st.session_state["upload_redirect"] = False
     st.switch_page("pages/3_Dashboard.py")
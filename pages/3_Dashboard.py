@@ -2,7 +2,9 @@ import io
 import pandas as pd
 import plotly.express as px
 import streamlit as st
-from core.ui_shell import apply_global_styles, top_navbar
+import core.explain as explain
+from core.frames import rules_triggered, why_summaries
+from core.ui_shell import analysis_frame, analysis_progress, analysis_running, apply_global_styles, top_navbar
 
 PLOTLY_TEMPLATE = {
     "paper_bgcolor": "rgba(0,0,0,0)",
@@ -23,13 +25,19 @@ if not st.session_state.get("auth_ok"):
     st.session_state.show_auth = True
     st.switch_page("app.py")
 
-rows = st.session_state.get("analysis_rows")
-if not rows:
+frame = analysis_frame()
+if analysis_running():
+    # Partial results: the page shows the rows done when it loaded
+    analysis_progress()
+    if st.button("Load latest results", type="secondary"):
+        st.rerun()
+if frame is None or frame.empty:
     st.markdown(
         """
         <div class="glass-card stack">
           <div class="card-title">No data yet</div>
-          <div class="muted">Upload logs from the Upload page to populate this dashboard.</div>
+          <div class="muted">Upload logs from the Upload page to populate this dashboard (results appear here as
+          soon as the first chunk is analyzed).</div>
         </div>
         """,
         unsafe_allow_html=True,
@@ -46,23 +54,23 @@ def risk_icon(level: str) -> str:
     return "✅"
 
 
-display_df = pd.DataFrame(rows)
-display_df.rename(
-    columns={
-        "url": "URL",
-        "ml_label": "ML Label",
-        "ml_probability": "ML Probability",
-        "rules_triggered": "Rules Triggered",
-        "risk_score": "Risk Score",
-        "risk_level": "Risk Level",
-        "why_summary": "Why Summary",
-    },
-    inplace=True,
-)
+# Display names, used for the CSV export
+EXPORT_COLUMNS = {
+    "url": "URL",
+    "ml_label": "ML Label",
+    "ml_probability": "ML Probability",
+    "rules_triggered": "Rules Triggered",
+    "risk_score": "Risk Score",
+    "risk_level": "Risk Level",
+    "why_summary": "Why Summary",
+    "model_version": "Model Version",
+    "known_list": "Known List",
+    "occurrences": "Occurrences",
+}
 
-# Sort by highest risk first
-if not display_df.empty and "Risk Score" in display_df.columns:
-    display_df.sort_values(by="Risk Score", ascending=False, inplace=True)
+# The analyze_urls_frame columns are used as they are (see core.frames): one row per distinct URL,
+# "occurrences" counts its log lines. Sort by highest risk first
+display_df = frame.sort_values("risk_score", ascending=False, kind="stable")
 
 st.markdown(
     """
@@ -81,28 +89,35 @@ selected_levels = st.multiselect(
     default=["High", "Medium", "Low"],
     label_visibility="collapsed",
 )
-filtered_df = (
-    display_df[display_df["Risk Level"].str.title().isin(selected_levels)] if selected_levels else display_df.copy()
-)
+filtered_df = display_df[display_df["risk_level"].isin(selected_levels)] if selected_levels else display_df
+filtered_rules = rules_triggered(filtered_df)
+
+
+def export_csv() -> str:
+    """The filtered view as CSV; called by the download button on click, so summaries are built only on export."""
+    export_buf = io.StringIO()
+    export_df = filtered_df.drop(columns="rules_mask").assign(
+        rules_triggered=filtered_rules, why_summary=why_summaries(filtered_df)
+    )
+    export_df[list(EXPORT_COLUMNS)].rename(columns=EXPORT_COLUMNS).to_csv(export_buf, index=False)
+    return export_buf.getvalue()
 
-export_buf = io.StringIO()
-filtered_df.to_csv(export_buf, index=False)
 
 st.markdown(
     """
     <div class="glass-card stack">
       <div class="card-title">Controls</div>
-      <div class="muted">Export the current view or jump to successful attack details.</div>
+      <div class="muted">Export the current view or jump to successful attack details and pipeline timings.</div>
     </div>
     """,
     unsafe_allow_html=True,
 )
 
-control_cols = st.columns(2)
+control_cols = st.columns(3)
 with control_cols[0]:
     st.download_button(
         label="Export filtered results (CSV)",
-        data=export_buf.getvalue(),
+        data=export_csv,
         file_name="analysis_results.csv",
         mime="text/csv",
         use_container_width=True,
@@ -110,11 +125,17 @@ with control_cols[0]:
 with control_cols[1]:
     if st.button("Successful Attacks", type="secondary", use_container_width=True):
         st.switch_page("pages/4_Successful_Attacks.py")
+with control_cols[2]:
+    if st.button("Performance", type="secondary", use_container_width=True):
+        st.switch_page("pages/5_Performance.py")
 
 # 1. Metrics row
-total_logs = len(filtered_df)
-attacks = sum(filtered_df["ML Label"] == "malicious") if not filtered_df.empty else 0
-high_risk = sum(filtered_df["Risk Level"].str.lower() == "high") if not filtered_df.empty else 0
+# Log lines, not distinct URLs: each row stands for its occurrences
+occurrences = filtered_df["occurrences"]
+total_logs = int(occurrences.sum())
+distinct_urls = len(filtered_df)
+attacks = int(occurrences[filtered_df["ml_label"] == "malicious"].sum())
+high_risk = int(occurrences[filtered_df["risk_level"] == "High"].sum())
 
 metrics_html = f"""
 <div class="card-grid">
@@ -122,6 +143,10 @@ metrics_html = f"""
     <div class="label muted">Total Logs</div>
     <div class="value">{total_logs:,}</div>
   </div>
+  <div class="glass-card">
+    <div class="label muted">Distinct URLs</div>
+    <div class="value">{distinct_urls:,}</div>
+  </div>
   <div class="glass-card">
     <div class="label muted">Detected Attacks</div>
     <div class="value">{attacks:,}</div>
@@ -139,7 +164,7 @@ st.markdown(
     """
     <div class="glass-card stack">
       <div class="card-title">Traffic Overview</div>
-      <div class="muted">All traffic analyzed via core.pipeline.analyze_urls</div>
+      <div class="muted">All traffic analyzed via core.pipeline.analyze_urls, one card per distinct URL</div>
     </div>
     """,
     unsafe_allow_html=True,
@@ -156,32 +181,36 @@ if filtered_df.empty:
         unsafe_allow_html=True,
     )
 else:
-    for _, row in filtered_df.iterrows():
-        icon = risk_icon(row.get("Risk Level", "Low"))
-        url_text = row.get("URL", "")
-        risk_level = row.get("Risk Level", "Low")
-        risk_score = int(row.get("Risk Score", 0))
-        ml_prob = float(row.get("ML Probability", 0.0))
-        ml_conf_pct = int(round(ml_prob * 100))
-        rules_triggered = row.get("Rules Triggered") or []
-        rules_display = (
-            rules_triggered
-            if isinstance(rules_triggered, str)
-            else ", ".join(rules_triggered) if rules_triggered else "None"
-        )
+    for row, rules in zip(filtered_df.itertuples(index=False), filtered_rules):
+        icon = risk_icon(row.risk_level)
+        url_text = row.url
+        risk_level = row.risk_level
+        risk_score = int(row.risk_score)
+        ml_conf_pct = int(round(float(row.ml_probability) * 100))
+        rules_display = ", ".join(rules) if rules else "None"
+        seen = f" • Seen {row.occurrences:,} times" if row.occurrences > 1 else ""
 
         st.markdown(
             f"""
             <div class="glass-card stack">
               <div class="card-title">{icon} {url_text}</div>
-              <div class="muted">Risk: {risk_level} ({risk_score}) • ML confidence: {ml_conf_pct}%</div>
+              <div class="muted">Risk: {risk_level} ({risk_score}) • ML confidence: {ml_conf_pct}%{seen}</div>
               <div class="muted">Rules: {rules_display}</div>
             </div>
             """,
             unsafe_allow_html=True,
         )
-        with st.expander("Why was this flagged?"):
-            why = row.get("Why Summary", "No explanation available")
+        # Expander bodies run even while collapsed: a toggle builds the summary only when asked for
+        if st.toggle("Why was this flagged?", key=f"why:{url_text}"):
+            why = explain.generate_why_summary(
+                url=row.url,
+                ml_label=row.ml_label,
+                ml_probability=float(row.ml_probability),
+                rules_triggered=rules,
+                risk_score=risk_score,
+                risk_level=risk_level,
+                known_list=row.known_list if pd.notna(row.known_list) else None,
+            )
             st.markdown(f"""<div class="glass-card">{why}</div>""", unsafe_allow_html=True)
 
 # 3. Charts row
@@ -191,13 +220,15 @@ with chart_cols[0]:
         """
         <div class="glass-card stack">
           <div class="card-title">Attack Distribution</div>
-          <div class="muted">Count of benign vs malicious URLs</div>
+          <div class="muted">Log lines with benign vs malicious URLs</div>
         </div>
         """,
         unsafe_allow_html=True,
     )
     if not filtered_df.empty:
-        attack_fig = px.bar(filtered_df, x="ML Label")
+        label_counts = filtered_df.groupby("ml_label", observed=False)["occurrences"].sum()
+        label_counts = label_counts.rename_axis("ML Label").reset_index(name="Log lines")
+        attack_fig = px.bar(label_counts, x="ML Label", y="Log lines")
         attack_fig.update_layout(
             transition={"duration": 700, "easing": "cubic-in-out"},
             margin=dict(l=10, r=10, t=30, b=10),
@@ -220,7 +251,9 @@ with chart_cols[1]:
         unsafe_allow_html=True,
     )
     if not filtered_df.empty:
-        risk_fig = px.pie(filtered_df, names="Risk Level")
+        risk_counts = filtered_df.groupby("risk_level", observed=False)["occurrences"].sum()
+        risk_counts = risk_counts.rename_axis("Risk Level").reset_index(name="Log lines")
+        risk_fig = px.pie(risk_counts, names="Risk Level", values="Log lines")
         risk_fig.update_layout(
             transition={"duration": 700, "easing": "cubic-in-out"},
             margin=dict(l=10, r=10, t=30, b=10),
@@ -1,6 +1,7 @@
 import streamlit as st
-from core.ui_shell import apply_global_styles, top_navbar
-from core.pipeline import analyze_urls
+from core.frames import rules_triggered, why_summaries
+from core.ui_shell import analysis_frame, analysis_progress, analysis_running, apply_global_styles, top_navbar
+from core.pipeline import analyze_urls_frame
 
 st.set_page_config(page_title="Successful Attacks", layout="wide", initial_sidebar_state="collapsed")
 
@@ -23,28 +24,30 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# Prefer existing analysis rows; otherwise re-run on uploaded URLs; otherwise fallback to mock
-analysis_rows = st.session_state.get("analysis_rows")
+# Prefer existing analysis results; otherwise re-run on uploaded URLs; otherwise fallback to mock
+results = analysis_frame()
 uploaded_urls = st.session_state.get("uploaded_urls")
 
-results = analysis_rows
-if not results and uploaded_urls:
+if analysis_running():
+    # The upload is still being analyzed: show what is done rather than re-running it here
+    analysis_progress()
+elif (results is None or results.empty) and uploaded_urls:
     try:
-        results = analyze_urls(uploaded_urls)
+        results = analyze_urls_frame(uploaded_urls, unique=True)
     except Exception as exc:
         st.error(f"Failed to analyze URLs: {exc}")
         st.stop()
 
-if not results:
+if (results is None or results.empty) and not analysis_running():
     mock_urls = [
         "http://example.local/login.php?id=1' OR 1=1",
         "http://evil.tk/admin/panel?cmd=cat%20/etc/passwd",
     ]
-    results = analyze_urls(mock_urls)
+    results = analyze_urls_frame(mock_urls, unique=True)
 
-high_risk = [r for r in results if str(r.get("risk_level", "")).lower() == "high"]
+high_risk = results[results["risk_level"] == "High"] if results is not None else None
 
-if not high_risk:
+if high_risk is None or high_risk.empty:
     st.markdown(
         """
         <div class="glass-card stack">
@@ -56,12 +59,11 @@ if not high_risk:
     )
     st.stop()
 
-for row in high_risk:
-    url = row.get("url", "")
-    risk_score = int(row.get("risk_score", 0))
-    ml_prob = float(row.get("ml_probability", 0.0))
-    ml_conf_pct = int(round(ml_prob * 100))
-    rules = row.get("rules_triggered") or []
+# Only the high-risk rows get a summary, built from the frame's columns (memoised in core.explain)
+for row, rules, why in zip(high_risk.itertuples(index=False), rules_triggered(high_risk), why_summaries(high_risk)):
+    url = row.url
+    risk_score = int(row.risk_score)
+    ml_conf_pct = int(round(float(row.ml_probability) * 100))
     rules_display = ", ".join(rules) if rules else "None"
 
     st.markdown(
@@ -69,6 +71,7 @@ for row in high_risk:
         <div class="glass-card stack">
           <div class="card-title">🚨 {url}</div>
           <div class="muted">Risk Score: {risk_score}</div>
+          <div class="muted">Seen in {row.occurrences:,} log line{"s" if row.occurrences > 1 else ""}</div>
           <div class="muted">ML confidence: {ml_conf_pct}%</div>
           <div class="muted">Rules: {rules_display}</div>
         </div>
@@ -76,4 +79,4 @@ for row in high_risk:
         unsafe_allow_html=True,
     )
     with st.expander("Why was this flagged?"):
-        st.markdown(f"""<div class="glass-card">{row.get("why_summary", "No explanation available")}</div>""", unsafe_allow_html=True)
+        st.markdown(f"""<div class="glass-card">{why}</div>""", unsafe_allow_html=True)
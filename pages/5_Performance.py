@@ -0,0 +1,210 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from core.known_urls import SHORT_CIRCUIT_STATS, get_known_url_filters, reload_known_url_filters
+from core.rulepack import get_rule_pack, reload_rule_pack
+from core.timing import PIPELINE_TIMER
+from core.ui_shell import apply_global_styles, top_navbar
+
+PLOTLY_TEMPLATE = {
+    "paper_bgcolor": "rgba(0,0,0,0)",
+    "plot_bgcolor": "rgba(6,30,41,0.75)",
+    "font": {"color": "#F3F4F4"},
+    "colorway": ["#5F9598", "#1D546D", "#F3F4F4"],
+}
+GRID_STYLE = {"xaxis": {"gridcolor": "rgba(243,244,244,0.12)"}, "yaxis": {"gridcolor": "rgba(243,244,244,0.12)"}}
+
+st.set_page_config(page_title="Performance", layout="wide", initial_sidebar_state="collapsed")
+
+apply_global_styles()
+top_navbar("Dashboard")
+
+# Auth guard
+if not st.session_state.get("auth_ok"):
+    st.session_state["post_login_target"] = "pages/5_Performance.py"
+    st.session_state.show_auth = True
+    st.switch_page("app.py")
+
+st.markdown(
+    """
+    <div class="glass-card stack">
+      <div class="card-title">Pipeline Performance</div>
+      <div class="muted">Per-stage latency of analyze_urls since the server started or the counters were reset.</div>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+
+control_cols = st.columns(3)
+with control_cols[0]:
+    enabled = st.toggle("Record stage timings", value=PIPELINE_TIMER.enabled)
+    if enabled != PIPELINE_TIMER.enabled:
+        if enabled:
+            PIPELINE_TIMER.enable()
+        else:
+            PIPELINE_TIMER.disable()
+with control_cols[1]:
+    if st.button("Reset counters", type="secondary", use_container_width=True):
+        PIPELINE_TIMER.reset()
+with control_cols[2]:
+    if st.button("Back to Dashboard", type="secondary", use_container_width=True):
+        st.switch_page("pages/3_Dashboard.py")
+
+rows = PIPELINE_TIMER.snapshot()
+if not rows:
+    st.markdown(
+        """
+        <div class="glass-card stack">
+          <div class="card-title">No timings yet</div>
+          <div class="muted">Turn on recording above, then analyze logs from the Upload page.</div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+else:
+    stats_df = pd.DataFrame(rows)
+    stage_total = stats_df.loc[stats_df["stage"] != "analyze_urls", "total_s"].sum()
+    stats_df["share"] = stats_df["total_s"] / stage_total if stage_total else 0.0
+    stats_df.loc[stats_df["stage"] == "analyze_urls", "share"] = None
+
+    # 1. Time split across stages
+    chart_cols = st.columns(2)
+    with chart_cols[0]:
+        st.markdown(
+            """
+            <div class="glass-card stack">
+              <div class="card-title">Where the time goes</div>
+              <div class="muted">Total seconds spent per stage</div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        split_fig = px.bar(stats_df[stats_df["stage"] != "analyze_urls"], x="stage", y="total_s")
+        split_fig.update_layout(margin=dict(l=10, r=10, t=30, b=10), **PLOTLY_TEMPLATE, **GRID_STYLE)
+        st.plotly_chart(split_fig, use_container_width=True)
+
+    # 2. Latency histogram of one stage
+    with chart_cols[1]:
+        st.markdown(
+            """
+            <div class="glass-card stack">
+              <div class="card-title">Latency histogram</div>
+              <div class="muted">Calls per latency bucket (upper edge, ms)</div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        stage = st.selectbox("Stage", stats_df["stage"].tolist(), label_visibility="collapsed")
+        hist_df = pd.DataFrame(PIPELINE_TIMER.histogram(stage))
+        if not hist_df.empty:
+            hist_df["bucket"] = hist_df["le_ms"].map(lambda ms: f"≤ {ms:.3g}")
+            hist_fig = px.bar(hist_df, x="bucket", y="calls")
+            hist_fig.update_layout(margin=dict(l=10, r=10, t=30, b=10), **PLOTLY_TEMPLATE, **GRID_STYLE)
+            st.plotly_chart(hist_fig, use_container_width=True)
+
+    # 3. Per-stage table
+    st.markdown(
+        """
+        <div class="glass-card stack">
+          <div class="card-title">Stage statistics</div>
+          <div class="muted">known_urls, ml, rules_batch and analyze_urls are timed per batch call; rules, risk and explain per URL.
+          Percentiles are histogram bucket edges.</div>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    st.dataframe(
+        stats_df.rename(
+            columns={
+                "stage": "Stage",
+                "calls": "Calls",
+                "items": "URLs",
+                "total_s": "Total (s)",
+                "mean_ms": "Mean (ms)",
+                "p50_ms": "p50 (ms)",
+                "p90_ms": "p90 (ms)",
+                "p99_ms": "p99 (ms)",
+                "max_ms": "Max (ms)",
+                "share": "Share of stage time",
+            }
+        ),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Share of stage time": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0)},
+    )
+
+# 4. Rule pack: per-rule hits and evaluation time
+pack = get_rule_pack()
+st.markdown(
+    f"""
+    <div class="glass-card stack">
+      <div class="card-title">Rule pack: {pack.name} v{pack.version}</div>
+      <div class="muted">Hits per rule since the pack was loaded. With rule profiling on, regex and host rules
+      are timed individually; literal rules share one scan per URL, timed as "(literal scan)".</div>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+rule_cols = st.columns(3)
+with rule_cols[0]:
+    profiling = st.toggle("Profile rules", value=pack.profile)
+    if profiling != pack.profile:
+        pack.set_profile(profiling)
+with rule_cols[1]:
+    if st.button("Reset rule counters", type="secondary", use_container_width=True):
+        pack.reset_counters()
+with rule_cols[2]:
+    if st.button("Reload rules", type="secondary", use_container_width=True):
+        try:
+            pack = reload_rule_pack()
+            st.success(f"Loaded {pack.path} ({sum(len(s.rules) for s in pack.sets.values())} rules)")
+        except (OSError, ValueError) as exc:
+            st.error(f"Kept the current rules: {exc}")
+
+rule_df = pd.DataFrame(pack.stats()).sort_values("total_ms", ascending=False, kind="stable")
+st.dataframe(
+    rule_df.rename(
+        columns={
+            "set": "Set",
+            "rule": "Rule",
+            "kind": "Kind",
+            "hits": "Hits",
+            "runs": "Evaluations",
+            "total_ms": "Total (ms)",
+            "mean_us": "Mean (µs)",
+        }
+    ),
+    hide_index=True,
+    use_container_width=True,
+)
+
+# 5. Known-URL lists: traffic settled before ML scoring
+filters = get_known_url_filters()
+st.markdown(
+    """
+    <div class="glass-card stack">
+      <div class="card-title">Known-URL lists</div>
+      <div class="muted">URLs on the known-good or known-bad list skip the ML model. "Deny filter rejects" are
+      filter hits that exact confirmation found unlisted.</div>
+    </div>
+    """,
+    unsafe_allow_html=True,
+)
+known_cols = st.columns(2)
+with known_cols[0]:
+    if st.button("Reset list counters", type="secondary", use_container_width=True):
+        SHORT_CIRCUIT_STATS.reset()
+with known_cols[1]:
+    if st.button("Reload lists", type="secondary", use_container_width=True):
+        try:
+            filters = reload_known_url_filters()
+        except (OSError, ValueError) as exc:
+            st.error(f"Kept the current lists: {exc}")
+short_circuit = SHORT_CIRCUIT_STATS.stats()
+list_sizes = filters.stats()
+metric_cols = st.columns(5)
+metric_cols[0].metric(f"Allowed ({list_sizes['allow_urls']:,} listed)", f"{short_circuit['allowed']:,}")
+metric_cols[1].metric(f"Denied ({list_sizes['deny_urls']:,} listed)", f"{short_circuit['denied']:,}")
+metric_cols[2].metric("Scored by ML", f"{short_circuit['scored']:,}")
+metric_cols[3].metric("Short-circuited", f"{short_circuit['short_circuit_fraction']:.1%}")
+metric_cols[4].metric("Deny filter rejects", f"{short_circuit['deny_rejected']:,}")
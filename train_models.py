@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import argparse
+import os
+import shutil
 from typing import Dict, Tuple
 
 import numpy as np
@@ -13,10 +16,15 @@ from sklearn.metrics import (
     precision_score,
     recall_score,
 )
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.svm import LinearSVC
 from sklearn.ensemble import RandomForestClassifier
 
-from feature_extractor import build_feature_matrix
+import core.registry as registry
+from core.forest import flat_forest_dir, is_forest, replace_forest_export
+from core.ml import CASCADE_BAND, MODEL_PATHS, NUMERIC_MODE, _malicious_probs, export_linear_scorer
+from feature_extractor import FEATURE_MODES, NUMERIC_FEATURE_COLUMNS, HashedNgramVectorizer, build_feature_matrix
 
 
 RANDOM_STATE = 42
@@ -50,6 +58,55 @@ def train_random_forest(X_train, y_train) -> RandomForestClassifier:
     return clf
 
 
+def numeric_block(X) -> np.ndarray:
+    """The NUMERIC_FEATURE_COLUMNS part of a combined [numeric | text] matrix, dense."""
+    return X[:, : len(NUMERIC_FEATURE_COLUMNS)].toarray()
+
+
+def train_numeric(X_train, y_train):
+    """First cascade stage: scaled logistic regression over the numeric columns only."""
+    clf = make_pipeline(
+        StandardScaler(),
+        LogisticRegression(max_iter=1000, random_state=RANDOM_STATE),
+    )
+    clf.fit(numeric_block(X_train), y_train)
+    return clf
+
+
+def evaluate_cascade(numeric_model, full_model, X, y, band: Tuple[float, float] = CASCADE_BAND) -> Dict[str, float]:
+    """
+    Accuracy of the numeric -> full cascade against always using full_model, and
+    the share of rows that the numeric stage settles on its own.
+    """
+    y = np.asarray(y)
+    full_probs = _malicious_probs(full_model, X)
+    probs = _malicious_probs(numeric_model, numeric_block(X)).astype(np.float64)
+    uncertain = (probs > band[0]) & (probs < band[1])
+    probs[uncertain] = full_probs[uncertain]
+
+    def accuracy(p: np.ndarray) -> float:
+        return float(np.mean(np.where(p >= 0.5, "malicious", "benign") == y)) if len(y) else 0.0
+
+    full_acc, cascade_acc = accuracy(full_probs), accuracy(probs)
+    return {
+        "band": list(band),
+        "numeric_fraction": float(1 - uncertain.mean()) if len(y) else 0.0,
+        "full_accuracy": full_acc,
+        "cascade_accuracy": cascade_acc,
+        "accuracy_delta": cascade_acc - full_acc,
+    }
+
+
+def save_artifact(obj, path: Path) -> None:
+    """
+    joblib.dump to a temp file and rename it into place. Serving processes mmap
+    these files, and overwriting one in place would crash them.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
 def evaluate(model, X, y) -> Dict[str, float]:
     preds = model.predict(X)
     return {
@@ -61,8 +118,9 @@ def evaluate(model, X, y) -> Dict[str, float]:
     }
 
 
-def main() -> None:
-    X_train, X_val, X_test, y_train, y_val, y_test, vectorizer = build_feature_matrix()
+def main(feature_mode: str = "tfidf") -> None:
+    print(f"[info] Building features (mode={feature_mode}) ...")
+    X_train, X_val, X_test, y_train, y_val, y_test, vectorizer = build_feature_matrix(feature_mode=feature_mode)
 
     print("[info] Training Logistic Regression ...")
     log_reg = train_logistic(X_train, y_train)
@@ -73,6 +131,9 @@ def main() -> None:
     print("[info] Training Random Forest ...")
     rf = train_random_forest(X_train, y_train)
 
+    print("[info] Training numeric cascade stage ...")
+    numeric_model = train_numeric(X_train, y_train)
+
     print("[info] Evaluating models on validation set ...")
     val_results = {
         "logistic_val": evaluate(log_reg, X_val, y_val),
@@ -119,6 +180,14 @@ def main() -> None:
     for name, metrics in test_results.items():
         print_report(name, metrics)
 
+    cascade = evaluate_cascade(numeric_model, best_model, X_test, y_test)
+    print(f"\n=== Cascade (numeric -> {best_name}, band={tuple(cascade['band'])}) on test ===")
+    print(
+        f"numeric-only={cascade['numeric_fraction']:.1%}  full={1 - cascade['numeric_fraction']:.1%}  "
+        f"accuracy={cascade['cascade_accuracy']:.3f} vs {cascade['full_accuracy']:.3f} "
+        f"(delta {cascade['accuracy_delta']:+.3f})"
+    )
+
     # Comparison summary table
     print("\n=== Model Comparison (val vs test) ===")
     header = f"{'Model':<10} {'Val F1':>8} {'Test F1':>10} {'Precision':>10} {'Recall':>8}"
@@ -139,11 +208,50 @@ def main() -> None:
     # Persist best model and vectorizer
     models_dir = Path("models")
     models_dir.mkdir(parents=True, exist_ok=True)
-    joblib.dump(best_model, models_dir / "url_model.pkl")
-    joblib.dump(vectorizer, models_dir / "vectorizer.pkl")
-    print(f"[info] Saved best model to {models_dir / 'url_model.pkl'}")
-    print(f"[info] Saved vectorizer to {models_dir / 'vectorizer.pkl'}")
+    model_path, vectorizer_path = MODEL_PATHS[feature_mode]
+    save_artifact(best_model, model_path)
+    if isinstance(vectorizer, HashedNgramVectorizer) and vectorizer.idf_ is not None:
+        vectorizer.save_idf(vectorizer_path.with_suffix(".idf.npy"))
+    save_artifact(vectorizer, vectorizer_path)
+    print(f"[info] Saved best model to {model_path}")
+    forest_dir = flat_forest_dir(model_path)
+    if is_forest(best_model):
+        # Serving processes map these node arrays instead of unpickling the forest
+        replace_forest_export(best_model, forest_dir)
+        print(f"[info] Saved flat forest arrays to {forest_dir}")
+    else:
+        shutil.rmtree(forest_dir, ignore_errors=True)
+    print(f"[info] Saved vectorizer to {vectorizer_path}")
+
+    # Publish a new registry version; running servers hot-swap to it
+    version = registry.publish(
+        best_model,
+        vectorizer,
+        feature_mode=feature_mode,
+        metrics={
+            "selected": best_name,
+            "val_f1": val_results[best_name]["f1"],
+            "test_f1": test_results["best_test"]["f1"],
+        },
+    )
+    print(f"[info] Published model version {version} to {registry.REGISTRY_DIR}")
+
+    numeric_path, _ = MODEL_PATHS[NUMERIC_MODE]
+    save_artifact(numeric_model, numeric_path)
+    numeric_version = registry.publish(numeric_model, None, feature_mode=NUMERIC_MODE, metrics={"cascade": cascade})
+    print(f"[info] Saved numeric cascade model to {numeric_path} (version {numeric_version})")
+
+    # Linear TF-IDF models also get a compiled artifact scored without sklearn
+    if feature_mode == "tfidf":
+        scorer_path = models_dir / "linear_scorer.bin"
+        if best_model is rf:
+            scorer_path.unlink(missing_ok=True)
+        else:
+            export_linear_scorer(best_model, vectorizer, scorer_path, version=version)
+            print(f"[info] Saved compiled linear scorer to {scorer_path}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train and select the URL classifier.")
+    parser.add_argument("--features", choices=FEATURE_MODES, default="tfidf", help="Text feature mode")
+    main(parser.parse_args().features)